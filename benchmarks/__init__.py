@@ -0,0 +1 @@
+"""Benchmarks for the GCode parsers, see README.md."""
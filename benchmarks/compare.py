@@ -0,0 +1,72 @@
+"""Compare two benchmark result files, flagging regressions.
+
+    python -m benchmarks.compare baseline.json results.json --threshold 0.1
+
+Exits with status 1 if any benchmark regressed by more than the threshold (a fraction, 0.1 = 10%) in throughput,
+99th percentile latency or peak memory. Latencies and throughput of small runs are noisy, so compare runs with
+enough lines on the same machine, and pick a threshold that fits.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any
+
+DEFAULT_THRESHOLD = 0.1
+
+# The measurements that are compared, and whether higher values are better
+METRICS = {
+    "lines_per_second": True,
+    "p99_us": False,
+    "peak_memory_mb": False,
+}
+
+
+def compare(
+    baseline: dict[str, Any],
+    results: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> tuple[list[str], list[str]]:
+    """Compare two sets of results, returning a report (one line per benchmark and metric) and the regressions."""
+    report = []
+    regressions = []
+    for key, result in results["results"].items():
+        baseline_result = baseline["results"].get(key)
+        if baseline_result is None:
+            report.append(f"{key}: not in baseline")
+            continue
+
+        for metric, higher_is_better in METRICS.items():
+            old, new = baseline_result[metric], result[metric]
+            change = (new - old) / old if old else 0.0
+            is_regression = -change > threshold if higher_is_better else change > threshold
+            line = f"{key:<30} {metric:<18} {old:>14,.2f} -> {new:>14,.2f} ({change:+.1%})"
+            if is_regression:
+                line += "  REGRESSION"
+                regressions.append(line)
+            report.append(line)
+
+    return report, regressions
+
+
+def main(argv: list[str] | None = None):
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    argument_parser.add_argument("baseline", help="Results to compare against")
+    argument_parser.add_argument("results", help="New results")
+    argument_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = argument_parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.results) as f:
+        results = json.load(f)
+
+    report, regressions = compare(baseline, results, args.threshold)
+    print("\n".join(report))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
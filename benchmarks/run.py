@@ -0,0 +1,173 @@
+"""Run the parser benchmarks and save the results as JSON.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --lines 2000 --workload literal_cam --dialect linuxcnc --fast-path
+    python -m benchmarks.run --workload expression_heavy --backend descent
+
+For every workload and dialect, this measures the throughput (lines per second) of parsing all lines of the
+workload, the latency percentiles of parsing individual lines, and the peak memory allocated while parsing (in a
+separate run, because tracing memory allocations slows parsing down).
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any
+
+from benchmarks.workloads import DEFAULT_SEED, WORKLOADS, Workload
+from rs274_parser.backends import BACKENDS, DEFAULT_BACKEND
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.linuxcnc import MachineState as LinuxCNCMachineState
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+
+DIALECTS: dict[str, tuple[type[Rs274], type[MachineState]]] = {
+    "rs274": (Rs274, MachineState),
+    "linuxcnc": (LinuxCNC, LinuxCNCMachineState),
+}
+DEFAULT_LINE_COUNT = 20000
+PERCENTILES = [50, 90, 99]
+
+
+def create_parser(dialect: str, workload: Workload, parser_options: dict[str, Any]) -> Rs274:
+    parser_class, machine_state_class = DIALECTS[dialect]
+    machine_state = machine_state_class(is_block_delete_switch_enabled=workload.is_block_delete_switch_enabled)
+    parser = parser_class(machine_state, **parser_options)
+    # Compile the grammar up front, so it's not part of the measurements
+    parser.parser
+    return parser
+
+
+def run_benchmark(
+    workload: Workload,
+    dialect: str,
+    line_count: int,
+    seed: int = DEFAULT_SEED,
+    repeat: int = 3,
+    parser_options: dict[str, Any] | None = None,
+) -> dict[str, float]:
+    """Benchmark parsing a workload with a dialect, returning the measurements."""
+    parser_options = parser_options or {}
+    lines = workload.lines(line_count, seed)
+
+    # Throughput: the best of a few runs, which is the least affected by whatever else is running
+    best_time = float("inf")
+    for _ in range(repeat):
+        parser = create_parser(dialect, workload, parser_options)
+        gc.collect()
+        start = time.perf_counter()
+        for _ in parser.iter_parse(lines):
+            pass
+        best_time = min(best_time, time.perf_counter() - start)
+
+    # Latency of parsing individual lines
+    parser = create_parser(dialect, workload, parser_options)
+    perf_counter_ns = time.perf_counter_ns
+    parse_line = parser._parse_line
+    latencies = []
+    for line in lines:
+        start_ns = perf_counter_ns()
+        parse_line(line)
+        latencies.append(perf_counter_ns() - start_ns)
+    quantiles = statistics.quantiles(latencies, n=100)
+
+    # Peak memory, keeping all parsed lines like parse() does
+    parser = create_parser(dialect, workload, parser_options)
+    gc.collect()
+    tracemalloc.start()
+    parsed_lines = parser.parse("\n".join(lines))
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed_lines
+
+    return {
+        "lines": len(lines),
+        "lines_per_second": len(lines) / best_time,
+        **{f"p{percentile}_us": quantiles[percentile - 1] / 1000 for percentile in PERCENTILES},
+        "max_us": max(latencies) / 1000,
+        "peak_memory_mb": peak_memory / 1e6,
+    }
+
+
+def run(
+    workload_names: list[str],
+    dialects: list[str],
+    line_count: int,
+    seed: int = DEFAULT_SEED,
+    repeat: int = 3,
+    parser_options: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    try:
+        package_version = version("rs274-parser")
+    except PackageNotFoundError:
+        package_version = None
+
+    results = {}
+    for workload_name in workload_names:
+        workload = WORKLOADS[workload_name]
+        for dialect in dialects:
+            if dialect not in workload.dialects:
+                continue
+            key = f"{dialect}/{workload_name}"
+            results[key] = run_benchmark(workload, dialect, line_count, seed, repeat, parser_options)
+            print(format_result(key, results[key]), file=sys.stderr)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rs274_parser": package_version,
+            "line_count": line_count,
+            "seed": seed,
+            "parser_options": parser_options or {},
+        },
+        "results": results,
+    }
+
+
+def format_result(key: str, result: dict[str, float]) -> str:
+    return (
+        f"{key:<30} {result['lines_per_second']:>10,.0f} lines/s"
+        f"  p50 {result['p50_us']:>8.1f}us  p99 {result['p99_us']:>8.1f}us"
+        f"  peak {result['peak_memory_mb']:>8.1f}MB"
+    )
+
+
+def main(argv: list[str] | None = None):
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    argument_parser.add_argument("--output", "-o", help="Path to save the results to, as JSON")
+    argument_parser.add_argument("--lines", type=int, default=DEFAULT_LINE_COUNT, help="Lines per workload")
+    argument_parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    argument_parser.add_argument("--repeat", type=int, default=3, help="Runs to take the best throughput of")
+    argument_parser.add_argument("--workload", action="append", choices=list(WORKLOADS), help="Default: all")
+    argument_parser.add_argument("--dialect", action="append", choices=list(DIALECTS), help="Default: all")
+    argument_parser.add_argument("--fast-path", action="store_true", help="Enable the fast path for literal lines")
+    argument_parser.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND, help="Parser backend")
+    args = argument_parser.parse_args(argv)
+
+    parser_options: dict[str, Any] = {}
+    if args.fast_path:
+        parser_options["fast_path"] = True
+    if args.backend != DEFAULT_BACKEND:
+        parser_options["backend"] = args.backend
+
+    results = run(
+        args.workload or list(WORKLOADS),
+        args.dialect or list(DIALECTS),
+        line_count=args.lines,
+        seed=args.seed,
+        repeat=args.repeat,
+        parser_options=parser_options,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Deterministic generators of synthetic GCode workloads.
+
+Every workload generates the same lines for the same number of lines and seed, so results of different runs (and
+different versions of the parser) are comparable.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+DEFAULT_SEED = 274
+
+
+def coordinate(rng: random.Random, low: float = -200, high: float = 200) -> str:
+    return f"{rng.uniform(low, high):.4f}"
+
+
+def literal_cam(rng: random.Random, line_count: int) -> list[str]:
+    """Plain 3-axis CAM output: mostly linear moves, some arcs, rapids and feed changes, with line numbers."""
+    lines = ["G21 G90 G17", "T1 M6", "S12000 M3"]
+    z = 5.0
+    while len(lines) < line_count:
+        choice = rng.random()
+        if choice < 0.05:
+            z = round(rng.uniform(-10, 0), 2)
+            lines.extend(["G0 Z5.0", f"G0 X{coordinate(rng)} Y{coordinate(rng)}", f"G1 Z{z} F300"])
+        elif choice < 0.15:
+            lines.append(
+                f"G2 X{coordinate(rng)} Y{coordinate(rng)} I{coordinate(rng, -10, 10)} J{coordinate(rng, -10, 10)}"
+            )
+        elif choice < 0.2:
+            lines.append(f"G1 X{coordinate(rng)} Y{coordinate(rng)} F{rng.randrange(500, 3000, 100)}")
+        else:
+            lines.append(f"G1 X{coordinate(rng)} Y{coordinate(rng)} Z{z}")
+    return [f"N{(i + 1) * 10} {line}" for i, line in enumerate(lines[:line_count])]
+
+
+def comment_heavy(rng: random.Random, line_count: int) -> list[str]:
+    """Moves with comments, and lines that are nothing but comments."""
+    words = ["roughing", "pass", "tool", "change", "contour", "pocket", "finish", "depth", "check", "clearance"]
+    lines = []
+    for _ in range(line_count):
+        comment = " ".join(rng.choices(words, k=rng.randint(2, 8)))
+        if rng.random() < 0.4:
+            lines.append(f"({comment})")
+        else:
+            lines.append(f"G1 X{coordinate(rng)} (move {comment}) Y{coordinate(rng)} (end)")
+    return lines
+
+
+def expression_heavy(rng: random.Random, line_count: int) -> list[str]:
+    """Words with nested expressions and unary functions, but without any parameters."""
+    functions = ["sin", "cos", "abs", "round", "fix", "fup", "atan"]
+
+    def literal() -> str:
+        return f"{rng.uniform(0.1, 10):.3f}"
+
+    def expression(depth: int) -> str:
+        if depth == 0 or rng.random() < 0.3:
+            return literal()
+        choice = rng.random()
+        if choice < 0.1:
+            return f"sqrt[abs[{expression(depth - 1)}]]"
+        if choice < 0.4:
+            return f"{rng.choice(functions)}[{expression(depth - 1)}]"
+        # Only divide by literals and square things, so that no expression is out of range
+        operator = rng.choice(["+", "-", "*", "/", "**"])
+        operand = {"/": literal(), "**": "2"}.get(operator) or expression(depth - 1)
+        return f"[{expression(depth - 1)} {operator} {operand}]"
+
+    return [f"G1 X[{expression(3)}] Y[{expression(3)}] F[{expression(2)} * 100]" for _ in range(line_count)]
+
+
+def numeric_parameters(rng: random.Random, line_count: int) -> list[str]:
+    """Numeric parameter assignments and reads, e.g. in a parametric drilling pattern."""
+    lines = [f"#{index} = {rng.uniform(0, 10):.3f}" for index in range(1, 11)]
+    while len(lines) < line_count:
+        index = rng.randint(1, 10)
+        if rng.random() < 0.3:
+            lines.append(f"#{index} = [#{rng.randint(1, 10)} + {rng.uniform(-1, 1):.3f}]")
+        else:
+            lines.append(f"G1 X[#{index} * 2] Y#{rng.randint(1, 10)} Z-#[{rng.randint(1, 5)} + 5]")
+    return lines[:line_count]
+
+
+def named_parameters(rng: random.Random, line_count: int) -> list[str]:
+    """Like numeric_parameters, but with named parameters (LinuxCNC only)."""
+    names = ["width", "depth", "feed", "step_over", "x_offset", "y_offset"]
+    lines = [f"#<{name}> = {rng.uniform(1, 10):.3f}" for name in names]
+    while len(lines) < line_count:
+        if rng.random() < 0.3:
+            lines.append(f"#<{rng.choice(names)}> = [#<{rng.choice(names)}> + {rng.uniform(-1, 1):.3f}]")
+        else:
+            lines.append(f"G1 X[#<x_offset> + #<width> * {rng.randint(1, 9)}] Y#<y_offset> F[#<feed> * 100]")
+    return lines[:line_count]
+
+
+def block_delete(rng: random.Random, line_count: int) -> list[str]:
+    """Optional (block delete) lines mixed with regular moves."""
+    lines = []
+    for _ in range(line_count):
+        line = f"G1 X{coordinate(rng)} Y{coordinate(rng)}"
+        lines.append(f"/ M0 {line}" if rng.random() < 0.3 else line)
+    return lines
+
+
+@dataclass(frozen=True)
+class Workload:
+    name: str
+    generate: Callable[[random.Random, int], list[str]]
+    dialects: tuple[str, ...] = ("rs274", "linuxcnc")
+    is_block_delete_switch_enabled: bool = False
+
+    def lines(self, line_count: int, seed: int = DEFAULT_SEED) -> list[str]:
+        return self.generate(random.Random(seed), line_count)
+
+
+WORKLOADS = {
+    workload.name: workload
+    for workload in [
+        Workload("literal_cam", literal_cam),
+        Workload("comment_heavy", comment_heavy),
+        Workload("expression_heavy", expression_heavy),
+        Workload("numeric_parameters", numeric_parameters),
+        Workload("named_parameters", named_parameters, dialects=("linuxcnc",)),
+        Workload("block_delete", block_delete, is_block_delete_switch_enabled=True),
+    ]
+}
@@ -0,0 +1,88 @@
+"""Parsing GCode that arrives asynchronously, e.g. over a network connection.
+
+aparse() parses lines as soon as they arrive, without buffering the whole program. It reads the next chunk of data
+only once the consumer asks for more lines than have been received so far, so a slow consumer slows down reading
+from the source (and for an asyncio.StreamReader, that in turn pauses reading from the underlying connection once its
+buffer is full). Parsing itself is synchronous, so aparse() regularly yields control to the event loop while parsing
+a chunk with many lines, to keep the event loop responsive.
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator
+
+from rs274_parser.files import LINE_BOUNDARIES, line_boundary_pattern
+from rs274_parser.types import Line
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import Rs274
+
+# How many bytes to read from a stream reader at once
+CHUNK_SIZE = 64 * 1024
+# The longest time (in seconds) to parse lines before yielding control to the event loop
+YIELD_INTERVAL = 0.005
+
+
+async def iter_chunks(source: asyncio.StreamReader | AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    if isinstance(source, asyncio.StreamReader):
+        while chunk := await source.read(CHUNK_SIZE):
+            yield chunk
+    else:
+        async for chunk in source:
+            yield chunk
+
+
+async def iter_lines(
+    source: asyncio.StreamReader | AsyncIterable[bytes],
+    encoding: str = "utf-8",
+) -> AsyncIterator[str]:
+    """Split chunks of bytes into lines, including lines and characters that are split across chunks.
+
+    Lines are split like GCodeFile splits them, on the line boundaries of str.splitlines() (see
+    rs274_parser.files.line_boundary_pattern()), and without an empty line at the end if the data ends with a line
+    boundary. Lines are only decoded once they're complete.
+    """
+    line_boundary = line_boundary_pattern(encoding)
+    carriage_return = "\r".encode(encoding)
+    # The most bytes of a line boundary that can be at the end of a chunk, with the rest in the next one
+    overlap = max(len(boundary.encode(encoding, "ignore")) for boundary in LINE_BOUNDARIES) - 1
+    # The pieces of the line that's still incomplete, and the bytes at its end that a line boundary may start in. Only
+    # those bytes are searched again with the next chunk, so that long lines don't take quadratic time.
+    pending: list[bytes] = []
+    tail = b""
+    async for chunk in iter_chunks(source):
+        data = tail + chunk
+        start = 0
+        for boundary in line_boundary.finditer(data):
+            if boundary.end() == len(data) and boundary.group() == carriage_return:
+                # The next chunk may start with the "\n" of a "\r\n"
+                break
+            pending.append(data[start : boundary.start()])
+            yield b"".join(pending).decode(encoding)
+            pending.clear()
+            start = boundary.end()
+        tail_start = max(start, len(data) - overlap)
+        pending.append(data[start:tail_start])
+        tail = data[tail_start:]
+
+    # Only a "\r" can be left after the last line
+    pending.append(tail)
+    for line in b"".join(pending).decode(encoding).splitlines():
+        yield line
+
+
+async def aparse(
+    parser: "Rs274",
+    source: asyncio.StreamReader | AsyncIterable[bytes],
+    encoding: str = "utf-8",
+    yield_interval: float = YIELD_INTERVAL,
+) -> AsyncIterator[Line]:
+    """Parse GCode from an asyncio stream or async iterable of bytes, see Rs274.aparse()."""
+    last_yield = time.monotonic()
+    async for line in iter_lines(source, encoding):
+        yield parser._parse_line(line)
+
+        now = time.monotonic()
+        if now - last_yield >= yield_interval:
+            await asyncio.sleep(0)
+            last_yield = time.monotonic()
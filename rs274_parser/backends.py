@@ -0,0 +1,314 @@
+"""Parser backends, which run lines of GCode through the grammar and call the parser's transform_* methods.
+
+The "pe" backend matches lines with the dialect's compiled PEG grammar. The "descent" backend parses lines with a
+hand-written recursive descent parser instead, which is a lot faster for lines with expressions and parameters. Each
+function of the descent parser mirrors a rule of the grammar, and its regular expressions mirror the grammar's
+terminals (including ignored whitespace and whitespace within numbers) with possessive quantifiers, like the fast path
+does (see rs274_parser.fast_path). The three levels of binary operations are parsed in a single loop by operator
+precedence.
+
+Both backends hand the same items to the same transform_* methods in the same order, so they result in the same lines,
+machine state and errors. The only calls the descent parser leaves out are those that are the identity for plain ints
+and floats: operations without any operators (which the grammar's l1/l2/l3 rules pass on for every operand) and
+operands and word numbers without a sign. Those calls are still made for any other value, e.g. for the complex number
+that raising a negative number to a fractional power results in, which the transforms don't accept.
+
+The descent parser only knows the grammars of the RS274/NGC and LinuxCNC dialects, with the "line" start rule and
+without an extra rule. Lines of any other grammar are parsed by pe, and so is any line that the descent parser doesn't
+recognise, which also takes care of raising the right syntax errors. Giving up on a line halfway through doesn't need
+to undo anything: the PEG evaluates the actions of a line in the same order while it matches it, so up to that point,
+pe calls the same transforms with the same values again (setting the same pending parameter values).
+"""
+
+import re
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, cast
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import Rs274
+
+DEFAULT_BACKEND = "pe"
+
+BLOCK_DELETE = re.compile(r"[ \t]*+/")
+LINE_NUMBER = re.compile(r"[ \t]*+N[ \t]*+(-?+[0-9 \t]++)")
+STATEMENT = re.compile(r"[ \t]*+(?:(?P<letter>[a-zA-Z])|\([ \t]*+(?P<comment>[^)]*+)\)|(?P<parameter>#))")
+_REAL_VALUE = r"""(?:
+    (?P<float>-?+[0-9 \t]*+\.[0-9 \t]++)|(?P<integer>-?+[0-9 \t]++)
+    |
+    (?P<expression>\[)
+    |
+    (?P<parameter>\#)
+    |
+    (?P<unary_operator>(?i:abs|acos|asin|atan|cos|exp|fix|fup|ln|round|sin|sqrt|tan))
+)"""
+REAL_VALUE = re.compile(r"[ \t]*+" + _REAL_VALUE, re.VERBOSE | re.ASCII)
+# A real value optionally preceded by a sign, like operand and word_number (the sign group is empty without a sign)
+SIGNED_REAL_VALUE = re.compile(r"[ \t]*+(?P<sign>[+-]?+)[ \t]*+" + _REAL_VALUE, re.VERBOSE | re.ASCII)
+PARAMETER_INDEX = re.compile(r"[ \t]*+(?:(?P<integer>-?+[0-9 \t]++)|(?P<expression>\[))")
+PARAMETER_SETTING = re.compile(r"[ \t]*+(-?+[0-9 \t]++)[ \t]*+=")
+NAMED_PARAMETER = re.compile(r"<[ \t]*+([^>]++)>")
+NAMED_PARAMETER_SETTING = re.compile(r"<[ \t]*+([^>]++)>[ \t]*+=")
+# Named after the rules of the operations the operators belong to
+BINARY_OPERATOR = re.compile(r"[ \t]*+(?:(?P<l3>\*\*)|(?P<l2>[*/])|(?P<l1>[+-]|(?i:and|or|xor)))", re.ASCII)
+OPENING_BRACKET = re.compile(r"[ \t]*+\[")
+CLOSING_BRACKET = re.compile(r"[ \t]*+\]")
+SEMICOLON_COMMENT = re.compile(r"[ \t]*+;[ \t]*+(.*+)", re.DOTALL)
+END = re.compile(r"[ \t]*+\Z")
+
+# Values that the transforms of operations without operators, and of operands and word numbers without a sign, return
+# as they are
+PLAIN_NUMBER_TYPES = (int, float)
+# The precedence of each group of BINARY_OPERATOR, from lowest to highest
+OPERATION_LEVELS = {"l1": 0, "l2": 1, "l3": 2}
+
+
+class Backend(ABC):
+    """Runs lines of GCode through a parser's grammar, calling the transform_* methods of an action target."""
+
+    name: str
+
+    @abstractmethod
+    def parse_line(self, parser: "Rs274", line: str, action_target: Any = None) -> Any:
+        """Parse a line with the parser's start rule, returning whatever the action target's transforms return.
+
+        The action target is the parser itself by default, or anything standing in for it (like a Validator).
+        """
+
+
+class PeBackend(Backend):
+    """Matches lines with the parser's compiled PEG grammar."""
+
+    name = "pe"
+
+    def parse_line(self, parser: "Rs274", line: str, action_target: Any = None) -> Any:
+        return parser._parse_rule(line, action_target=action_target)
+
+
+class DescentBackend(Backend):
+    """Parses lines with a hand-written recursive descent parser, and anything it doesn't recognise with pe."""
+
+    name = "descent"
+
+    def __init__(self):
+        # Per (parser class, start rule, extra rule): whether named parameters and semicolon comments are part of the
+        # grammar, or None if the descent parser doesn't know the grammar
+        self._dialects: dict[tuple[type, str, str | None], tuple[bool, bool] | None] = {}
+
+    def parse_line(self, parser: "Rs274", line: str, action_target: Any = None) -> Any:
+        key = (type(parser), parser.start_rule, parser.extra_rule)
+        dialect = self._dialects[key] if key in self._dialects else self._dialect(key, parser)
+        if dialect is not None:
+            target = parser if action_target is None else action_target
+            try:
+                return _LineParser(target, line, *dialect).line()
+            except _Mismatch:
+                pass
+        return parser._parse_rule(line, action_target=action_target)
+
+    def _dialect(self, key: tuple[type, str, str | None], parser: "Rs274") -> tuple[bool, bool] | None:
+        # Imported here, because the dialects themselves import the backends
+        from rs274_parser.dialects.linuxcnc import linuxcnc_grammar
+        from rs274_parser.dialects.rs274ngc import rs274ngc_grammar
+
+        dialect = None
+        if parser.start_rule == "line" and not parser.extra_rule:
+            grammar_str = parser.grammar_str
+            if grammar_str == rs274ngc_grammar.GRAMMAR:
+                dialect = (False, False)
+            elif grammar_str == linuxcnc_grammar.GRAMMAR:
+                dialect = (True, True)
+        # Threads that get here for the same key at the same time all store the same value
+        self._dialects[key] = dialect
+        return dialect
+
+
+BACKENDS: dict[str, Backend] = {backend.name: backend for backend in (PeBackend(), DescentBackend())}
+
+
+def get_backend(name: str) -> Backend:
+    """Look up a backend by name, see BACKENDS."""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown parser backend {name!r}, expected one of: {', '.join(BACKENDS)}") from None
+
+
+class _Mismatch(Exception):
+    """The line doesn't match the grammar at the current position (or not in a way the descent parser knows)."""
+
+
+class _LineParser:
+    """Parses a single line, see DescentBackend. Every method parses the rule of the grammar it's named after."""
+
+    __slots__ = ("target", "s", "position", "named_parameters", "semicolon_comments")
+
+    def __init__(self, target: Any, s: str, named_parameters: bool, semicolon_comments: bool):
+        self.target = target
+        self.s = s
+        self.position = 0
+        self.named_parameters = named_parameters
+        self.semicolon_comments = semicolon_comments
+
+    def line(self) -> Any:
+        s = self.s
+        target = self.target
+        items: list[Any] = []
+
+        match = BLOCK_DELETE.match(s)
+        if match:
+            items.append("/")
+            self.position = match.end()
+
+        match = LINE_NUMBER.match(s, self.position)
+        if match:
+            items.append(target.transform_integer(match[1]))
+            self.position = match.end()
+
+        while match := STATEMENT.match(s, self.position):
+            self.position = match.end()
+            letter = match["letter"]
+            if letter is not None:
+                items.append(target.transform_word([letter, self.word_number()]))
+            elif match["parameter"] is None:
+                items.append(match["comment"])
+            else:
+                items.append(self.parameter_setting())
+
+        if self.semicolon_comments:
+            match = SEMICOLON_COMMENT.match(s, self.position)
+            if match:
+                items.append(match[1])
+                self.position = match.end()
+
+        if not END.match(s, self.position):
+            raise _Mismatch
+        return target.transform_line(s, items)
+
+    def parameter_setting(self) -> Any:
+        # Right after the "#"
+        s = self.s
+        match = PARAMETER_SETTING.match(s, self.position)
+        if match:
+            self.position = match.end()
+            index = self.target.transform_integer(match[1])
+            return self.target.transform_parameter_setting([index, self.real_value()])
+
+        match = NAMED_PARAMETER_SETTING.match(s, self.position) if self.named_parameters else None
+        if not match:
+            raise _Mismatch
+        self.position = match.end()
+        return self.target.transform_named_parameter_setting([match[1], self.real_value()])
+
+    def word_number(self) -> Any:
+        sign, value = self.signed_real_value()
+        if sign or type(value) not in PLAIN_NUMBER_TYPES:
+            return self.target.transform_word_number([sign, value])
+        return value
+
+    def operand(self) -> Any:
+        sign, value = self.signed_real_value()
+        if sign or type(value) not in PLAIN_NUMBER_TYPES:
+            return self.target.transform_operand([sign, value])
+        return value
+
+    def real_value(self) -> Any:
+        match = REAL_VALUE.match(self.s, self.position)
+        if not match:
+            raise _Mismatch
+        self.position = match.end()
+        return self._real_value(match)
+
+    def signed_real_value(self) -> tuple[str, Any]:
+        match = SIGNED_REAL_VALUE.match(self.s, self.position)
+        if not match:
+            raise _Mismatch
+        self.position = match.end()
+        return match["sign"], self._real_value(match)
+
+    def _real_value(self, match: re.Match) -> Any:
+        group = match.lastgroup
+        if group == "float":
+            return self.target.transform_float(match["float"])
+        if group == "integer":
+            return self.target.transform_integer(match["integer"])
+        if group == "expression":
+            return self.expression()
+        if group == "parameter":
+            return self.parameter_value()
+
+        value = self.bracketed_expression()
+        return self.target.transform_unary_operation([match["unary_operator"], value])
+
+    def parameter_value(self) -> Any:
+        # Right after the "#"
+        s = self.s
+        match = PARAMETER_INDEX.match(s, self.position)
+        if match:
+            self.position = match.end()
+            if match.lastgroup == "integer":
+                index = self.target.transform_integer(match["integer"])
+            else:
+                index = self.expression()
+            return self.target.transform_numeric_parameter(index)
+
+        match = NAMED_PARAMETER.match(s, self.position) if self.named_parameters else None
+        if not match:
+            raise _Mismatch
+        self.position = match.end()
+        return self.target.transform_named_parameter(match[1])
+
+    def bracketed_expression(self) -> Any:
+        match = OPENING_BRACKET.match(self.s, self.position)
+        if not match:
+            raise _Mismatch
+        self.position = match.end()
+        return self.expression()
+
+    def expression(self) -> Any:
+        # Right after the "["
+        value = self.operation()
+        match = CLOSING_BRACKET.match(self.s, self.position)
+        if not match:
+            raise _Mismatch
+        self.position = match.end()
+        return value
+
+    def operation(self) -> Any:
+        """Parse an l1 operation, including the l2 and l3 operations within it, by the precedence of the operators.
+
+        The operands and operators of each level's current operation are collected in a chain. An operator finishes the
+        operations of the levels above its own first, in the same order as the grammar's rules complete, and so does the
+        end of the expression for all levels.
+        """
+        s = self.s
+        transform_binary_operation = self.target.transform_binary_operation
+        chains: list[list | None] = [None, None, None]
+        value = self.operand()
+        while match := BINARY_OPERATOR.match(s, self.position):
+            self.position = match.end()
+            rule = cast(str, match.lastgroup)
+            level = OPERATION_LEVELS[rule]
+            for higher_level in range(2, level, -1):
+                chain = chains[higher_level]
+                if chain is not None:
+                    chain.append(value)
+                    value = transform_binary_operation(chain)
+                    chains[higher_level] = None
+                elif type(value) not in PLAIN_NUMBER_TYPES:
+                    value = transform_binary_operation([value])
+
+            chain = chains[level]
+            if chain is None:
+                chains[level] = [value, match[rule]]
+            else:
+                chain.append(value)
+                chain.append(match[rule])
+            value = self.operand()
+
+        for chain in reversed(chains):
+            if chain is not None:
+                chain.append(value)
+                value = transform_binary_operation(chain)
+            elif type(value) not in PLAIN_NUMBER_TYPES:
+                value = transform_binary_operation([value])
+        return value
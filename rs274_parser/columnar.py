@@ -0,0 +1,142 @@
+"""Columnar (struct-of-arrays) output of parsed GCode, for vectorised processing with NumPy.
+
+Instead of one Line object per line, a ColumnarProgram holds a flat NumPy array per attribute of all words in a
+program, in the same order as the words of the parsed lines (i.e. in execution order within each line). Per-line data
+like comments and parameter assignments is stored as flat arrays too, with an offset array per kind of data: the
+entries of line i are entries offsets[i]:offsets[i + 1].
+
+NumPy is an optional dependency (the numpy extra), and only needed for this module.
+"""
+
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+import numpy as np
+
+from rs274_parser.types import Line, TNumber, WordInfo
+
+# Stored in ColumnarProgram.line_numbers for lines without an N number
+NO_LINE_NUMBER = np.iinfo(np.int64).min
+
+
+@dataclass(kw_only=True)
+class ColumnarProgram:
+    """A parsed GCode program, stored as flat arrays.
+
+    Example:
+        program = parser.parse_columnar(gcode)
+        is_rapid = (program.letters == ord("G")) & (program.numbers == 0)
+        rapid_lines = program.word_line_indices[is_rapid]
+    """
+
+    # Per line: the N number of the line, or NO_LINE_NUMBER
+    line_numbers: np.ndarray
+    # Per line, plus one: the words of line i are at word_offsets[i]:word_offsets[i + 1]
+    word_offsets: np.ndarray
+
+    # Per word: the (0-based) index of the line the word is on
+    word_line_indices: np.ndarray
+    # Per word: the ASCII code of the (upper case) letter
+    letters: np.ndarray
+    # Per word: the number of the word - note that integers larger than 2**53 lose precision
+    numbers: np.ndarray
+    # Per word: the position of the word in the order of execution, see WordInfo.ordering
+    orderings: np.ndarray
+    # Per word: the modal group of the word, see WordInfo.modal_group
+    modal_groups: np.ndarray
+
+    comments: list[str]
+    comment_offsets: np.ndarray
+
+    numeric_assignment_indices: np.ndarray
+    numeric_assignment_values: np.ndarray
+    numeric_assignment_offsets: np.ndarray
+
+    named_assignment_names: list[str]
+    named_assignment_values: np.ndarray
+    named_assignment_offsets: np.ndarray
+
+    def __len__(self) -> int:
+        """The number of lines in the program."""
+        return len(self.line_numbers)
+
+    @property
+    def word_line_numbers(self) -> np.ndarray:
+        """Per word: the N number of the line the word is on, or NO_LINE_NUMBER."""
+        return self.line_numbers[self.word_line_indices]
+
+    def line_comments(self, line_index: int) -> list[str]:
+        return self.comments[self.comment_offsets[line_index] : self.comment_offsets[line_index + 1]]
+
+
+def to_columnar(lines: Iterable[Line], word_info: Callable[[str, TNumber], WordInfo]) -> ColumnarProgram:
+    """Collect parsed lines into a ColumnarProgram.
+
+    Lines are consumed one at a time, so passing in the iterator returned by Rs274.iter_parse() never holds more than
+    one Line object in memory. word_info looks up the modal group of a word in the parser's dialect.
+    """
+    line_numbers = array("q")
+    word_offsets = array("q", [0])
+    word_line_indices = array("q")
+    letters = array("B")
+    numbers = array("d")
+    orderings = array("h")
+    modal_groups = array("B")
+    comments: list[str] = []
+    comment_offsets = array("q", [0])
+    numeric_assignment_indices = array("q")
+    numeric_assignment_values = array("d")
+    numeric_assignment_offsets = array("q", [0])
+    named_assignment_names: list[str] = []
+    named_assignment_values = array("d")
+    named_assignment_offsets = array("q", [0])
+
+    modal_group_cache: dict[tuple[str, type, TNumber], int] = {}
+
+    for line_index, line in enumerate(lines):
+        line_numbers.append(line.line_number if line.line_number is not None else NO_LINE_NUMBER)
+
+        # Words are already sorted into execution order by transform_line()
+        for word in line.words:
+            word_line_indices.append(line_index)
+            letters.append(ord(word.letter))
+            numbers.append(word.number)
+            orderings.append(word.ordering)
+
+            # Include the type in the key, so that G1 and G1.0 don't share an entry
+            key = (word.letter, type(word.number), word.number)
+            modal_group = modal_group_cache.get(key)
+            if modal_group is None:
+                modal_group = modal_group_cache[key] = word_info(word.letter, word.number).modal_group
+            modal_groups.append(modal_group)
+        word_offsets.append(len(letters))
+
+        comments.extend(line.comments)
+        comment_offsets.append(len(comments))
+
+        numeric_assignment_indices.extend(line.numeric_assignments.keys())
+        numeric_assignment_values.extend(line.numeric_assignments.values())
+        numeric_assignment_offsets.append(len(numeric_assignment_indices))
+
+        named_assignment_names.extend(line.named_assignments.keys())
+        named_assignment_values.extend(line.named_assignments.values())
+        named_assignment_offsets.append(len(named_assignment_names))
+
+    return ColumnarProgram(
+        line_numbers=np.frombuffer(line_numbers, dtype=np.int64),
+        word_offsets=np.frombuffer(word_offsets, dtype=np.int64),
+        word_line_indices=np.frombuffer(word_line_indices, dtype=np.int64),
+        letters=np.frombuffer(letters, dtype=np.uint8),
+        numbers=np.frombuffer(numbers, dtype=np.float64),
+        orderings=np.frombuffer(orderings, dtype=np.int16),
+        modal_groups=np.frombuffer(modal_groups, dtype=np.uint8),
+        comments=comments,
+        comment_offsets=np.frombuffer(comment_offsets, dtype=np.int64),
+        numeric_assignment_indices=np.frombuffer(numeric_assignment_indices, dtype=np.int64),
+        numeric_assignment_values=np.frombuffer(numeric_assignment_values, dtype=np.float64),
+        numeric_assignment_offsets=np.frombuffer(numeric_assignment_offsets, dtype=np.int64),
+        named_assignment_names=named_assignment_names,
+        named_assignment_values=np.frombuffer(named_assignment_values, dtype=np.float64),
+        named_assignment_offsets=np.frombuffer(named_assignment_offsets, dtype=np.int64),
+    )
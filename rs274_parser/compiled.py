@@ -0,0 +1,171 @@
+"""Programs that are parsed once and can then be evaluated many times, e.g. with different parameter values.
+
+Compiling a program runs its lines through the grammar with a ProgramCompiler in place of the parser: the grammar
+actions call the same transform_* methods as always, but instead of evaluating them, the compiler records each call
+as a Call node. Calls that don't depend on the machine state (everything except reading and setting parameters, and
+transform_line itself) are constant-folded right away if all of their arguments are known, so a literal line like
+"G1 X1.5" compiles to a single transform_line call with ready-made words.
+
+Evaluating a compiled program replays the remaining calls against a real parser, which produces exactly the same
+lines and machine state as parsing the program with that parser would.
+"""
+
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+
+from rs274_parser.types import Line
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+
+# Transforms that read or change the machine state, so they always have to run when a program is evaluated
+STATEFUL_TRANSFORMS = {
+    "transform_numeric_parameter",
+    "transform_parameter_setting",
+    "transform_named_parameter",
+    "transform_named_parameter_setting",
+    "transform_line",
+}
+
+
+class Call:
+    """A recorded call of a parser's transform_* method."""
+
+    __slots__ = ("name", "args", "_dynamic_args")
+
+    def __init__(self, name: str, args: tuple):
+        self.name = name
+        self.args = args
+        self._dynamic_args = _dynamic_items(args)
+
+    def evaluate(self, methods: dict[str, Callable]) -> Any:
+        args = list(self.args)
+        for index, value in self._dynamic_args:
+            args[index] = value.evaluate(methods)
+        return methods[self.name](*args)
+
+    def __repr__(self):
+        return f"Call({self.name!r}, {self.args!r})"
+
+
+class _Items:
+    """A list or tuple argument of a call that contains other calls."""
+
+    __slots__ = ("items", "_dynamic_items")
+
+    def __init__(self, items: list | tuple):
+        self.items = items
+        self._dynamic_items = _dynamic_items(items)
+
+    def evaluate(self, methods: dict[str, Callable]) -> list | tuple:
+        items = list(self.items)
+        for index, value in self._dynamic_items:
+            items[index] = value.evaluate(methods)
+        return items if type(self.items) is list else tuple(items)
+
+
+def _dynamic_items(items: list | tuple) -> list[tuple[int, "Call | _Items"]]:
+    """The positions of the items that have to be evaluated, and what to evaluate for them.
+
+    Only these are evaluated, all other items are used as they are.
+    """
+    dynamic_items: list[tuple[int, Call | _Items]] = []
+    for index, item in enumerate(items):
+        if type(item) is Call:
+            dynamic_items.append((index, item))
+        elif _contains_call(item):
+            dynamic_items.append((index, _Items(item)))
+    return dynamic_items
+
+
+def _contains_call(value: Any) -> bool:
+    if type(value) is Call:
+        return True
+    if type(value) is list or type(value) is tuple:
+        return any(_contains_call(item) for item in value)
+    return False
+
+
+class ProgramCompiler:
+    """Stands in for a parser while the grammar runs, recording calls of its transform_* methods."""
+
+    def __init__(self, parser: "Rs274"):
+        self.parser = parser
+
+    # A single operand or a number without a sign evaluates to itself, whether or not it's known yet
+    def transform_binary_operation(self, items: list) -> Any:
+        if len(items) == 1:
+            return items[0]
+        return self._record("transform_binary_operation", items)
+
+    def transform_operand(self, items: list) -> Any:
+        if len(items) == 2 and items[0] == "":
+            return items[1]
+        return self._record("transform_operand", items)
+
+    def transform_word_number(self, items: list) -> Any:
+        if len(items) == 2 and items[0] == "":
+            return items[1]
+        return self._record("transform_word_number", items)
+
+    def _record(self, name: str, *args) -> Any:
+        if name not in STATEFUL_TRANSFORMS and not _contains_call(args):
+            try:
+                return getattr(self.parser, name)(*args)
+            except Exception:
+                # Leave it to the evaluation to raise the error, at the same point parsing would have
+                pass
+        return Call(name, args)
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if not name.startswith("transform_"):
+            raise AttributeError(name)
+
+        return lambda *args: self._record(name, *args)
+
+
+class CompiledProgram:
+    """A compiled GCode program, see Rs274.compile()."""
+
+    parser_class: type["Rs274"]
+    options: dict[str, Any]
+    lines: list[Call]
+
+    def __init__(self, parser_class: type["Rs274"], options: dict[str, Any], lines: list[Call]):
+        self.parser_class = parser_class
+        self.options = options
+        self.lines = lines
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def evaluate(self, initial_machine_state: "MachineState | None" = None) -> list[Line]:
+        """Evaluate the program, starting from the given machine state (which is not mutated).
+
+        This returns the same lines as parsing the program with a new parser with the same initial machine state.
+        """
+        parser = self.parser_class(initial_machine_state, **self.options)
+        return list(self.iter_evaluate(parser))
+
+    def iter_evaluate(self, parser: "Rs274") -> Iterator[Line]:
+        """Evaluate the program line by line with the given parser, updating its machine state like parsing would."""
+        methods = _MethodLookup(parser)
+        for line in self.lines:
+            yield line.evaluate(methods)
+
+
+class _MethodLookup(dict):
+    """Bound methods of a parser by name, looked up on first use."""
+
+    def __init__(self, parser: "Rs274"):
+        super().__init__()
+        self.parser = parser
+
+    def __missing__(self, name: str) -> Callable:
+        method = self[name] = getattr(self.parser, name)
+        return method
+
+
+def compile_program(parser: "Rs274", lines: Iterable[str]) -> CompiledProgram:
+    compiler = ProgramCompiler(parser)
+    compiled_lines = [parser.backend.parse_line(parser, line.rstrip("\r\n"), action_target=compiler) for line in lines]
+    return CompiledProgram(type(parser), parser._options(), compiled_lines)
@@ -1,3 +1,3 @@
-from .linuxcnc import LETTERS, WORDS, LinuxCNC, MachineState, word
+from .linuxcnc import LETTERS, LINUXCNC_WORD_TABLE, WORDS, LinuxCNC, MachineState, word, word_info
 
-__all__ = ["LETTERS", "MachineState", "word", "WORDS", "LinuxCNC"]
+__all__ = ["LETTERS", "LINUXCNC_WORD_TABLE", "MachineState", "word", "word_info", "WORDS", "LinuxCNC"]
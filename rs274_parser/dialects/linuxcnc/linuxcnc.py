@@ -1,28 +1,30 @@
-from copy import deepcopy
 from pathlib import Path
-from typing import Literal
+from typing import Literal, cast
 
 from pe.actions import Pack
 
 from rs274_parser import exceptions
+from rs274_parser.backends import DEFAULT_BACKEND
 from rs274_parser.dialects import rs274ngc
 from rs274_parser.types import Line, NamedParameterAssignment, NumericParameterAssignment, TNumber, Word
 
-from .linuxcnc_grammar import GRAMMAR
-
-word = rs274ngc.word
-
 from . import constants
+from .linuxcnc_grammar import GRAMMAR
 
 LETTERS = constants.LETTERS
 WORDS = constants.WORDS
 
+LINUXCNC_WORD_TABLE = rs274ngc.WordTable(WORDS, LETTERS)
+word = LINUXCNC_WORD_TABLE.word
+word_info = LINUXCNC_WORD_TABLE.word_info
+
 CURRENT_DIR = Path(__file__).parent
 
 
 class MachineState(rs274ngc.MachineState):
     named_parameter_values: dict[str, int | float]
-    _pending_named_parameter_values: dict[str, int | float]
+    _named_parameter_journal: dict[str, int | float]
+    _shares_named_parameter_values: bool
 
     def __init__(
         self,
@@ -31,29 +33,54 @@ class MachineState(rs274ngc.MachineState):
         initial_named_parameter_values: dict[str, TNumber] | None = None,
         is_block_delete_switch_enabled: bool = False,
     ) -> None:
-        self._pending_named_parameter_values = (
-            deepcopy(initial_named_parameter_values) if initial_named_parameter_values is not None else {}
+        self.named_parameter_values = (
+            dict(initial_named_parameter_values) if initial_named_parameter_values is not None else {}
         )
+        self._named_parameter_journal = {}
+        self._shares_named_parameter_values = False
 
         super().__init__(
             initial_parameter_values=initial_parameter_values,
             is_block_delete_switch_enabled=is_block_delete_switch_enabled,
         )
 
-    def clone(self) -> "MachineState":
-        return MachineState(
-            initial_parameter_values=self.parameter_values,
-            initial_named_parameter_values=self.named_parameter_values,
-            is_block_delete_switch_enabled=self.is_block_delete_switch_enabled,
+    def clone(self, keep_pending: bool = False) -> "MachineState":
+        clone = cast(MachineState, super().clone(keep_pending))
+        clone._named_parameter_journal = dict(self._named_parameter_journal) if keep_pending else {}
+        self._shares_named_parameter_values = clone._shares_named_parameter_values = True
+        return clone
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MachineState):
+            return NotImplemented
+        return (
+            super().__eq__(other)
+            and (
+                self.named_parameter_values is other.named_parameter_values
+                or self.named_parameter_values == other.named_parameter_values
+            )
+            and self._named_parameter_journal == other._named_parameter_journal
         )
 
+    def rollback_parameter_values(self):
+        super().rollback_parameter_values()
+        self._named_parameter_journal = {}
+
     def commit_parameter_values(self):
         """Setting new parameters only takes effect after any other actions involving parameters on the current line have run.
         So, it's safest to just save updated parameters separately as they're being updated, then refresh the state of the saved
         parameters at the end of the line by calling this method.
         """
         super().commit_parameter_values()
-        self.named_parameter_values = deepcopy(self._pending_named_parameter_values)
+
+        if not self._named_parameter_journal:
+            return
+
+        if self._shares_named_parameter_values:
+            self.named_parameter_values = dict(self.named_parameter_values)
+            self._shares_named_parameter_values = False
+        self.named_parameter_values.update(self._named_parameter_journal)
+        self._named_parameter_journal = {}
 
     def get_parameter_value(self, parameter_index: int | str) -> TNumber:
         if isinstance(parameter_index, int):
@@ -71,12 +98,17 @@ class MachineState(rs274ngc.MachineState):
         if isinstance(parameter_index, int):
             return super().set_parameter_value(parameter_index, parameter_value)
 
-        self._pending_named_parameter_values[parameter_index] = parameter_value
+        self._named_parameter_journal[parameter_index] = parameter_value
 
 
 class LinuxCNC(rs274ngc.Rs274):
     machine_state: MachineState  # type: ignore[reportIncompatibleVariableOverride]
 
+    semicolon_comments = True
+    word_table = LINUXCNC_WORD_TABLE
+    # Parameters set on a deleted block take effect on the next line
+    commits_deleted_blocks = True
+
     @property
     def grammar_str(self) -> str:
         return GRAMMAR
@@ -86,6 +118,10 @@ class LinuxCNC(rs274ngc.Rs274):
         initial_machine_state: MachineState | None = None,
         start_rule: str = "line",
         extra_rule: str | None = None,
+        fast_path: bool = False,
+        compact_lines: bool = False,
+        line_cache_size: int = 0,
+        backend: str = DEFAULT_BACKEND,
     ):
         """Create a new LinuxCNC GCode parser.
 
@@ -102,7 +138,15 @@ class LinuxCNC(rs274ngc.Rs274):
             parser.parse('#123 = 1 G0 X#123') # X123 evaluates to X0
             parser.parse('#123 = 1 G0 X#123') # X123 evaluates to X123
         """
-        super().__init__(initial_machine_state, start_rule=start_rule, extra_rule=extra_rule)
+        super().__init__(
+            initial_machine_state,
+            start_rule=start_rule,
+            extra_rule=extra_rule,
+            fast_path=fast_path,
+            compact_lines=compact_lines,
+            line_cache_size=line_cache_size,
+            backend=backend,
+        )
 
     def transform_named_parameter(self, parameter_name: str):
         return self.machine_state.get_parameter_value(parameter_name)
@@ -131,18 +175,18 @@ class LinuxCNC(rs274ngc.Rs274):
             else:
                 rs274_items.append(item)
 
+        # Note that this also commits the named parameters (also on deleted blocks, see commits_deleted_blocks),
+        # through MachineState.commit_parameter_values()
         line = super().transform_line(s, rs274_items)
-        line.named_assignments = named_parameter_assignments
-
-        # Updated named parameters after the line has been processed
-        self.machine_state.commit_parameter_values()
+        if named_parameter_assignments:
+            line.named_assignments = named_parameter_assignments
 
         return line
 
     def actions(self):
         rs274_actions = super().actions()
         return {
-            "named_parameter": self.transform_named_parameter,
-            "named_parameter_setting": Pack(self.transform_named_parameter_setting),
+            "named_parameter": rs274ngc.ParserMethod("transform_named_parameter"),
+            "named_parameter_setting": Pack(rs274ngc.ParserMethod("transform_named_parameter_setting")),
             **rs274_actions,
         }
@@ -1,9 +1,12 @@
-from .rs274ngc import LETTERS, WORDS, MachineState, Rs274, word
+from .rs274ngc import LETTERS, RS274_WORD_TABLE, WORDS, MachineState, ParserMethod, Rs274, WordTable, word, word_info
 
 __all__ = [
     "LETTERS",
     "MachineState",
     "word",
+    "word_info",
     "WORDS",
     "Rs274",
+    "RS274_WORD_TABLE",
+    "WordTable",
 ]
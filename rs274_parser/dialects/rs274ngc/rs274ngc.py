@@ -1,17 +1,30 @@
 import math
-from copy import deepcopy
+import os
+from contextvars import ContextVar
+from copy import copy
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
-from typing import Any, Callable, Iterable, Literal, Sequence, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Self,
+    Sequence,
+    cast,
+)
 
 import pe
 from pe._constants import Flag
-from pe._grammar import Grammar
-from pe._parse import loads
 from pe.actions import Action, Capture, Pack
-from pe.machine import MachineParser
-from pe.patterns import DEFAULT_IGNORE
 
-from rs274_parser import exceptions
+from rs274_parser import exceptions, fast_path, grammar_cache
+from rs274_parser.backends import DEFAULT_BACKEND, Backend, get_backend
 from rs274_parser.math_utils import to_deg, to_rad
 from rs274_parser.types import (
     BINARY_OPERATOR,
@@ -20,11 +33,26 @@ from rs274_parser.types import (
     NumericParameterAssignment,
     TNumber,
     Word,
+    WordInfo,
+    compact_line,
 )
 
 from .constants import LETTERS, UNARY_OPERATORS, WORDS
 from .rs274ngc_grammar import GRAMMAR
 
+if TYPE_CHECKING:
+    import asyncio
+
+    from rs274_parser.columnar import ColumnarProgram
+    from rs274_parser.compiled import CompiledProgram
+    from rs274_parser.files import GCodeFile
+    from rs274_parser.flatten import TextSink
+    from rs274_parser.line_cache import LineCache
+    from rs274_parser.parallel import FileResult
+    from rs274_parser.stats import ParserStats
+    from rs274_parser.summary import ProgramSummary
+    from rs274_parser.validation import ValidationError
+
 CURRENT_DIR = Path(__file__).parent
 
 
@@ -37,24 +65,71 @@ def batched(iterable, n=1):
         yield iterable[ndx : min(ndx + n, length)]
 
 
-def word(letter: str, number: TNumber) -> Word:
-    letter = letter.upper()
-    word_str = f"{letter}{number}"
+# How many distinct words each dialect keeps interned
+WORD_CACHE_SIZE = 2**16
+
+WordKey = tuple[str, type, TNumber]
+
+
+class WordTable:
+    """Creates the words of a dialect, and looks up their meta information.
+
+    Word strings like "G38.2" are keyed by (letter, number type, number) up front, so that looking up a word doesn't
+    need to format it as a string. The number type is part of the key because G1 and G1.0 are different words, even
+    though 1 == 1.0 (only the former is a "G1" - like any other number, the latter is just a "G" word).
 
-    if word_str in WORDS:
-        word_info = WORDS[word_str]
-    elif letter in LETTERS:
-        word_info = LETTERS[letter]
-    else:
+    Words are frozen, so word() interns them: repeated words (G1, F1500, the same coordinates over and over) share a
+    single Word object, as long as they're among the cache_size most recently used words.
+    """
+
+    def __init__(self, words: dict[str, WordInfo], letters: dict[str, WordInfo], cache_size: int = WORD_CACHE_SIZE):
+        self.letters = letters | {letter.lower(): info for letter, info in letters.items()}
+        self.words: dict[WordKey, WordInfo] = {}
+        for word_str, info in words.items():
+            letter, number_str = word_str[0], word_str[1:]
+            number: TNumber = float(number_str) if "." in number_str else int(number_str)
+            # A word string that a number never formats to, like "G01", can never be looked up
+            if str(number) == number_str:
+                self.words[(letter, type(number), number)] = info
+                self.words[(letter.lower(), type(number), number)] = info
+
+        self._interned_word = lru_cache(maxsize=cache_size, typed=True)(self._create_word)
+
+    def word_info(self, letter: str, number: TNumber) -> WordInfo:
+        """Look up the meta information of a word."""
+        info = self.words.get((letter, type(number), number))
+        if info is not None:
+            return info
+        if letter in self.letters:
+            return self.letters[letter]
         raise RuntimeError(f"FIXME: what to do when word is unknown ({letter=} {number=})")
 
-    return Word(letter=letter, number=number, ordering=word_info.ordering)
+    def word(self, letter: str, number: TNumber) -> Word:
+        if number == 0 and type(number) is float:
+            # -0.0 == 0.0, so the cache would hand out whichever of the two it saw first
+            return self._create_word(letter, number)
+        return self._interned_word(letter, number)
+
+    def _create_word(self, letter: str, number: TNumber) -> Word:
+        upper_letter = letter.upper()
+        if upper_letter != letter:
+            # Share the interned upper case word
+            return self.word(upper_letter, number)
+        return Word(letter=letter, number=number, ordering=self.word_info(letter, number).ordering)
+
+
+RS274_WORD_TABLE = WordTable(WORDS, LETTERS)
+word = RS274_WORD_TABLE.word
+word_info = RS274_WORD_TABLE.word_info
 
 
 class MachineState:
     parameter_values: dict[int, TNumber]
-    _pending_parameter_values: dict[int, TNumber]
     is_block_delete_switch_enabled: bool
+    # Parameter values set on the current line, which only take effect once they're committed
+    _parameter_journal: dict[int, TNumber]
+    # Whether parameter_values might be shared with a clone, in which case it has to be copied before it's changed
+    _shares_parameter_values: bool
 
     def __init__(
         self,
@@ -62,24 +137,54 @@ class MachineState:
         initial_parameter_values: dict[int, TNumber] | None = None,
         is_block_delete_switch_enabled: bool = False,
     ) -> None:
-        self._pending_parameter_values = (
-            deepcopy(initial_parameter_values) if initial_parameter_values is not None else {}
-        )
-        self.commit_parameter_values()
+        self.parameter_values = dict(initial_parameter_values) if initial_parameter_values is not None else {}
+        self._parameter_journal = {}
+        self._shares_parameter_values = False
         self.is_block_delete_switch_enabled = is_block_delete_switch_enabled
 
-    def clone(self) -> "MachineState":
-        return MachineState(
-            initial_parameter_values=self.parameter_values,
-            is_block_delete_switch_enabled=self.is_block_delete_switch_enabled,
+    def clone(self, keep_pending: bool = False) -> "MachineState":
+        """Create a copy of the machine state, without any pending (uncommitted) parameter values unless keep_pending.
+
+        The copy shares the committed parameter values with the original until either of them commits a change, which
+        makes cloning cheap regardless of how many parameters are defined. Because of this, parameter_values should
+        only ever be changed through set_parameter_value() and commit_parameter_values().
+        """
+        clone = copy(self)
+        clone._parameter_journal = dict(self._parameter_journal) if keep_pending else {}
+        self._shares_parameter_values = clone._shares_parameter_values = True
+        return clone
+
+    def __eq__(self, other: object) -> bool:
+        """Machine states are equal if parsing the same line with either of them has the same result and effect."""
+        if not isinstance(other, MachineState):
+            return NotImplemented
+        return (
+            type(self) is type(other)
+            and self.is_block_delete_switch_enabled == other.is_block_delete_switch_enabled
+            # Clones share their parameter values, which saves comparing all of them
+            and (self.parameter_values is other.parameter_values or self.parameter_values == other.parameter_values)
+            and self._parameter_journal == other._parameter_journal
         )
 
     def commit_parameter_values(self):
         """Setting new parameters only takes effect after any other actions involving parameters on the current line have run.
         So, it's safest to just save updated parameters separately as they're being updated, then refresh the state of the saved
         parameters at the end of the line by calling this method.
+
+        Only the parameters set since the last commit are written, so committing a line without assignments is free.
         """
-        self.parameter_values = deepcopy(self._pending_parameter_values)
+        if not self._parameter_journal:
+            return
+
+        if self._shares_parameter_values:
+            self.parameter_values = dict(self.parameter_values)
+            self._shares_parameter_values = False
+        self.parameter_values.update(self._parameter_journal)
+        self._parameter_journal = {}
+
+    def rollback_parameter_values(self):
+        """Discard all pending parameter values, e.g. those set by a line that failed to parse halfway through."""
+        self._parameter_journal = {}
 
     def get_parameter_value(self, parameter_index: int) -> TNumber:
         if parameter_index not in self.parameter_values:
@@ -91,14 +196,39 @@ class MachineState:
 
         Has to be commited with commit_parameter_values() before the parameter is actually updated.
         """
-        self._pending_parameter_values[parameter_index] = parameter_value
+        self._parameter_journal[parameter_index] = parameter_value
+
+
+_word_ordering = attrgetter("ordering")
+
+# The object whose transform_* methods the grammar actions are dispatched to, see ParserMethod
+_action_target: ContextVar[Any] = ContextVar("action_target")
+
+
+class ParserMethod:
+    """Call a method of the parser that is currently running the grammar.
+
+    Grammar actions refer to parser methods by name rather than being bound to a parser instance, so that a compiled
+    grammar can be shared by all parsers of the same dialect (see rs274_parser.grammar_cache).
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self, *args, **kwargs):
+        return getattr(_action_target.get(), self.name)(*args, **kwargs)
+
+    def __repr__(self):
+        return f"ParserMethod({self.name!r})"
 
 
 class LineAction(Action):
     func: Callable[[str, Sequence[Any]], Line]
 
     def __init__(self, func):
-        self.func = func
+        self.arg = self.func = func
 
     def __call__(self, s: str, pos: int, end: int, args: Sequence, kwargs: dict | None) -> tuple[tuple[Line], None]:
         return ((self.func(s, args),), None)
@@ -108,8 +238,20 @@ class Rs274:
     start_rule: str
     extra_rule: str | None
     machine_state: MachineState
+    fast_path: bool
+    compact_lines: bool
+    line_cache: "LineCache | None"
+    backend: Backend
+    stats: "ParserStats | None" = None
     _parser: pe.Parser | None = None
 
+    # Whether the dialect allows a comment starting with a semicolon at the end of a line
+    semicolon_comments: bool = False
+    word_table: WordTable = RS274_WORD_TABLE
+    # Whether a deleted block (with the block delete switch enabled) commits the parameter values set on it, rather
+    # than leaving them pending until the next line that isn't deleted
+    commits_deleted_blocks: bool = False
+
     def transform_float(self, s: str):
         return float("".join(s.split()))
 
@@ -187,7 +329,12 @@ class Rs274:
         assert isinstance(items[0], TNumber)
         value = items[0]
 
-        for operator, operand in self.chunk_binary_op_items(items[1:]):
+        # Operators and operands alternate after the first operand
+        for index in range(1, len(items), 2):
+            operator = items[index]
+            operand = items[index + 1]
+            assert isinstance(operator, str)
+            assert isinstance(operand, TNumber)
             match operator:
                 # L1
                 case "+":
@@ -227,7 +374,11 @@ class Rs274:
         assert isinstance(letter, str)
         assert isinstance(number, TNumber)
 
-        return word(letter, number)
+        return self.word_table.word(letter, number)
+
+    def word_info(self, letter: str, number: TNumber) -> WordInfo:
+        """The meta information of a word in this dialect."""
+        return self.word_table.word_info(letter, number)
 
     def transform_line(
         self,
@@ -236,6 +387,10 @@ class Rs274:
     ) -> Line:
         if len(items) > 0 and items[0] == "/":
             if self.machine_state.is_block_delete_switch_enabled:
+                if self.commits_deleted_blocks:
+                    self.commit_parameter_values()
+                if self.compact_lines:
+                    return cast(Line, compact_line((), (s,)))
                 return Line([], comments=[s])
             items = items[1:]
 
@@ -259,7 +414,7 @@ class Rs274:
                 comments.append(statement)
 
         # Everything has been processed, it's now safe to updated the saved parameter values
-        self.machine_state.commit_parameter_values()
+        self.commit_parameter_values()
 
         # M30 side effects
         # Change from Auto mode to MDI mode.
@@ -273,19 +428,35 @@ class Rs274:
         # The current motion mode is set to feed (like G1).
         # Coolant is turned off (like M9).
 
+        # Sorting by key is stable, just like sorting by Word.__lt__, but doesn't call back into Python per comparison
+        words.sort(key=_word_ordering)
+
+        if self.compact_lines:
+            # CompactLine has the same interface as Line for reading, see Rs274.__init__()
+            return cast(Line, compact_line(tuple(words), tuple(comments), numeric_assignments, None, line_number))
+
         return Line(
             line_number=line_number,
-            words=sorted(words),
+            words=words,
             comments=comments,
             numeric_assignments=numeric_assignments,
         )
 
-    def _parse_rule(self, content: str):
+    def commit_parameter_values(self):
+        """Commit the parameter values set on the current line, see MachineState.commit_parameter_values()."""
+        self.machine_state.commit_parameter_values()
+
+    def _parse_rule(self, content: str, action_target: Any = None) -> Any:
         """Parse a specific part of the GCode grammar, starting at the given root rule.
 
-        This will return whatever type the visitor returns for that given rule.
+        This will return whatever type the visitor returns for that given rule. The grammar actions call the
+        transform_* methods of the parser itself, unless another action_target is given.
         """
-        match = self.parser.match(content, flags=Flag.STRICT)
+        token = _action_target.set(self if action_target is None else action_target)
+        try:
+            match = self.parser.match(content, flags=Flag.STRICT)
+        finally:
+            _action_target.reset(token)
         assert match
         return match.value()
 
@@ -297,18 +468,209 @@ class Rs274:
         The line objects contain all comments and GCode words in the correct execution order.
         To parse just specific parts of the GCode grammar, pass in a rule name (see rs274ngc.peg) other than 'line'
         """
-        lines = []
+        return list(self.iter_parse(content))
+
+    def iter_parse(self, source: str | os.PathLike | Iterable[str], encoding: str = "utf-8") -> Iterator[Line]:
+        """Parse GCode lazily, yielding Line objects one at a time.
+
+        source can be a path to a GCode file, an open text file or any other iterable of lines. Line endings
+        are stripped from each line before parsing. A plain string is treated as GCode content (like parse()),
+        not as a path - wrap paths in pathlib.Path. Files at a path are split into lines like strings are.
+
+        Only the current line is held in memory, and machine_state is updated line by line exactly as it is by
+        parse(), so after consuming n lines it reflects the state after the nth line.
+        """
+        if isinstance(source, str):
+            source = source.splitlines()
+        elif isinstance(source, os.PathLike):
+            from rs274_parser.files import read_lines
+
+            source = read_lines(source, encoding)
+
+        for line in source:
+            yield self._parse_line(line.rstrip("\r\n"))
+
+    def aparse(
+        self,
+        source: "asyncio.StreamReader | AsyncIterable[bytes]",
+        encoding: str = "utf-8",
+    ) -> AsyncIterator[Line]:
+        """Parse GCode from an asyncio stream or an async iterable of bytes, yielding Line objects as they arrive.
+
+        Example:
+            reader, writer = await asyncio.open_connection(host, port)
+            async for line in parser.aparse(reader):
+                ...
+
+        Data is only read from the source as the lines are consumed, and control is yielded to the event loop
+        regularly while parsing, see rs274_parser.aio. Lines are split on the same line boundaries as parse() splits
+        them.
+        """
+        from rs274_parser.aio import aparse
+
+        return aparse(self, source, encoding=encoding)
+
+    def _parse_line(self, line: str) -> Line:
+        """Parse a single line of GCode, using the line cache and the fast path for literal-only lines if enabled."""
+        line_cache = self.line_cache
+        if line_cache is None or self.start_rule != "line" or "#" in line:
+            return self._parse_uncached_line(line)
+
+        key = (line, self.machine_state.is_block_delete_switch_enabled)
+        parsed_line = line_cache.get(key)
+        if parsed_line is None:
+            parsed_line = self._parse_uncached_line(line)
+            line_cache.put(key, parsed_line)
+        elif self.commits_deleted_blocks or not (key[1] and fast_path.BLOCK_DELETE.match(line)):
+            # Parsing the line would have committed any parameter values left pending by a block-deleted line
+            self.machine_state.commit_parameter_values()
+
+        return parsed_line
+
+    def _parse_uncached_line(self, line: str) -> Line:
+        if self.fast_path and self.start_rule == "line" and fast_path.is_literal_line(line):
+            parsed_line = fast_path.scan_line(self, line, semicolon_comments=self.semicolon_comments)
+            if parsed_line is not None:
+                return parsed_line
+
+        return self.backend.parse_line(self, line)
+
+    def parse_parallel(self, content: str, workers: int | None = None) -> list[Line]:
+        """Parse raw GCode from a string into a list of Line objects, using a pool of worker processes.
+
+        The result, as well as the resulting machine_state, is the same as with parse(), also when a line fails to
+        parse. The program is split into chunks which are parsed in parallel, each starting from the machine state at
+        the start of the chunk. That state is computed up front by running only the lines that read or write
+        parameters through a parser, so the speed-up depends on how few of those there are (see
+        rs274_parser.parallel).
+
+        workers defaults to the number of CPUs. Small programs are parsed in this process.
+        """
+        from rs274_parser.parallel import parse_parallel
+
+        return parse_parallel(self, content, workers=workers)
+
+    def parse_many(
+        self,
+        paths: Iterable[str | os.PathLike],
+        workers: int | None = None,
+        encoding: str = "utf-8",
+        summarize: bool = False,
+    ) -> Iterator["FileResult"]:
+        """Parse many GCode files in a pool of worker processes, yielding a FileResult per file as each is done.
+
+        Every file is parsed from this parser's current machine state, by workers with this parser's dialect and
+        options, and the machine state of this parser isn't changed. Errors are returned in the results rather than
+        raised. With summarize=True, files are summarised (see summarize()) rather than parsed into lines, which is a
+        lot faster for checking many programs. See rs274_parser.parallel.ParserPool to reuse the same workers for more
+        files later.
+        """
+        from rs274_parser.parallel import parse_many
+
+        return parse_many(self, paths, workers=workers, encoding=encoding, summarize=summarize)
+
+    def compile(self, content: str | Iterable[str]) -> "CompiledProgram":
+        """Parse GCode into a CompiledProgram, which can be evaluated many times with different machine states.
+
+        Evaluating a compiled program results in the same lines as parsing it, but is much faster, because it only
+        re-evaluates the parts of each line that depend on parameters (see rs274_parser.compiled). Compiling doesn't
+        use or change the parser's machine state. Syntax errors are raised when compiling, while any other errors
+        (like undefined parameters) are raised during evaluation, just like they would be when parsing.
+        """
+        from rs274_parser.compiled import compile_program
+
+        if isinstance(content, str):
+            content = content.splitlines()
+        return compile_program(self, content)
+
+    def validate(self, content: str | Iterable[str]) -> list["ValidationError"]:
+        """Check whether GCode parses, returning the errors of all lines that don't (e.g. syntax errors or reads of
+        undefined parameters) rather than raising the first one.
+
+        The machine state is updated like parse() updates it, except that lines with errors don't set any parameters.
+        Validating is faster and uses much less memory than parsing, because no words or lines are built.
+        """
+        if self.start_rule != "line":
+            raise ValueError("Only parsers with the 'line' start rule can validate GCode.")
+        from rs274_parser.validation import validate
+
+        if isinstance(content, str):
+            content = content.splitlines()
+        return validate(self, content)
+
+    def summarize(self, source: str | os.PathLike | Iterable[str], encoding: str = "utf-8") -> "ProgramSummary":
+        """Collect statistics about a GCode program (axis extents, feed and spindle speed ranges, tools, word counts,
+        rapid and feed moves) in a single pass, without building any lines.
+
+        source can be anything iter_parse() accepts, and the machine state is updated the same way. Memory use doesn't
+        grow with the length of the program, see rs274_parser.summary.
+        """
+        from rs274_parser.summary import summarize
 
-        for line in content.splitlines():
-            lines.append(self._parse_rule(line))
-        return lines
+        return summarize(self, source, encoding=encoding)
+
+    def flatten(
+        self,
+        source: str | os.PathLike | Iterable[str],
+        sink: "str | os.PathLike | TextSink",
+        encoding: str = "utf-8",
+        precision: int | None = None,
+        comments: bool = True,
+        line_numbers: bool = True,
+    ) -> int:
+        """Write a GCode program with every expression and parameter evaluated, for controllers that can't evaluate
+        them, returning the number of lines written.
+
+        source can be anything iter_parse() accepts, and the machine state is updated the same way. sink is a path or
+        an open text file. Each line is written as its words in execution order, optionally with its line number and
+        comments, and numbers other than G and M codes are rounded to precision decimal places if given. Lines are
+        written in chunks and memory use doesn't grow with the length of the program, see rs274_parser.flatten.
+        """
+        from rs274_parser.flatten import flatten
+
+        return flatten(
+            self,
+            source,
+            sink,
+            encoding=encoding,
+            precision=precision,
+            comments=comments,
+            line_numbers=line_numbers,
+        )
+
+    def parse_columnar(self, source: str | os.PathLike | Iterable[str], encoding: str = "utf-8") -> "ColumnarProgram":
+        """Parse GCode into a ColumnarProgram, which stores all words of the program in flat NumPy arrays.
+
+        source can be anything iter_parse() accepts. Words are stored in execution order, the same order as the
+        words of the lines returned by parse(), and the machine state is updated the same way. This needs NumPy to be
+        installed, see rs274_parser.columnar.
+        """
+        from rs274_parser.columnar import to_columnar
+
+        return to_columnar(self.iter_parse(source, encoding=encoding), self.word_info)
+
+    def parse_file(self, path: "str | os.PathLike | GCodeFile", encoding: str = "utf-8") -> list[Line]:
+        """Parse a GCode file into a list of Line objects.
+
+        The file is memory-mapped and each line is only decoded as it's parsed, so the file's content is never held
+        in memory as one big string. To re-read individual lines later without scanning the file again, open a
+        GCodeFile and pass that in instead of a path - its line offset index can be reused once parsing is done.
+        """
+        from rs274_parser.files import GCodeFile
+
+        if isinstance(path, GCodeFile):
+            return list(self.iter_parse(path))
+
+        with GCodeFile(path, encoding=encoding) as gcode_file:
+            return list(self.iter_parse(gcode_file))
 
     @property
     def grammar_str(self) -> str:
         return GRAMMAR
 
     @property
-    def parser(self):
+    def parser(self) -> pe.Parser:
+        """The compiled grammar, which is shared with all other parsers of the same dialect and rules."""
         if self._parser is not None:
             return self._parser
 
@@ -316,9 +678,8 @@ class Rs274:
         if self.extra_rule:
             grammar_str = self.extra_rule + "\n" + grammar_str
 
-        _, defmap = loads(grammar_str)
-        g = Grammar(defmap, actions=self.actions(), start=self.start_rule)
-        self._parser = MachineParser(g, ignore=DEFAULT_IGNORE, flags=Flag.OPTIMIZE)
+        key = grammar_cache.grammar_key(type(self), grammar_str, self.start_rule)
+        self._parser = grammar_cache.get_compiled_grammar(key, self.actions)
 
         return self._parser
 
@@ -327,6 +688,10 @@ class Rs274:
         initial_machine_state: MachineState | None = None,
         start_rule: str = "line",
         extra_rule: str | None = None,
+        fast_path: bool = False,
+        compact_lines: bool = False,
+        line_cache_size: int = 0,
+        backend: str = DEFAULT_BACKEND,
     ):
         """Create a new parser.
 
@@ -342,23 +707,105 @@ class Rs274:
             parser = Parser(MachineState(initial_parameter_values={123: 0}))
             parser.parse('#123 = 1 G0 X#123') # X123 evaluates to X0
             parser.parse('#123 = 1 G0 X#123') # X123 evaluates to X123
+
+        With fast_path enabled, lines without any expressions or parameters (which are most lines in typical CAM
+        output) are parsed with a hand-written scanner instead of the grammar. The resulting lines are the same either
+        way, see rs274_parser.fast_path.
+
+        With compact_lines enabled, parsed lines are CompactLine rather than Line objects. They have the same
+        attributes and methods, but store words and comments in tuples and share empty assignment mappings, which
+        takes less time and memory for large programs. Compact lines aren't meant to be modified.
+
+        With a line_cache_size, up to that many of the most recently parsed lines that don't use parameters are
+        cached, so that repeated lines aren't parsed again (see rs274_parser.line_cache). Repeated lines are then the
+        same Line object, so parsed lines shouldn't be modified either. The cache's hits and misses are available
+        from parser.line_cache.
+
+        backend selects what parses lines that the fast path and line cache don't take care of: "pe" (the default)
+        matches them with the compiled grammar, "descent" with a hand-written recursive descent parser, which is a lot
+        faster for lines with expressions and parameters. The resulting lines, machine state and errors are the same
+        either way, see rs274_parser.backends.
+
+        Parsers of the same dialect share the compiled grammar, which is immutable and can be used by many threads at
+        the same time (see rs274_parser.grammar_cache). A parser itself, with its machine state, line cache and stats,
+        must only be used by one thread at a time: to parse programs concurrently, give every thread its own parser
+        (e.g. with clone()). The initial machine state is only read, so the same one can be passed to parsers in any
+        number of threads, as long as it isn't the machine state of a parser in use.
         """
         self.start_rule = start_rule
         self.extra_rule = extra_rule
+        self.fast_path = fast_path
+        self.compact_lines = compact_lines
+        if line_cache_size:
+            from rs274_parser.line_cache import LineCache
+
+            self.line_cache = LineCache(line_cache_size)
+        else:
+            self.line_cache = None
+        self.backend = get_backend(backend)
         self.machine_state = initial_machine_state.clone() if initial_machine_state is not None else MachineState()
 
+    def enable_stats(self, slowest_line_count: int | None = None) -> "ParserStats":
+        """Start collecting statistics about what the parser spends its time on, see rs274_parser.stats.
+
+        Returns the ParserStats, which are also available as parser.stats. Collecting stats slows parsing down a
+        bit, but a parser that doesn't collect stats (or no longer does) isn't affected at all. The stats keep the
+        slowest_line_count slowest lines, or rs274_parser.stats.SLOWEST_LINE_COUNT by default.
+        """
+        from rs274_parser.stats import SLOWEST_LINE_COUNT, ParserStats, instrument
+
+        if self.stats is None:
+            self.stats = ParserStats(SLOWEST_LINE_COUNT if slowest_line_count is None else slowest_line_count)
+            instrument(self, self.stats)
+        return self.stats
+
+    def disable_stats(self):
+        """Stop collecting statistics.
+
+        The collected stats stay available from the ParserStats that enable_stats() returned.
+        """
+        if self.stats is not None:
+            from rs274_parser.stats import uninstrument
+
+            uninstrument(self)
+            self.stats = None
+
+    def _options(self) -> dict[str, Any]:
+        """The keyword arguments to create another parser with the same options as this one."""
+        return {
+            "start_rule": self.start_rule,
+            "extra_rule": self.extra_rule,
+            "fast_path": self.fast_path,
+            "compact_lines": self.compact_lines,
+            "line_cache_size": self.line_cache.maxsize if self.line_cache is not None else 0,
+            "backend": self.backend.name,
+        }
+
+    def clone(self) -> Self:
+        """Create a parser of the same dialect, with the same options and a copy of the current machine state.
+
+        The new parser shares the compiled grammar with this one, which makes cloning cheap, e.g. to give every thread
+        its own parser. Its line cache starts out empty, and it doesn't collect stats.
+        """
+        return type(self)(self.machine_state, **self._options())
+
     def actions(self):
+        """The grammar actions of the dialect.
+
+        Actions have to call parser methods through ParserMethod rather than being bound to self, because the compiled
+        grammar is shared between all parser instances of a dialect.
+        """
         return {
-            "float": Capture(self.transform_float),  # type: ignore
-            "integer": Capture(self.transform_integer),  # type: ignore
-            "word_number": Pack(self.transform_word_number),
-            "word": Pack(self.transform_word),
-            "operand": Pack(self.transform_operand),
-            "unary_operation": Pack(self.transform_unary_operation),
-            "l1_operation": Pack(self.transform_binary_operation),
-            "l2_operation": Pack(self.transform_binary_operation),
-            "l3_operation": Pack(self.transform_binary_operation),
-            "numeric_parameter": self.transform_numeric_parameter,
-            "parameter_setting": Pack(self.transform_parameter_setting),
-            "line": LineAction(self.transform_line),
+            "float": Capture(ParserMethod("transform_float")),  # type: ignore
+            "integer": Capture(ParserMethod("transform_integer")),  # type: ignore
+            "word_number": Pack(ParserMethod("transform_word_number")),
+            "word": Pack(ParserMethod("transform_word")),
+            "operand": Pack(ParserMethod("transform_operand")),
+            "unary_operation": Pack(ParserMethod("transform_unary_operation")),
+            "l1_operation": Pack(ParserMethod("transform_binary_operation")),
+            "l2_operation": Pack(ParserMethod("transform_binary_operation")),
+            "l3_operation": Pack(ParserMethod("transform_binary_operation")),
+            "numeric_parameter": ParserMethod("transform_numeric_parameter"),
+            "parameter_setting": Pack(ParserMethod("transform_parameter_setting")),
+            "line": LineAction(ParserMethod("transform_line")),
         }
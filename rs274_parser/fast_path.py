@@ -0,0 +1,82 @@
+"""A hand-written scanner for lines of GCode that only contain literal values.
+
+Most lines in CAM output look like "G1 X1.234 Y-5.6 F1500" and never use expressions or parameters. For those lines,
+matching the full grammar is a lot of overhead, so this scanner tokenizes them with a handful of regular expressions
+instead and hands the same items to the parser's transform_* methods that the grammar's actions would.
+
+The regular expressions mirror the grammar rules exactly (including ignored whitespace and whitespace within
+numbers), with possessive quantifiers to get the same no-backtracking behaviour as the PEG. Anything the scanner
+doesn't recognise makes it give up, and the line is then parsed by the grammar as usual, which also takes care of
+raising the right errors.
+"""
+
+import re
+from typing import TYPE_CHECKING, Literal, cast
+
+from rs274_parser.types import Line, NumericParameterAssignment, Word
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import Rs274
+
+# Lines containing either of these might contain expressions, unary operations or parameters
+EXPRESSION_CHARACTERS = ("[", "#")
+
+BLOCK_DELETE = re.compile(r"[ \t]*+/")
+LINE_NUMBER = re.compile(r"[ \t]*+N[ \t]*+(-?+[0-9 \t]++)")
+STATEMENT = re.compile(
+    r"""[ \t]*+(?:
+        (?P<letter>[a-zA-Z])[ \t]*+(?P<sign>[+-]?+)[ \t]*+
+        (?:(?P<float>-?+[0-9 \t]*+\.[0-9 \t]++)|(?P<integer>-?+[0-9 \t]++))
+        |
+        \([ \t]*+(?P<comment>[^)]*+)\)
+    )""",
+    re.VERBOSE,
+)
+SEMICOLON_COMMENT = re.compile(r"[ \t]*+;[ \t]*+(.*+)", re.DOTALL)
+END = re.compile(r"[ \t]*+\Z")
+
+
+def is_literal_line(line: str) -> bool:
+    """Cheaply check whether a line can't contain expressions or parameters."""
+    return EXPRESSION_CHARACTERS[0] not in line and EXPRESSION_CHARACTERS[1] not in line
+
+
+def scan_line(parser: "Rs274", line: str, semicolon_comments: bool = False) -> Line | None:
+    """Parse a literal-only line of GCode, or return None if it has to be parsed by the grammar instead."""
+    items: list[Literal["/"] | int | Word | str | NumericParameterAssignment] = []
+    position = 0
+
+    match = BLOCK_DELETE.match(line)
+    if match:
+        items.append("/")
+        position = match.end()
+
+    match = LINE_NUMBER.match(line, position)
+    if match:
+        items.append(parser.transform_integer(match[1]))
+        position = match.end()
+
+    while match := STATEMENT.match(line, position):
+        position = match.end()
+        letter = match["letter"]
+        if letter is None:
+            items.append(match["comment"])
+            continue
+
+        float_str = match["float"]
+        number = (
+            parser.transform_float(float_str) if float_str is not None else parser.transform_integer(match["integer"])
+        )
+        sign = cast(Literal["+", "-"], match["sign"])
+        items.append(parser.transform_word([letter, parser.transform_word_number([sign, number])]))
+
+    if semicolon_comments:
+        match = SEMICOLON_COMMENT.match(line, position)
+        if match:
+            items.append(match[1])
+            position = match.end()
+
+    if not END.match(line, position):
+        return None
+
+    return parser.transform_line(line, items)
@@ -0,0 +1,177 @@
+"""Memory-mapped access to GCode files"""
+
+import codecs
+import mmap
+import os
+import re
+import struct
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+
+from rs274_parser.fingerprints import PARSING_VERSION
+
+# Header of a saved line index: magic, parsing version, encoding, source file size, source file mtime (ns)
+INDEX_HEADER = struct.Struct("<8sI32sQq")
+INDEX_MAGIC = b"RS274IX2"
+# The line boundaries of str.splitlines(), which parse() splits content on
+LINE_BOUNDARIES = ("\r\n", "\n", "\r", "\v", "\f", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
+
+
+@lru_cache
+def line_boundary_pattern(encoding: str = "utf-8") -> re.Pattern[bytes]:
+    """A pattern matching the line boundaries of str.splitlines() in text encoded with encoding.
+
+    Splitting encoded text on its matches and decoding the lines gives the same lines as decoding the text and
+    splitting it with str.splitlines(), for encodings in which no character's bytes contain another one's, like UTF-8.
+    """
+    encoded_boundaries = []
+    for boundary in LINE_BOUNDARIES:
+        try:
+            encoded_boundaries.append(boundary.encode(encoding))
+        except UnicodeEncodeError:
+            # Characters the encoding doesn't have can't end a line
+            pass
+    # Longest first, so that "\r\n" is a single boundary
+    encoded_boundaries.sort(key=len, reverse=True)
+    return re.compile(b"|".join(map(re.escape, encoded_boundaries)))
+
+
+def read_lines(path: str | os.PathLike, encoding: str = "utf-8") -> Iterator[str]:
+    """Read the lines of a file one at a time, split the same way as parse() splits content (see GCodeFile)."""
+    # Without newline translation, lines end in "\n", "\r" or "\r\n", and only the other line boundaries are left
+    with open(path, encoding=encoding, newline="") as f:
+        for line in f:
+            yield from line.splitlines()
+
+
+class GCodeFile:
+    """A memory-mapped GCode file with an index of the byte offset at which every line starts.
+
+    The index is built in a single pass over the file when it's opened (or loaded from index_path, if a saved index
+    for the same file exists there). Lines are only decoded when they're read, so iterating over a GCode file never
+    holds more than a single decoded line in memory. The offset index stays around, so any line can later be
+    re-read by its (0-based) number without scanning the file again.
+
+    Lines are split the same way as parse() splits content, on the line boundaries of str.splitlines() (see
+    line_boundary_pattern()), and without an empty line at the end of a file that ends in a line boundary.
+
+    Example:
+        with GCodeFile("program.ngc") as gcode_file:
+            lines = parser.parse_file(gcode_file)
+            print(gcode_file[1000])  # The raw GCode of line 1000
+    """
+
+    path: Path
+    encoding: str
+    offsets: array
+
+    def __init__(self, path: str | os.PathLike, encoding: str = "utf-8", index_path: str | os.PathLike | None = None):
+        self.path = Path(path)
+        self.encoding = encoding
+        self._line_boundary = line_boundary_pattern(encoding)
+
+        self._file = open(self.path, "rb")
+        self._map = None
+        try:
+            stat = os.fstat(self._file.fileno())
+            self._size = stat.st_size
+            self._mtime_ns = stat.st_mtime_ns
+            # Empty files can't be mapped
+            if self._size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            offsets = self.load_index(index_path) if index_path is not None else None
+            if offsets is not None:
+                self.offsets = offsets
+            else:
+                self.offsets = self._build_index()
+                if index_path is not None:
+                    self.save_index(index_path)
+        except BaseException:
+            self.close()
+            raise
+
+    def _build_index(self) -> array:
+        offsets = array("Q")
+        if self._map is None:
+            return offsets
+
+        offsets.append(0)
+        offsets.extend([boundary.end() for boundary in self._line_boundary.finditer(self._map)])
+        if offsets[-1] == self._size:
+            # No empty line after the last line boundary
+            offsets.pop()
+        return offsets
+
+    def save_index(self, index_path: str | os.PathLike):
+        """Save the line offset index, so it can be reused by opening the same file with index_path."""
+        with open(index_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(*self._index_header()))
+            self.offsets.tofile(f)
+
+    def load_index(self, index_path: str | os.PathLike) -> array | None:
+        """Load a saved line offset index, returning None if there is none or if it was saved for a different file."""
+        try:
+            with open(index_path, "rb") as f:
+                if INDEX_HEADER.unpack(f.read(INDEX_HEADER.size)) != self._index_header():
+                    return None
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+                return offsets
+        except (OSError, struct.error, ValueError):
+            return None
+
+    def _index_header(self) -> tuple:
+        # Where lines are split depends on the encoding, see line_boundary_pattern()
+        # Padded like struct pads it
+        encoding = codecs.lookup(self.encoding).name.encode("ascii").ljust(32, b"\0")
+        return (INDEX_MAGIC, PARSING_VERSION, encoding, self._size, self._mtime_ns)
+
+    def line_span(self, line_index: int) -> tuple[int, int]:
+        """The start and end byte offsets of a line, excluding its line ending."""
+        start = self.offsets[line_index]
+        end = self.offsets[line_index + 1] if line_index + 1 < len(self.offsets) else self._size
+
+        assert self._map is not None
+        boundary = self._line_boundary.search(self._map, start, end)
+        return start, end if boundary is None else boundary.start()
+
+    def __getitem__(self, line_index: int) -> str:
+        if line_index < 0:
+            line_index += len(self.offsets)
+        if not 0 <= line_index < len(self.offsets):
+            raise IndexError(f"Line {line_index} is out of range.")
+
+        start, end = self.line_span(line_index)
+        assert self._map is not None
+        return self._map[start:end].decode(self.encoding)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._map is None:
+            return
+
+        # A single pass over the file, rather than looking up the end of every line in the index
+        data = self._map
+        encoding = self.encoding
+        start = 0
+        for boundary in self._line_boundary.finditer(data):
+            yield data[start : boundary.start()].decode(encoding)
+            start = boundary.end()
+        if start < self._size:
+            yield data[start:].decode(encoding)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "GCodeFile":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,38 @@
+"""Fingerprints of parsers, for parsed output that is saved to disk and reused later.
+
+Program caches (see rs274_parser.program_cache) and program indexes (see rs274_parser.program_index) save what parsing
+a program resulted in, which is only valid for parsers that would parse the program the same way. A parser's
+fingerprint covers everything that parsing depends on besides the program itself: the dialect, its grammar (including
+any extra rule) and words, the machine state, and the version of this package's parsing semantics.
+"""
+
+import hashlib
+import json
+from typing import TYPE_CHECKING, Any
+
+from rs274_parser import snapshots
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import Rs274
+
+# Has to be increased by every change that parses any program into different lines or machine states (e.g. when
+# parameter values are committed), so that output saved by older versions isn't reused
+PARSING_VERSION = 1
+
+
+def parser_fingerprint(parser: "Rs274") -> dict[str, Any]:
+    """The fingerprint of a parser with its current machine state, as JSON-compatible data.
+
+    Options that only affect how fast a program is parsed (like the backend or the fast path) aren't part of it.
+    """
+    dialect = type(parser)
+    definition = json.dumps([parser.extra_rule, parser.grammar_str, repr(parser.word_table.words)])
+    fingerprint = {
+        "parsing_version": PARSING_VERSION,
+        "dialect": f"{dialect.__module__}.{dialect.__qualname__}",
+        # The grammar and words take a few kB, so only their hash is kept
+        "definition": hashlib.sha256(definition.encode("utf-8")).hexdigest(),
+        "machine_state": snapshots.to_json(snapshots.snapshot(parser.machine_state)),
+    }
+    # Tuples are loaded as lists, so fingerprints loaded from JSON compare equal to new ones
+    return json.loads(json.dumps(fingerprint, default=repr))
@@ -0,0 +1,217 @@
+"""Flattening GCode programs, i.e. writing them with every expression and parameter evaluated.
+
+Controllers that can't evaluate parameters or expressions can run a flattened program instead. Flattening runs every
+line through the grammar (or the fast path) with a Flattener in place of the parser (see rs274_parser.stand_in):
+expressions are evaluated and parameters are read and set by the parser, but instead of building words and
+a line, the flattener formats each word as it's parsed, and writes the line's words in execution order (the order of
+Line.words), optionally with its line number and comments. Parameter assignments have already taken effect in the
+words of the following lines, so they're left out. Every line of the source results in exactly one line of output (an
+empty one if nothing is left of it), so that errors a controller reports for a line can be traced back to the source.
+
+Comments are written the way they were written in the source: a semicolon comment stays one (so that it can't turn
+into an active comment like "(MSG, ...)"), and active comments are passed through unchanged, since controllers act on
+their text. In other parenthesised comments, parentheses are replaced with brackets, as controllers don't allow
+nested comments.
+
+The flattened program is for the machine state the parser starts with. In particular, if the block delete switch is
+enabled, deleted lines are written as empty lines, and if it isn't, they're written without the "/": the lines after
+them may depend on the parameters they set, so they can't be deleted on the controller later on.
+
+Source files are read line by line, and the output is written in chunks of lines, so flattening takes the same small
+amount of memory for any program length.
+"""
+
+import math
+import os
+import re
+from decimal import Decimal
+from functools import lru_cache
+from operator import itemgetter
+from typing import TYPE_CHECKING, Iterable, Protocol
+
+from rs274_parser.files import read_lines
+from rs274_parser.stand_in import StandIn
+from rs274_parser.summary import CODE_LETTERS
+from rs274_parser.types import TNumber
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import Rs274
+
+# How many lines are joined into a single write
+WRITE_CHUNK_LINES = 1000
+# How many distinct words the text is kept for
+WORD_CACHE_SIZE = 2**12
+WORD_ORDERING = itemgetter(0)
+# Comments whose text the controller acts on, like showing a message or logging values
+ACTIVE_COMMENT = re.compile(
+    r"[ \t]*(?:(?:MSG|DEBUG|PRINT|LOG|LOGOPEN|LOGAPPEND|PROBEOPEN)[ \t]*,|(?:LOGCLOSE|PROBECLOSE)[ \t]*$)",
+    re.IGNORECASE,
+)
+# Everything on a line before the ";" of a semicolon comment: a ";" in a comment or a parameter name doesn't count
+SEMICOLON_COMMENT_START = re.compile(r"(?:\([^)]*\)|<[^>]*>|[^(<;])*;")
+
+
+class TextSink(Protocol):
+    """Anything flattened GCode can be written to, like an open text file."""
+
+    def write(self, s: str, /) -> object: ...
+
+
+def format_number(number: TNumber, precision: int | None = None) -> str:
+    """Format the number of a word of flattened GCode, which is never in scientific notation.
+
+    Integers are written as they are. Floats are written with the fewest digits that read back as the same float, or
+    rounded to precision decimal places (without trailing zeros) if a precision is given.
+    """
+    if isinstance(number, int):
+        return str(number)
+    if not math.isfinite(number):
+        raise ValueError(f"{number} can't be written in GCode.")
+
+    if precision is None:
+        text = repr(number)
+        if "e" in text:
+            text = format(Decimal(text), "f")
+        return text
+
+    text = f"{number:.{precision}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def format_comment(comment: str) -> str:
+    """Write the text of a parenthesised comment as a comment, see the module docstring."""
+    if ACTIVE_COMMENT.match(comment):
+        return f"({comment})"
+    return "(" + comment.replace("(", "[").replace(")", "]") + ")"
+
+
+class Flattener(StandIn):
+    """Stands in for a parser while the grammar runs, formatting the words of each line instead of building it."""
+
+    def __init__(self, parser: "Rs274", precision: int | None = None, comments: bool = True, line_numbers: bool = True):
+        super().__init__(parser)
+        self.precision = precision
+        self.comments = comments
+        self.line_numbers = line_numbers
+        # Repeated words (G1, F1500, the same coordinates over and over) are only formatted once, like the parser
+        # only creates them once, see WordTable
+        self._cached_word = lru_cache(maxsize=WORD_CACHE_SIZE, typed=True)(self._format_word)
+
+    def transform_word(self, items: list) -> tuple[int, str]:
+        # An (ordering, text) tuple stands in for the word
+        number = items[1]
+        if number == 0 and type(number) is float:
+            # The cache can't tell -0.0 from 0.0, so zeros are formatted every time
+            return self._format_word(items[0], number)
+        return self._cached_word(items[0], number)
+
+    def _format_word(self, letter: str, number: TNumber) -> tuple[int, str]:
+        self.check_word(letter, number)
+
+        letter = letter.upper()
+        if self.precision is None or letter in CODE_LETTERS:
+            # G and M numbers are codes rather than values, so they're never rounded (G38.2 isn't G38)
+            # The same text as str(word), unless it has an exponent or is infinite (letters are upper case)
+            text = f"{letter}{number}"
+            if "e" in text or "n" in text:
+                text = letter + format_number(number)
+        else:
+            text = letter + format_number(number, self.precision)
+        return (self.parser.word_info(letter, number).ordering, text)
+
+    def transform_line(self, s: str, items: list) -> str:
+        committed_items = self.commit_line(items)
+        if committed_items is None:
+            return ""
+        items = committed_items
+
+        words: list[tuple[int, str]] = []
+        comments: list[str] = []
+        line_number = None
+        for item in items:
+            item_type = type(item)
+            if item_type is tuple:
+                words.append(item)
+            elif item_type is str:
+                comments.append(item)
+            elif item_type is int:
+                line_number = item
+            # Parameter settings are None
+
+        parts = []
+        if line_number is not None and self.line_numbers:
+            parts.append(f"N{line_number}")
+        if words:
+            # In execution order, like the words of a parsed line (sorting is stable)
+            words.sort(key=WORD_ORDERING)
+            parts.extend([text for _, text in words])
+        if comments and self.comments:
+            semicolon_comment = None
+            if self.semicolon_comments and SEMICOLON_COMMENT_START.match(s):
+                # A semicolon comment is always the last comment of a line
+                semicolon_comment = comments.pop()
+            parts.extend([format_comment(comment) for comment in comments])
+            if semicolon_comment is not None:
+                parts.append(f"; {semicolon_comment}" if semicolon_comment else ";")
+        return " ".join(parts)
+
+
+def flatten(
+    parser: "Rs274",
+    source: str | os.PathLike | Iterable[str],
+    sink: str | os.PathLike | TextSink,
+    encoding: str = "utf-8",
+    precision: int | None = None,
+    comments: bool = True,
+    line_numbers: bool = True,
+) -> int:
+    """Write a GCode program with all expressions and parameters evaluated, returning the number of lines written.
+
+    source can be anything Rs274.iter_parse() accepts, and the parser's machine state is updated like parsing it
+    would. sink is a path to write to, or an open text file (or anything else with a write() method). Numbers are
+    formatted with format_number() and the given precision, except the numbers of G and M words, which are codes and
+    never rounded. Comments and line numbers are only written if comments and line_numbers are True.
+
+    Errors are raised like they are when parsing, after writing all lines before the line with the error.
+    """
+    if parser.start_rule != "line":
+        raise ValueError("Only parsers with the 'line' start rule can flatten GCode.")
+
+    if isinstance(sink, (str, os.PathLike)):
+        with open(sink, "w", encoding=encoding) as f:
+            return flatten(parser, source, f, encoding, precision, comments, line_numbers)
+
+    flattener = Flattener(parser, precision=precision, comments=comments, line_numbers=line_numbers)
+    if isinstance(source, str):
+        return _flatten_lines(source.splitlines(), sink, flattener)
+    if isinstance(source, os.PathLike):
+        return _flatten_lines(read_lines(source, encoding), sink, flattener)
+    return _flatten_lines(source, sink, flattener)
+
+
+def _flatten_lines(lines: Iterable[str], sink: TextSink, flattener: Flattener) -> int:
+    write = sink.write
+    chunk: list[str] = []
+    written_lines = 0
+
+    for line in lines:
+        try:
+            # The flattener's transform_line() returns text rather than a Line
+            text: str = flattener.parse_line(line.rstrip("\r\n"))
+        except Exception:
+            if chunk:
+                write("\n".join(chunk) + "\n")
+            raise
+
+        chunk.append(text)
+        if len(chunk) >= WRITE_CHUNK_LINES:
+            write("\n".join(chunk) + "\n")
+            written_lines += len(chunk)
+            chunk = []
+
+    if chunk:
+        write("\n".join(chunk) + "\n")
+        written_lines += len(chunk)
+    return written_lines
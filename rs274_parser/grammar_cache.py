@@ -0,0 +1,160 @@
+"""A process-wide cache of compiled grammars.
+
+Compiling a dialect's grammar into a parsing machine takes far longer than parsing a typical line of GCode, so
+compiled grammars are shared by all parser instances in a process, keyed by the dialect, the grammar string (which
+includes any extra rule) and the start rule. Grammar actions dispatch to whichever parser is currently running the
+grammar (see rs274ngc.ParserMethod), which is what makes the compiled grammars shareable.
+
+Compiled grammars are never changed once they're compiled, and matching keeps all of its state per call, so a compiled
+grammar can be used by any number of threads at the same time. Compiling (and loading) grammars is serialised by a lock,
+so that threads that need the same grammar at the same time compile it only once and all get the same one, while
+getting a grammar that's already cached doesn't take the lock.
+
+Compiled grammars can also be saved to disk and loaded again in a fresh process, which skips compiling the grammar
+altogether. If the RS274_PARSER_GRAMMAR_CACHE environment variable is set, the grammar cache file it points to is
+loaded automatically the first time a grammar is needed - create one with
+
+    python -m rs274_parser.grammar_cache <path>
+
+Note that the grammar cache file is a pickle, so only ever load cache files from trusted locations.
+"""
+
+import os
+import pickle
+import sys
+import threading
+from typing import Callable
+
+import pe
+from pe._constants import Flag
+from pe._grammar import Grammar
+from pe._meta import __version__ as pe_version
+from pe._parse import loads
+from pe.machine import MachineParser
+from pe.patterns import DEFAULT_IGNORE
+
+GRAMMAR_CACHE_ENV_VAR = "RS274_PARSER_GRAMMAR_CACHE"
+CACHE_FORMAT_VERSION = 1
+
+GrammarKey = tuple[str, str, str]
+
+_compiled_grammars: dict[GrammarKey, pe.Parser] = {}
+# Grammars loaded from disk, which are only used once their actions have been checked against the current ones
+_loaded_grammars: dict[GrammarKey, pe.Parser] = {}
+_is_env_cache_loaded = False
+# Held while compiling, loading or clearing grammars
+_lock = threading.Lock()
+
+
+def grammar_key(dialect: type, grammar_str: str, start_rule: str) -> GrammarKey:
+    return (f"{dialect.__module__}.{dialect.__qualname__}", grammar_str, start_rule)
+
+
+def get_compiled_grammar(key: GrammarKey, actions: Callable[[], dict]) -> pe.Parser:
+    """Get the compiled grammar for the given key, compiling it with the given actions if it's not cached yet."""
+    parser = _compiled_grammars.get(key)
+    if parser is not None:
+        return parser
+
+    with _lock:
+        # Another thread might have compiled the grammar while this one was waiting for the lock
+        parser = _compiled_grammars.get(key)
+        if parser is not None:
+            return parser
+        return _compile_grammar(key, actions)
+
+
+def _compile_grammar(key: GrammarKey, actions: Callable[[], dict]) -> pe.Parser:
+    global _is_env_cache_loaded
+
+    if not _is_env_cache_loaded:
+        _is_env_cache_loaded = True
+        if os.environ.get(GRAMMAR_CACHE_ENV_VAR):
+            _load(os.environ[GRAMMAR_CACHE_ENV_VAR])
+
+    grammar_actions = actions()
+
+    loaded_parser = _loaded_grammars.pop(key, None)
+    if loaded_parser is not None and repr(loaded_parser.grammar.actions) == repr(grammar_actions):
+        _compiled_grammars[key] = loaded_parser
+        return loaded_parser
+
+    _, grammar_str, start_rule = key
+    _, defmap = loads(grammar_str)
+    g = Grammar(defmap, actions=grammar_actions, start=start_rule)
+    parser = MachineParser(g, ignore=DEFAULT_IGNORE, flags=Flag.OPTIMIZE)
+    _compiled_grammars[key] = parser
+
+    return parser
+
+
+def clear():
+    with _lock:
+        _compiled_grammars.clear()
+        _loaded_grammars.clear()
+
+
+def save(path: str | os.PathLike):
+    """Save all compiled grammars of this process to a file, so they can be loaded again with load()."""
+    grammars = {}
+    with _lock:
+        compiled_grammars = list(_compiled_grammars.items())
+    for key, parser in compiled_grammars:
+        # The modified grammar is only needed while compiling, and it's a large part of the pickled parser
+        state = dict(parser.__dict__)
+        state.pop("modified_grammar", None)
+        grammars[key] = state
+
+    with open(path, "wb") as f:
+        pickle.dump((CACHE_FORMAT_VERSION, pe_version, grammars), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(path: str | os.PathLike) -> int:
+    """Load compiled grammars saved with save(), returning how many were loaded.
+
+    Grammar cache files saved with a different version of pe are ignored, and so are saved grammars whose actions
+    don't match the actions of the current version of their dialect.
+    """
+    with _lock:
+        return _load(path)
+
+
+def _load(path: str | os.PathLike) -> int:
+    try:
+        with open(path, "rb") as f:
+            format_version, saved_pe_version, grammars = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return 0
+
+    if format_version != CACHE_FORMAT_VERSION or saved_pe_version != pe_version:
+        return 0
+
+    for key, state in grammars.items():
+        parser = MachineParser.__new__(MachineParser)
+        parser.__dict__.update(state)
+        parser.modified_grammar = parser.grammar
+        if key not in _compiled_grammars:
+            _loaded_grammars[key] = parser
+
+    return len(grammars)
+
+
+def main(argv: list[str]):
+    """Compile the grammars of all dialects and save them to the given path."""
+    from rs274_parser.dialects.linuxcnc import LinuxCNC
+    from rs274_parser.dialects.rs274ngc import Rs274
+
+    if len(argv) != 1:
+        print("Usage: python -m rs274_parser.grammar_cache <path>")
+        sys.exit(1)
+
+    for dialect in [Rs274, LinuxCNC]:
+        dialect().parser
+    save(argv[0])
+
+
+if __name__ == "__main__":
+    # Run main() from the imported module rather than __main__, so it sees the grammars compiled by the dialects
+    from rs274_parser import grammar_cache
+
+    grammar_cache.main(sys.argv[1:])
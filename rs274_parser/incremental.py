@@ -0,0 +1,125 @@
+"""Keeping a GCode document parsed while it's being edited.
+
+An IncrementalDocument keeps the parsed lines of a document, plus checkpoints of the machine state before every
+checkpoint_interval-th line. When lines are edited, parsing restarts at the last checkpoint before the edit, and
+stops as soon as it reaches a checkpoint after the edit with the same machine state as before - from there on,
+every line would be parsed exactly like it was before the edit. Since most edits don't change any parameters, an edit
+usually costs at most about two checkpoint intervals' worth of parsing, regardless of the size of the document.
+"""
+
+from typing import TYPE_CHECKING, Iterable
+
+from rs274_parser.types import Line
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+
+CHECKPOINT_INTERVAL = 256
+
+
+class IncrementalDocument:
+    """A GCode document that is re-parsed incrementally as it's edited.
+
+    Lines that fail to parse don't stop the rest of the document from being parsed: their entry in lines is None, the
+    error is recorded in errors, and any parameter values they set before failing are discarded.
+
+    The given parser is used to parse the document, starting from its current machine state. Its machine state is
+    replaced while parsing, and afterwards it's set to (a clone of) the state at the end of the document.
+
+    Example:
+        document = IncrementalDocument(LinuxCNC(), content)
+        document.edit(1000, 1001, "G1 X10")  # Replace line 1000
+        document.edit(5, 5, "G0 Z5\\nG0 X0")  # Insert two lines before line 5
+    """
+
+    parser: "Rs274"
+    checkpoint_interval: int
+    text: list[str]
+    lines: list[Line | None]
+    errors: dict[int, Exception]
+    # Machine state before the line at each index, including one for the end of the document
+    _checkpoints: dict[int, "MachineState"]
+
+    def __init__(self, parser: "Rs274", content: str = "", checkpoint_interval: int = CHECKPOINT_INTERVAL):
+        self.parser = parser
+        self.checkpoint_interval = checkpoint_interval
+        self.text = content.splitlines()
+        self.lines = [None] * len(self.text)
+        self.errors = {}
+        self._checkpoints = {0: parser.machine_state.clone(keep_pending=True)}
+        self._parse_from(0, 0)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @property
+    def machine_state(self) -> "MachineState":
+        """The machine state at the end of the document."""
+        return self._checkpoints[len(self.text)]
+
+    def edit(self, start: int, end: int, new_text: str | Iterable[str]) -> range:
+        """Replace the lines start:end with new_text, which can also be empty (to delete lines) or an empty range.
+
+        Returns the range of lines that were parsed again.
+        """
+        new_lines = new_text.splitlines() if isinstance(new_text, str) else list(new_text)
+        shift = len(new_lines) - (end - start)
+
+        # Restart at the last checkpoint before the edit, which has to be found before checkpoints are moved
+        restart_index = max(index for index in self._checkpoints if index <= start)
+
+        self.text[start:end] = new_lines
+        self.lines[start:end] = [None] * len(new_lines)
+        # Checkpoints before and right after the replaced lines stay where they are relative to the unchanged lines.
+        # When lines are only deleted, the checkpoints at start and end end up at the same index - the one at start
+        # is the one that's still correct.
+        checkpoints = {index + shift: state for index, state in self._checkpoints.items() if index >= end}
+        checkpoints.update({index: state for index, state in self._checkpoints.items() if index <= start})
+        self._checkpoints = checkpoints
+        self.errors = {
+            index if index < start else index + shift: error
+            for index, error in self.errors.items()
+            if index < start or index >= end
+        }
+
+        return self._parse_from(restart_index, start + len(new_lines))
+
+    def _parse_from(self, checkpoint_index: int, changed_end: int) -> range:
+        """Parse from the given checkpoint, until the state at a checkpoint at or after changed_end is unchanged."""
+        machine_state = self._checkpoints[checkpoint_index].clone(keep_pending=True)
+        parser = self.parser
+        parser.machine_state = machine_state
+        last_checkpoint_index = checkpoint_index
+
+        line_index = checkpoint_index
+        line_count = len(self.text)
+        while True:
+            checkpoint = self._checkpoints.get(line_index)
+            if (
+                line_index > checkpoint_index
+                and line_index >= changed_end
+                and checkpoint is not None
+                and checkpoint == machine_state
+            ):
+                break
+            if (
+                checkpoint is not None
+                or line_index - last_checkpoint_index >= self.checkpoint_interval
+                or line_index == line_count
+            ):
+                self._checkpoints[line_index] = machine_state.clone(keep_pending=True)
+                last_checkpoint_index = line_index
+            if line_index == line_count:
+                break
+
+            try:
+                self.lines[line_index] = parser._parse_line(self.text[line_index])
+                self.errors.pop(line_index, None)
+            except Exception as e:
+                self.lines[line_index] = None
+                self.errors[line_index] = e
+                machine_state.rollback_parameter_values()
+            line_index += 1
+
+        parser.machine_state = self.machine_state.clone(keep_pending=True)
+        return range(checkpoint_index, line_index)
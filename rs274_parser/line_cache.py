@@ -0,0 +1,53 @@
+"""A cache of parsed lines, for programs that repeat the same lines over and over.
+
+Only lines that neither read nor write parameters (i.e. lines without a "#") are cached, because the result of
+parsing any other line depends on, or changes, the machine state. The only other part of the machine state that
+affects how a line is parsed is the block delete switch, so it's part of the cache key.
+"""
+
+from collections import OrderedDict
+
+from rs274_parser.types import Line
+
+# The raw line and whether the block delete switch was enabled when it was parsed
+LineCacheKey = tuple[str, bool]
+
+
+class LineCache:
+    """A bounded cache of parsed lines, which evicts the least recently used line once it's full.
+
+    Cached lines are shared, so a line that is parsed again is the same object as the first time it was parsed.
+    """
+
+    maxsize: int
+    hits: int
+    misses: int
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lines: OrderedDict[LineCacheKey, Line] = OrderedDict()
+
+    def get(self, key: LineCacheKey) -> Line | None:
+        line = self._lines.get(key)
+        if line is None:
+            self.misses += 1
+            return None
+
+        self._lines.move_to_end(key)
+        self.hits += 1
+        return line
+
+    def put(self, key: LineCacheKey, line: Line):
+        self._lines[key] = line
+        if len(self._lines) > self.maxsize:
+            self._lines.popitem(last=False)
+
+    def clear(self):
+        self._lines.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._lines)
@@ -0,0 +1,144 @@
+"""Tracking the modal state (motion mode, plane, units, distance mode etc.) of parsed GCode.
+
+The modal state is the current word of each modal group: every G or M word with a non-zero WordInfo.modal_group stays
+in effect until another word of the same group replaces it. G and M words have separate modal groups with the same
+numbers (G modal group 6 is the units, M modal group 6 is the tool change), so groups are keyed by (letter,
+modal_group).
+
+A ModalStateTracker records, for every line, only the groups that the line changed, and keeps a full copy of the
+modal state every snapshot_interval lines. The modal state at any line is then rebuilt from the last snapshot before
+it, which needs at most snapshot_interval small updates, without storing a full copy of the modal state per line.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, Mapping
+
+from rs274_parser.types import EMPTY_MAPPING, Line, TNumber, Word, WordInfo
+
+SNAPSHOT_INTERVAL = 1024
+
+# (letter, modal group)
+ModalGroup = tuple[str, int]
+ModalState = dict[ModalGroup, Word]
+
+
+@dataclass(slots=True, frozen=True)
+class ModalGroupConflict:
+    """Two or more words of the same modal group on one line, which is an error in RS274/NGC."""
+
+    # The (0-based) index of the line
+    line_index: int
+    modal_group: ModalGroup
+    words: tuple[Word, ...]
+
+
+class ModalStateTracker:
+    """The modal state of every line of a program, see the module docstring.
+
+    Example:
+        tracker = ModalStateTracker(parser.word_info)
+        tracker.extend(parser.parse(gcode))
+        motion_mode = tracker.state_at(1000).get(("G", 1))  # e.g. G1
+        print(tracker.conflicts)
+    """
+
+    word_info: Callable[[str, TNumber], WordInfo]
+    snapshot_interval: int
+    # The modal state after the last line
+    state: ModalState
+    conflicts: list[ModalGroupConflict]
+    # Per line: the modal groups the line changed, and their new words
+    _changes: list[Mapping[ModalGroup, Word]]
+    # The modal state before every snapshot_interval-th line
+    _snapshots: list[ModalState]
+
+    def __init__(
+        self,
+        word_info: Callable[[str, TNumber], WordInfo],
+        initial_words: Iterable[Word] = (),
+        snapshot_interval: int = SNAPSHOT_INTERVAL,
+    ):
+        """Create a tracker that looks up the modal groups of words with the given dialect's word_info.
+
+        initial_words are the words in effect before the first line, e.g. the machine's defaults like G17 G21 G90.
+        """
+        self.word_info = word_info
+        self.snapshot_interval = snapshot_interval
+        self.state = {}
+        for word in initial_words:
+            modal_group = self.word_info(word.letter, word.number).modal_group
+            if modal_group:
+                self.state[(word.letter.upper(), modal_group)] = word
+        self.conflicts = []
+        self._changes = []
+        self._snapshots = []
+
+    def __len__(self) -> int:
+        return len(self._changes)
+
+    def update(self, line: Line) -> Mapping[ModalGroup, Word]:
+        """Apply the words of the next line, returning the modal groups it changed."""
+        if len(self._changes) % self.snapshot_interval == 0:
+            self._snapshots.append(dict(self.state))
+
+        state = self.state
+        word_info = self.word_info
+        changes: dict[ModalGroup, Word] | None = None
+        seen: set[ModalGroup] = set()
+        conflicting: set[ModalGroup] | None = None
+        for word in line.words:
+            modal_group = word_info(word.letter, word.number).modal_group
+            if not modal_group:
+                continue
+
+            key = (word.letter.upper(), modal_group)
+            if key in seen:
+                if conflicting is None:
+                    conflicting = set()
+                conflicting.add(key)
+            seen.add(key)
+
+            current_word = state.get(key)
+            if current_word is not word and current_word != word:
+                state[key] = word
+                if changes is None:
+                    changes = {}
+                changes[key] = word
+
+        if conflicting is not None:
+            self._record_conflicts(line, conflicting)
+
+        # Most lines don't change the modal state, and all of those share the same empty mapping
+        self._changes.append(changes if changes is not None else EMPTY_MAPPING)
+        return self._changes[-1]
+
+    def extend(self, lines: Iterable[Line]):
+        for line in lines:
+            self.update(line)
+
+    def _record_conflicts(self, line: Line, modal_groups: set[ModalGroup]):
+        for modal_group in sorted(modal_groups):
+            words = tuple(
+                word
+                for word in line.words
+                if (word.letter.upper(), self.word_info(word.letter, word.number).modal_group) == modal_group
+            )
+            self.conflicts.append(ModalGroupConflict(len(self._changes), modal_group, words))
+
+    def changes_at(self, line_index: int) -> Mapping[ModalGroup, Word]:
+        """The modal groups changed by the line at line_index, and their new words."""
+        return self._changes[line_index]
+
+    def state_at(self, line_index: int) -> ModalState:
+        """The modal state in effect for the line at line_index, i.e. including the changes of that line."""
+        if line_index < 0:
+            line_index += len(self._changes)
+        if not 0 <= line_index < len(self._changes):
+            raise IndexError(f"Line {line_index} is out of range.")
+
+        snapshot_index = line_index // self.snapshot_interval
+        state = dict(self._snapshots[snapshot_index])
+        for changes in self._changes[snapshot_index * self.snapshot_interval : line_index + 1]:
+            if changes:
+                state.update(changes)
+        return state
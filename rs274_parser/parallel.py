@@ -0,0 +1,295 @@
+"""Parsing GCode in multiple processes.
+
+Parsing a program is inherently sequential, because every line is evaluated with the machine state left behind by
+the lines before it. However, the only part of the machine state that lines can change is the parameter values, and
+only lines containing a "#" can read or write parameters. So the machine state at any point of a program can be
+computed up front by running just the parameter lines through a parser, which is cheap for typical CAM output.
+
+parse_parallel() uses this to split a program into chunks, computes the machine state at the start of each chunk,
+parses the chunks in a process pool and stitches the results back together in order.
+
+For many separate programs, a ParserPool instead parses whole files in a pool of worker processes that stays up for
+all of them. Each worker creates its parser (and compiles or loads the grammar) only once, files are handed out
+largest first so that no worker is left with a big file at the end, and results are yielded as soon as each file is
+done. Parsed lines are sent back from the workers in the compact columnar form of program cache files (see
+rs274_parser.program_cache) rather than as pickled Line and Word objects, which is a lot smaller and faster to
+transfer.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from rs274_parser.fast_path import BLOCK_DELETE
+from rs274_parser.program_cache import decode, encode
+from rs274_parser.summary import ProgramSummary
+from rs274_parser.types import Line
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+
+# Chunks smaller than this aren't worth sending to another process
+MIN_CHUNK_LINES = 5000
+# Using a few chunks per worker evens out differences in how long chunks take to parse
+CHUNKS_PER_WORKER = 4
+# Files handed to a ParserPool's workers at any time: enough to keep the workers busy, while bounding the number of
+# results that are held in memory before they're consumed
+PENDING_FILES_PER_WORKER = 2
+
+
+def parse_parallel(
+    parser: "Rs274",
+    content: str,
+    workers: int | None = None,
+    min_chunk_lines: int = MIN_CHUNK_LINES,
+) -> list[Line]:
+    """Parse GCode content in a pool of worker processes, see Rs274.parse_parallel()."""
+    lines = content.splitlines()
+    workers = workers or os.cpu_count() or 1
+    chunk_count = min(workers * CHUNKS_PER_WORKER, len(lines) // max(min_chunk_lines, 1))
+    if workers == 1 or chunk_count < 2:
+        return list(parser.iter_parse(lines))
+
+    try:
+        chunks = split_chunks(parser, lines, chunk_count)
+    except Exception:
+        # Some line can't be parsed - parse serially, so it fails the exact same way it would without parallelism
+        return list(parser.iter_parse(lines))
+
+    parsed_lines: list[Line] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            futures = [
+                executor.submit(parse_chunk, type(parser), parser._options(), machine_state, lines[start:end])
+                for start, end, machine_state in chunks
+            ]
+            # Collecting the results in order means the first chunk that fails raises its error, just like a serial
+            # parse would fail on the first broken line
+            for future, (start, end, machine_state) in zip(futures, chunks):
+                try:
+                    chunk_lines, parser.machine_state = future.result()
+                except Exception:
+                    # Parse the chunk again in this process, which raises the same error as a serial parse, and leaves
+                    # the machine state the way it would (or succeeds, if the worker process broke)
+                    parser.machine_state = machine_state
+                    chunk_lines = list(parser.iter_parse(lines[start:end]))
+                parsed_lines.extend(chunk_lines)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    return parsed_lines
+
+
+def split_chunks(parser: "Rs274", lines: list[str], chunk_count: int) -> list[tuple[int, int, "MachineState"]]:
+    """Split lines into roughly equal chunks, with the machine state at the start of each chunk.
+
+    The machine state of each chunk is exactly the one a serial parse has at that line, including any parameter values
+    left pending by block-deleted lines right before it, which the first line of the chunk that isn't deleted commits.
+    """
+    starts = [0]
+    for chunk_index in range(1, chunk_count):
+        start = chunk_index * len(lines) // chunk_count
+        if start > starts[-1] and start < len(lines):
+            starts.append(start)
+    ends = starts[1:] + [len(lines)]
+
+    # Run only the parameter lines through a parser, committing parameter values wherever the skipped lines would have
+    state_parser = type(parser)(**parser._options())
+    state_parser.machine_state = parser.machine_state.clone(keep_pending=True)
+    # Deleted blocks don't commit any parameter values, unless the dialect commits them like any other line
+    skips_deleted_blocks = parser.machine_state.is_block_delete_switch_enabled and not parser.commits_deleted_blocks
+    parameter_line_indices = [i for i, line in enumerate(lines) if "#" in line]
+    parameter_line_position = 0
+    # The lines from this index up to the next parsed line have been skipped
+    next_index = 0
+
+    def commit_skipped_lines(end: int):
+        # Like parsing, any line commits the parameter values, except deleted blocks in dialects that leave them pending
+        if any(
+            not (skips_deleted_blocks and BLOCK_DELETE.match(lines[line_index]))
+            for line_index in range(next_index, end)
+        ):
+            state_parser.machine_state.commit_parameter_values()
+
+    chunks = []
+    for start, end in zip(starts, ends):
+        while (
+            parameter_line_position < len(parameter_line_indices)
+            and parameter_line_indices[parameter_line_position] < start
+        ):
+            line_index = parameter_line_indices[parameter_line_position]
+            commit_skipped_lines(line_index)
+            state_parser._parse_line(lines[line_index])
+            next_index = line_index + 1
+            parameter_line_position += 1
+
+        commit_skipped_lines(start)
+        next_index = start
+        chunks.append((start, end, state_parser.machine_state.clone(keep_pending=True)))
+
+    return chunks
+
+
+def parse_chunk(
+    parser_class: type["Rs274"],
+    options: dict[str, Any],
+    machine_state: "MachineState",
+    lines: list[str],
+) -> tuple[list[Line], "MachineState"]:
+    """Parse a chunk of lines in a worker process, starting from the given machine state."""
+    parser = parser_class(**options)
+    # Use the machine state as is, rather than a clone, so that pending parameter values carry over
+    parser.machine_state = machine_state
+    return list(parser.iter_parse(lines)), parser.machine_state
+
+
+@dataclass(slots=True)
+class FileResult:
+    """The outcome of parsing (or summarising) one file in a ParserPool."""
+
+    path: str | os.PathLike
+    # The parsed lines, unless the file was summarised or failed to parse
+    lines: list[Line] | None = None
+    summary: ProgramSummary | None = None
+    # The machine state after the last line, unless the file failed to parse
+    machine_state: "MachineState | None" = None
+    error: Exception | None = None
+
+
+class ParserPool:
+    """A pool of worker processes for parsing many files, see the module docstring.
+
+    Every file is parsed by a parser with the given parser's dialect and options, starting from the given parser's
+    current machine state. The given parser itself isn't used or changed.
+
+    Example:
+        with ParserPool(LinuxCNC(machine_state), workers=8) as pool:
+            for result in pool.parse_many(paths):
+                if result.error is not None:
+                    print(f"{result.path}: {result.error!r}")
+    """
+
+    parser_class: type["Rs274"]
+    options: dict[str, Any]
+    initial_machine_state: "MachineState"
+    workers: int
+
+    def __init__(self, parser: "Rs274", workers: int | None = None):
+        """Start the worker processes, workers defaults to the number of CPUs."""
+        self.parser_class = type(parser)
+        self.options = parser._options()
+        self.initial_machine_state = parser.machine_state.clone(keep_pending=True)
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.parser_class, self.options, self.initial_machine_state),
+        )
+
+    def parse_many(
+        self,
+        paths: Iterable[str | os.PathLike],
+        encoding: str = "utf-8",
+        summarize: bool = False,
+    ) -> Iterator[FileResult]:
+        """Parse files, yielding a FileResult per file in the order they're done.
+
+        Errors are returned in the results rather than raised, so one broken file doesn't stop the others. If
+        summarize is True, files are summarised (see rs274_parser.summary) rather than parsed into lines.
+        """
+        # Largest first, so that the last files to start are small ones, and all workers finish at about the same time
+        queue = sorted(paths, key=_file_size)
+        pending: dict[Future, str | os.PathLike] = {}
+        try:
+            while queue or pending:
+                while queue and len(pending) < self.workers * PENDING_FILES_PER_WORKER:
+                    path = queue.pop()
+                    pending[self._executor.submit(_parse_file, path, encoding, summarize)] = path
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self._result(pending.pop(future), *future.result())
+        finally:
+            # Only left over if the caller stopped early
+            for future in pending:
+                future.cancel()
+
+    def _result(
+        self,
+        path: str | os.PathLike,
+        output: dict | list[Line] | ProgramSummary | None,
+        machine_state: "MachineState | None",
+        error: Exception | None,
+    ) -> FileResult:
+        if isinstance(output, ProgramSummary):
+            return FileResult(path, summary=output, machine_state=machine_state)
+        if isinstance(output, dict):
+            output = decode(output, compact=self.options["compact_lines"])
+        return FileResult(path, lines=output, machine_state=machine_state, error=error)
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "ParserPool":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parse_many(
+    parser: "Rs274",
+    paths: Iterable[str | os.PathLike],
+    workers: int | None = None,
+    encoding: str = "utf-8",
+    summarize: bool = False,
+) -> Iterator[FileResult]:
+    """Parse files in a ParserPool that's shut down once all results have been consumed, see Rs274.parse_many()."""
+    with ParserPool(parser, workers=workers) as pool:
+        yield from pool.parse_many(paths, encoding=encoding, summarize=summarize)
+
+
+def _file_size(path: str | os.PathLike) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        # Fails when it's parsed, with the error in its result
+        return 0
+
+
+# The parser of a ParserPool worker process, and the machine state each file is parsed from
+_worker_parser: "Rs274 | None" = None
+_worker_machine_state: "MachineState | None" = None
+
+
+def _init_worker(parser_class: type["Rs274"], options: dict[str, Any], machine_state: "MachineState"):
+    global _worker_parser, _worker_machine_state
+    _worker_parser = parser_class(**options)
+    _worker_machine_state = machine_state
+    # Compile (or load) the grammar up front, rather than while parsing the first file
+    _worker_parser.parser
+
+
+def _parse_file(
+    path: str | os.PathLike,
+    encoding: str,
+    summarize: bool,
+) -> tuple[dict | list[Line] | ProgramSummary | None, "MachineState | None", Exception | None]:
+    """Parse a file in a ParserPool worker process, returning (output, final machine state, error)."""
+    parser = _worker_parser
+    assert parser is not None and _worker_machine_state is not None
+    parser.machine_state = _worker_machine_state.clone(keep_pending=True)
+    try:
+        if summarize:
+            return parser.summarize(Path(path), encoding=encoding), parser.machine_state, None
+
+        lines = parser.parse_file(path, encoding=encoding)
+        try:
+            return encode(lines, parser.machine_state), parser.machine_state, None
+        except ValueError:
+            # An integer too large for the compact form, send the lines as they are
+            return lines, parser.machine_state, None
+    except Exception as e:
+        return None, None, e
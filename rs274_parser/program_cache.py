@@ -0,0 +1,460 @@
+"""A content-addressed on-disk cache of parsed GCode programs.
+
+Parsing a program always gives the same lines and the same final machine state for the same source, dialect and
+initial machine state, so a ProgramCache stores the parsed output of a program in a file named after a hash of those,
+and later parses of the same program load that file instead of running the grammar again.
+
+Cache files are in a compact binary format rather than pickles: a header, then one section per column of the parsed
+program (like a ColumnarProgram, every word's letter, number and ordering is stored in flat arrays, with per-line
+offsets), followed by the final machine state as JSON. Cache files are memory-mapped when they're loaded, so the
+columns can also be used as arrays straight from the file, without building any Line objects.
+
+Several processes can share a cache directory: cache files are written to a temporary file first and then renamed into
+place, so readers only ever see complete files, and files that disappear (because another process evicted them) are
+treated like files that were never written. The total size of the cache files is bounded by evicting the least
+recently used files after each write.
+"""
+
+import gc
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, cast
+
+from rs274_parser import snapshots
+from rs274_parser.fingerprints import parser_fingerprint
+from rs274_parser.types import Line, TNumber, Word, compact_line
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_MAX_SIZE = 1024**3
+CACHE_FILE_SUFFIX = ".rs274"
+
+# Header of a cache file: magic, format version, number of lines
+HEADER = struct.Struct("<8sII")
+MAGIC = b"RS274PRG"
+# Header of each section: array typecode, number of bytes
+SECTION_HEADER = struct.Struct("<cxxxxxxxQ")
+# Sections start at multiples of this, so they can be cast to arrays of any item size
+SECTION_ALIGNMENT = 8
+
+# Stored in the line_numbers section for lines without an N number
+NO_LINE_NUMBER = -(2**63)
+
+# The sections of a cache file, in order, and their array typecodes. Numbers are stored as floats, with a flag per
+# number that says whether it was an integer (integers larger than 2**53 can't be stored, see ProgramCache.put()).
+SECTIONS = {
+    # Per line
+    "line_numbers": "q",
+    # Per line, plus one: the words of line i are entries word_offsets[i]:word_offsets[i + 1] of the per word sections
+    "word_offsets": "q",
+    # Per word
+    "letters": "B",
+    "numbers": "d",
+    "number_is_integer": "B",
+    "orderings": "h",
+    # Comments are stored as one UTF-8 string, with the comments of line i in text_offsets[i]:text_offsets[i + 1]
+    "comment_offsets": "q",
+    "comment_text_offsets": "q",
+    "comment_text": "B",
+    "numeric_assignment_offsets": "q",
+    "numeric_assignment_indices": "q",
+    "numeric_assignment_values": "d",
+    "numeric_assignment_value_is_integer": "B",
+    "named_assignment_offsets": "q",
+    "named_assignment_name_offsets": "q",
+    "named_assignment_names": "B",
+    "named_assignment_values": "d",
+    "named_assignment_value_is_integer": "B",
+    # The machine state after the last line, as JSON
+    "machine_state": "B",
+}
+
+# The largest integer that's stored exactly as a float
+MAX_EXACT_INTEGER = 2**53
+
+
+def _number_columns(numbers: Iterable[TNumber], values: array, is_integer: array):
+    for number in numbers:
+        if type(number) is int:
+            if not -MAX_EXACT_INTEGER <= number <= MAX_EXACT_INTEGER:
+                raise ValueError(f"{number} can't be stored in a program cache file.")
+            is_integer.append(1)
+        else:
+            is_integer.append(0)
+        values.append(number)
+
+
+def _numbers(values: memoryview, is_integer: memoryview) -> list[TNumber]:
+    return [int(value) if flag else value for value, flag in zip(values.tolist(), is_integer.tolist())]
+
+
+def _words(letters: str, numbers: list[TNumber], orderings: list[int]) -> list[Word]:
+    """Create the words of a program, sharing a single Word object between repetitions of the same word.
+
+    This uses the orderings stored in the file rather than a word table, which is much faster than looking up the
+    meta information of every word again.
+    """
+    interned: dict[tuple[str, TNumber, type], Word] = {}
+    words: list[Word] = []
+    append = words.append
+    for letter, number, ordering in zip(letters, numbers, orderings):
+        key = (letter, number, type(number))
+        word = interned.get(key)
+        if word is None:
+            word = Word(letter, number, ordering=ordering)
+            # -0.0 == 0.0, so they can't share an entry
+            if number or type(number) is int:
+                interned[key] = word
+        append(word)
+    return words
+
+
+def _text_columns(strings: Iterable[str], offsets: array, text: array):
+    for string in strings:
+        text.frombytes(string.encode("utf-8"))
+        offsets.append(len(text))
+
+
+def _strings(offsets: memoryview, text: memoryview) -> list[str]:
+    text_bytes = text.tobytes()
+    offset_list = offsets.tolist()
+    return [text_bytes[start:end].decode("utf-8") for start, end in zip(offset_list, offset_list[1:])]
+
+
+def encode(lines: Iterable[Line], machine_state: "MachineState") -> dict[str, array]:
+    """The sections of a cache file for the given parsed lines and final machine state."""
+    columns = {name: array(typecode) for name, typecode in SECTIONS.items()}
+    for name in ["word_offsets", "comment_offsets", "numeric_assignment_offsets", "named_assignment_offsets"]:
+        columns[name].append(0)
+    columns["comment_text_offsets"].append(0)
+    columns["named_assignment_name_offsets"].append(0)
+
+    for line in lines:
+        columns["line_numbers"].append(line.line_number if line.line_number is not None else NO_LINE_NUMBER)
+
+        columns["letters"].frombytes("".join(word.letter for word in line.words).encode("ascii"))
+        _number_columns((word.number for word in line.words), columns["numbers"], columns["number_is_integer"])
+        columns["orderings"].extend(word.ordering for word in line.words)
+        columns["word_offsets"].append(len(columns["letters"]))
+
+        _text_columns(line.comments, columns["comment_text_offsets"], columns["comment_text"])
+        columns["comment_offsets"].append(len(columns["comment_text_offsets"]) - 1)
+
+        columns["numeric_assignment_indices"].extend(line.numeric_assignments.keys())
+        _number_columns(
+            line.numeric_assignments.values(),
+            columns["numeric_assignment_values"],
+            columns["numeric_assignment_value_is_integer"],
+        )
+        columns["numeric_assignment_offsets"].append(len(columns["numeric_assignment_indices"]))
+
+        _text_columns(
+            line.named_assignments.keys(),
+            columns["named_assignment_name_offsets"],
+            columns["named_assignment_names"],
+        )
+        _number_columns(
+            line.named_assignments.values(),
+            columns["named_assignment_values"],
+            columns["named_assignment_value_is_integer"],
+        )
+        columns["named_assignment_offsets"].append(len(columns["named_assignment_values"]))
+
+    columns["machine_state"].frombytes(json.dumps(snapshots.to_json(snapshots.snapshot(machine_state))).encode("utf-8"))
+    return columns
+
+
+def decode(sections: Mapping[str, Any], compact: bool = False) -> list[Line]:
+    """Build the lines from the sections of a cache file (see encode()), as CompactLines if compact.
+
+    The sections can be the memoryviews of a CachedProgram or the arrays returned by encode().
+    """
+    # Building lines creates millions of objects without any reference cycles for large programs, which would
+    # otherwise trigger garbage collection over and over again for nothing
+    is_gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _decode(sections, compact)
+    finally:
+        if is_gc_enabled:
+            gc.enable()
+
+
+def _decode(sections: Mapping[str, Any], compact: bool) -> list[Line]:
+    words = _words(
+        sections["letters"].tobytes().decode("ascii"),
+        _numbers(sections["numbers"], sections["number_is_integer"]),
+        sections["orderings"].tolist(),
+    )
+
+    comments = _strings(sections["comment_text_offsets"], sections["comment_text"])
+    numeric_indices = sections["numeric_assignment_indices"].tolist()
+    numeric_values = _numbers(sections["numeric_assignment_values"], sections["numeric_assignment_value_is_integer"])
+    named_names = _strings(sections["named_assignment_name_offsets"], sections["named_assignment_names"])
+    named_values = _numbers(sections["named_assignment_values"], sections["named_assignment_value_is_integer"])
+
+    word_offsets = sections["word_offsets"].tolist()
+    comment_offsets = sections["comment_offsets"].tolist()
+    numeric_offsets = sections["numeric_assignment_offsets"].tolist()
+    named_offsets = sections["named_assignment_offsets"].tolist()
+
+    lines: list[Line] = []
+    append = lines.append
+    for index, line_number in enumerate(sections["line_numbers"].tolist()):
+        line_words = words[word_offsets[index] : word_offsets[index + 1]]
+        line_comments = comments[comment_offsets[index] : comment_offsets[index + 1]]
+        numeric_start, numeric_end = numeric_offsets[index], numeric_offsets[index + 1]
+        numeric_assignments = (
+            dict(zip(numeric_indices[numeric_start:numeric_end], numeric_values[numeric_start:numeric_end]))
+            if numeric_end > numeric_start
+            else {}
+        )
+        named_start, named_end = named_offsets[index], named_offsets[index + 1]
+        named_assignments = (
+            dict(zip(named_names[named_start:named_end], named_values[named_start:named_end]))
+            if named_end > named_start
+            else {}
+        )
+        if line_number == NO_LINE_NUMBER:
+            line_number = None
+
+        if compact:
+            append(
+                cast(
+                    Line,
+                    compact_line(
+                        tuple(line_words),
+                        tuple(line_comments),
+                        numeric_assignments,
+                        named_assignments,
+                        line_number,
+                    ),
+                )
+            )
+        else:
+            append(Line(line_words, line_comments, numeric_assignments, named_assignments, line_number))
+    return lines
+
+
+class CachedProgram:
+    """A memory-mapped cache file.
+
+    The sections of the file are available as memoryviews in sections, cast to the item type of the section (see
+    SECTIONS). They're backed by the mapped file, so they're only valid until the program is closed.
+
+    Example:
+        with cache.get(key) as program:
+            letters = program.sections["letters"]
+    """
+
+    line_count: int
+    sections: dict[str, memoryview]
+
+    def __init__(self, path: str | os.PathLike):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            view = memoryview(self._map)
+            magic, format_version, self.line_count = HEADER.unpack_from(view)
+            if magic != MAGIC or format_version != CACHE_FORMAT_VERSION:
+                raise ValueError(f"{path} is not a program cache file of the current format.")
+
+            self.sections = {}
+            position = HEADER.size
+            for name, typecode in SECTIONS.items():
+                position = -(-position // SECTION_ALIGNMENT) * SECTION_ALIGNMENT
+                section_typecode, size = SECTION_HEADER.unpack_from(view, position)
+                position += SECTION_HEADER.size
+                if section_typecode.decode() != typecode or position + size > len(view):
+                    raise ValueError(f"{path} is truncated or corrupt.")
+                self.sections[name] = view[position : position + size].cast(typecode)  # type: ignore[call-overload]
+                position += size
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def lines(self, compact: bool = False) -> list[Line]:
+        """Build the lines stored in the file, as CompactLines if compact."""
+        return decode(self.sections, compact)
+
+    def machine_state_data(self) -> dict[str, Any]:
+        return json.loads(self.sections["machine_state"].tobytes())
+
+    def close(self):
+        for section in getattr(self, "sections", {}).values():
+            section.release()
+        self.sections = {}
+        try:
+            self._map.close()
+        except BufferError:
+            # Someone still holds on to a section, the map is closed once that's garbage collected
+            pass
+
+    def __enter__(self) -> "CachedProgram":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ProgramCache:
+    """A directory of cached parsed programs, see the module docstring.
+
+    Example:
+        cache = ProgramCache("~/.cache/rs274", max_size=512 * 1024**2)
+        lines = cache.parse(parser, Path("program.ngc"))  # Parses the program and caches the result
+        lines = cache.parse(LinuxCNC(), Path("program.ngc"))  # Loaded from the cache
+    """
+
+    directory: Path
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(self, directory: str | os.PathLike, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, parser: "Rs274", source: str | os.PathLike, encoding: str = "utf-8") -> str:
+        """The key of the cache file for parsing source (content, or a path to a file) with the given parser.
+
+        The key covers everything that affects the parsed output: the source and the parser's fingerprint, i.e. the
+        dialect and its grammar (including any extra rule), the dialect's words, the parser's current machine state
+        and the version of the parsing semantics (see rs274_parser.fingerprints). Options that only affect how fast a
+        program is parsed (or whether lines are compact, which is decided when loading) are not part of it.
+        """
+        if parser.start_rule != "line":
+            raise ValueError("Only parsers with the 'line' start rule can use a program cache.")
+
+        fingerprint = [CACHE_FORMAT_VERSION, parser_fingerprint(parser)]
+        digest = hashlib.sha256(json.dumps(fingerprint).encode("utf-8"))
+        if isinstance(source, str):
+            digest.update(b"content\0")
+            digest.update(source.encode("utf-8", "surrogatepass"))
+        else:
+            digest.update(f"file\0{encoding}\0".encode())
+            with open(source, "rb") as f:
+                while chunk := f.read(1024**2):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_FILE_SUFFIX}"
+
+    def get(self, key: str) -> CachedProgram | None:
+        """Open the cache file for the key, or return None if there is none (or only an unreadable one)."""
+        path = self.path(key)
+        try:
+            program = CachedProgram(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error):
+            # Cache files are only ever written completely, so this one is corrupt
+            self._remove(path)
+            return None
+
+        try:
+            # Mark the file as recently used, for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return program
+
+    def put(self, key: str, lines: Iterable[Line], machine_state: "MachineState") -> bool:
+        """Store parsed lines and the machine state after them, then evict files if the cache is too large.
+
+        Returns whether the lines could be stored - programs with integers beyond what a float can represent exactly,
+        or with a machine state that can't be stored as JSON, are not cached.
+        """
+        try:
+            columns = encode(lines, machine_state)
+        except (ValueError, TypeError, OverflowError, UnicodeEncodeError):
+            return False
+
+        line_count = len(columns["line_numbers"])
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as f:
+            try:
+                f.write(HEADER.pack(MAGIC, CACHE_FORMAT_VERSION, line_count))
+                for name, typecode in SECTIONS.items():
+                    f.write(b"\0" * (-f.tell() % SECTION_ALIGNMENT))
+                    data = columns[name].tobytes()
+                    f.write(SECTION_HEADER.pack(typecode.encode(), len(data)))
+                    f.write(data)
+            except BaseException:
+                f.close()
+                self._remove(Path(f.name))
+                raise
+
+        # Renaming is atomic, so other processes either see the complete file or no file at all
+        os.replace(f.name, self.path(key))
+        self.evict()
+        return True
+
+    def parse(self, parser: "Rs274", source: str | os.PathLike, encoding: str = "utf-8") -> list[Line]:
+        """Parse content or a file like parser.parse() or parser.parse_file(), using the cache if possible.
+
+        Like parsing, this leaves the parser's machine state as it is after the last line.
+        """
+        key = self.key(parser, source, encoding)
+        program = self.get(key)
+        if program is not None:
+            with program:
+                lines = program.lines(compact=parser.compact_lines)
+                machine_state_data = program.machine_state_data()
+            self.hits += 1
+            parser.machine_state = snapshots.restore(parser.machine_state, snapshots.from_json(machine_state_data))
+            return lines
+
+        self.misses += 1
+        lines = parser.parse(source) if isinstance(source, str) else parser.parse_file(source, encoding)
+        self.put(key, lines, parser.machine_state)
+        return lines
+
+    def size(self) -> int:
+        """The total size of all cache files, in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, max_size: int | None = None):
+        """Remove the least recently used cache files until the cache is no larger than max_size."""
+        max_size = self.max_size if max_size is None else max_size
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total_size <= max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def clear(self):
+        self.evict(max_size=0)
+
+    def _entries(self) -> list[tuple[Path, int, int]]:
+        """All cache files, as (path, size, last use)."""
+        entries = []
+        for path in self.directory.glob(f"*{CACHE_FILE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Evicted by another process
+                continue
+            entries.append((path, stat.st_size, max(stat.st_mtime_ns, stat.st_atime_ns)))
+        return entries
+
+    @staticmethod
+    def _remove(path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,205 @@
+"""Random access into large GCode files.
+
+Parsing a line correctly needs the machine state after all lines before it, so parsing from the middle of a program
+normally means parsing everything before it first. A ProgramIndex runs through the whole file once, recording the
+byte offset of every line (see GCodeFile) and a snapshot of the machine state before every checkpoint_interval-th
+line. Parsing from any line then only needs to start from the last checkpoint before it.
+
+Both are saved next to the GCode file, so opening the same file again later (e.g. to restart a job after a tool broke)
+skips the full pass. Checkpoints are stored as deltas to the previous checkpoint, so programs that hardly change any
+parameters have tiny indexes. Saved indexes are only used for the same file (by size and modification time) and a
+parser with the same fingerprint (see rs274_parser.fingerprints), and are rebuilt otherwise.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, overload
+
+from rs274_parser import snapshots
+from rs274_parser.files import GCodeFile
+from rs274_parser.fingerprints import parser_fingerprint
+from rs274_parser.types import Line
+from rs274_parser.validation import validate
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+
+CHECKPOINT_INTERVAL = 4096
+INDEX_FORMAT_VERSION = 1
+# Appended to the name of the GCode file, for the saved line offsets and checkpoints
+LINE_INDEX_SUFFIX = ".lines"
+CHECKPOINTS_SUFFIX = ".checkpoints"
+
+
+class ProgramIndex:
+    """A GCode file with line offsets and machine state checkpoints, for parsing any part of it quickly.
+
+    The given parser's current machine state is the initial machine state of the program; the parser itself isn't
+    used or changed. Lines are parsed by new parsers with the same dialect and options.
+
+    Example:
+        with ProgramIndex(LinuxCNC(machine_state), "program.ngc") as program:
+            parser = program.seek(1_200_000)  # Ready to parse line 1,200,000 onwards
+            lines = program.parse_range(1_200_000, 1_200_100)
+            visible_lines = program[5000:5100]
+    """
+
+    parser_class: type["Rs274"]
+    options: dict[str, Any]
+    initial_machine_state: "MachineState"
+    file: GCodeFile
+    checkpoint_interval: int
+    # Per checkpoint: the changes to the machine state since the previous checkpoint (see snapshots.delta())
+    _deltas: list[dict[str, Any]]
+
+    def __init__(
+        self,
+        parser: "Rs274",
+        path: str | os.PathLike,
+        encoding: str = "utf-8",
+        checkpoint_interval: int = CHECKPOINT_INTERVAL,
+        save: bool = True,
+    ):
+        """Open the GCode file at path, loading its saved index if there is a matching one and building it otherwise.
+
+        Unless save is False, a newly built index is saved next to the file.
+        """
+        if parser.start_rule != "line":
+            raise ValueError("Only parsers with the 'line' start rule can index GCode files.")
+
+        self.parser_class = type(parser)
+        self.options = parser._options()
+        self.initial_machine_state = parser.machine_state.clone(keep_pending=True)
+        self.checkpoint_interval = checkpoint_interval
+
+        path = Path(path)
+        line_index_path = path.with_name(path.name + LINE_INDEX_SUFFIX)
+        self.checkpoints_path = path.with_name(path.name + CHECKPOINTS_SUFFIX)
+
+        self.file = GCodeFile(path, encoding=encoding, index_path=line_index_path if save else None)
+        try:
+            deltas = self._load_checkpoints()
+            if deltas is not None:
+                self._deltas = deltas
+            else:
+                self._deltas = self._build_checkpoints()
+                if save:
+                    self._save_checkpoints()
+        except BaseException:
+            self.file.close()
+            raise
+
+    def _fingerprint(self) -> dict[str, Any]:
+        """Everything a saved index has to match to be used, as it's loaded from JSON."""
+        stat = os.stat(self.file.path)
+        fingerprint = {
+            "version": INDEX_FORMAT_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "encoding": self.file.encoding,
+            "parser": parser_fingerprint(self._parser(self.initial_machine_state)),
+            "checkpoint_interval": self.checkpoint_interval,
+        }
+        # Tuples are loaded as lists
+        return json.loads(json.dumps(fingerprint))
+
+    def _build_checkpoints(self) -> list[dict[str, Any]]:
+        # Only the machine state matters for checkpoints, so the lines are validated rather than parsed
+        parser = self._parser(self.initial_machine_state)
+        previous = snapshots.snapshot(self.initial_machine_state)
+        deltas: list[dict[str, Any]] = [{}]
+        for start in range(0, len(self.file), self.checkpoint_interval):
+            if start:
+                current = snapshots.snapshot(parser.machine_state)
+                deltas.append(snapshots.delta(previous, current))
+                previous = current
+
+            end = min(start + self.checkpoint_interval, len(self.file))
+            errors = validate(parser, (self.file[line_index] for line_index in range(start, end)))
+            if errors:
+                raise errors[0].error
+        return deltas
+
+    def _save_checkpoints(self):
+        with open(self.checkpoints_path, "w") as f:
+            json.dump({"fingerprint": self._fingerprint(), "deltas": self._deltas}, f)
+
+    def _load_checkpoints(self) -> list[dict[str, Any]] | None:
+        try:
+            with open(self.checkpoints_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(saved, dict) or saved.get("fingerprint") != self._fingerprint():
+            return None
+        return saved["deltas"]
+
+    def _parser(self, machine_state: "MachineState") -> "Rs274":
+        parser = self.parser_class(**self.options)
+        parser.machine_state = machine_state.clone(keep_pending=True)
+        return parser
+
+    def __len__(self) -> int:
+        return len(self.file)
+
+    def machine_state_at(self, line_index: int) -> "MachineState":
+        """The machine state before the line at line_index (or after the last line, for the number of lines)."""
+        if not 0 <= line_index <= len(self.file):
+            raise IndexError(f"Line {line_index} is out of range.")
+
+        checkpoint = min(line_index // self.checkpoint_interval, len(self._deltas) - 1)
+        snapshot = snapshots.snapshot(self.initial_machine_state)
+        for changes in self._deltas[1 : checkpoint + 1]:
+            snapshot = snapshots.apply_delta(snapshot, changes)
+
+        parser = self._parser(snapshots.restore(self.initial_machine_state, snapshot))
+        errors = validate(
+            parser, (self.file[index] for index in range(checkpoint * self.checkpoint_interval, line_index))
+        )
+        if errors:
+            raise errors[0].error
+        return parser.machine_state
+
+    def seek(self, line_index: int) -> "Rs274":
+        """A new parser with the machine state before the line at line_index, to parse the program from there on."""
+        return self._parser(self.machine_state_at(line_index))
+
+    def parse_range(self, start: int, end: int) -> list[Line]:
+        """Parse lines start:end, exactly like they're parsed when parsing the whole file."""
+        end = min(end, len(self.file))
+        if start >= end:
+            return []
+        parser = self.seek(start)
+        return [parser._parse_line(self.file[line_index]) for line_index in range(start, end)]
+
+    @overload
+    def __getitem__(self, line_index: int) -> Line: ...
+
+    @overload
+    def __getitem__(self, line_index: slice) -> list[Line]: ...
+
+    def __getitem__(self, line_index: int | slice) -> Line | list[Line]:
+        """Parse a line, or a slice of lines."""
+        if isinstance(line_index, slice):
+            indices = range(*line_index.indices(len(self.file)))
+            if not indices:
+                return []
+            first, last = min(indices[0], indices[-1]), max(indices[0], indices[-1])
+            lines = self.parse_range(first, last + 1)
+            return [lines[index - first] for index in indices]
+
+        if line_index < 0:
+            line_index += len(self.file)
+        if not 0 <= line_index < len(self.file):
+            raise IndexError(f"Line {line_index} is out of range.")
+        return self.parse_range(line_index, line_index + 1)[0]
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> "ProgramIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
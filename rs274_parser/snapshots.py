@@ -0,0 +1,93 @@
+"""Snapshots of machine states as plain data, to store them on disk or compare them cheaply.
+
+A snapshot holds a copy of every attribute of a machine state (the parameter values, the pending parameter values,
+the block-delete switch, and whatever else a dialect's machine state keeps), except for the flags that track whether
+dicts are shared with clones, which don't affect parsing. This works for the machine states of all dialects, as long
+as their attributes are numbers, strings, bools or dicts of those.
+
+Snapshots can be converted to JSON-compatible data and back without losing the difference between integer and float
+values or keys, and consecutive snapshots can be stored compactly as deltas.
+"""
+
+import math
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import MachineState
+
+Snapshot = dict[str, Any]
+
+
+def snapshot(machine_state: "MachineState") -> Snapshot:
+    return {
+        name: dict(value) if isinstance(value, dict) else value
+        for name, value in vars(machine_state).items()
+        if not name.startswith("_shares_")
+    }
+
+
+def restore(machine_state: "MachineState", snapshot: Snapshot) -> "MachineState":
+    """A clone of machine_state with the attributes from the snapshot."""
+    restored = machine_state.clone()
+    for name, value in snapshot.items():
+        setattr(restored, name, dict(value) if isinstance(value, dict) else value)
+    # All dicts were replaced with copies, so none of them are shared with machine_state anymore
+    for name in vars(restored):
+        if name.startswith("_shares_"):
+            setattr(restored, name, False)
+    return restored
+
+
+def to_json(snapshot: Snapshot) -> dict[str, Any]:
+    """Convert a snapshot to JSON-compatible data, storing dicts as sorted lists of (key, value) pairs.
+
+    JSON object keys are always strings, but the items of a list keep integer keys integers.
+    """
+    return {
+        name: {"items": sorted(value.items())} if isinstance(value, dict) else value
+        for name, value in sorted(snapshot.items())
+    }
+
+
+def from_json(data: dict[str, Any]) -> Snapshot:
+    return {name: dict(value["items"]) if isinstance(value, dict) else value for name, value in data.items()}
+
+
+def _is_same_value(a: Any, b: Any) -> bool:
+    if a is b:
+        return True
+    if type(a) is not type(b) or a != b:
+        return False
+    # 0.0 == -0.0
+    return type(a) is not float or math.copysign(1, a) == math.copysign(1, b)
+
+
+def delta(previous: Snapshot, current: Snapshot) -> dict[str, Any]:
+    """The changes from one snapshot to the next, as JSON-compatible data (see apply_delta())."""
+    changes: dict[str, Any] = {}
+    for name, value in current.items():
+        previous_value = previous.get(name)
+        if isinstance(value, dict) and isinstance(previous_value, dict):
+            changed = [(key, item) for key, item in value.items() if not _is_same_value(previous_value.get(key), item)]
+            removed = [key for key in previous_value if key not in value]
+            if changed or removed:
+                changes[name] = {"changed": sorted(changed), "removed": sorted(removed)}
+        elif not _is_same_value(previous_value, value):
+            changes[name] = {"items": sorted(value.items())} if isinstance(value, dict) else {"value": value}
+    return changes
+
+
+def apply_delta(snapshot: Snapshot, changes: dict[str, Any]) -> Snapshot:
+    """The snapshot after the changes returned by delta(), without modifying the given snapshot."""
+    updated = dict(snapshot)
+    for name, change in changes.items():
+        if "value" in change:
+            updated[name] = change["value"]
+        elif "items" in change:
+            updated[name] = dict(change["items"])
+        else:
+            value = updated[name] = dict(updated[name])
+            value.update(change["changed"])
+            for key in change["removed"]:
+                del value[key]
+    return updated
@@ -0,0 +1,71 @@
+"""Running lines through the grammar with something other than the parser as the action target.
+
+Validating, summarising and flattening don't need the parsed lines, so they run every line through the grammar (or
+the fast path) with a StandIn in place of the parser. Expressions are evaluated and parameters are read and set by the
+parser's own transform_* methods, so values and errors are the same as when parsing, but each stand-in replaces the
+transforms that build words and lines with its own.
+"""
+
+from typing import TYPE_CHECKING, Any, Callable, cast
+
+from rs274_parser.fast_path import is_literal_line, scan_line
+from rs274_parser.types import TNumber
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import Rs274
+
+
+class StandIn:
+    """Stands in for a parser while the grammar runs, see the module docstring.
+
+    Subclasses implement transform_word() and transform_line(), which should call check_word() and commit_line() to
+    raise the same errors and set the same parameter values as the parser does.
+    """
+
+    def __init__(self, parser: "Rs274", fast_path: bool | None = None):
+        self.parser = parser
+        # Literal-only lines are scanned by the fast path if enabled, or by default if the parser has it enabled
+        self.fast_path = parser.fast_path if fast_path is None else fast_path
+        self.semicolon_comments = parser.semicolon_comments
+
+    def parse_line(self, line: str) -> Any:
+        """Run a line (without its line ending) through the fast path or the grammar, returning transform_line()."""
+        if self.fast_path and is_literal_line(line):
+            result = scan_line(cast(Any, self), line, semicolon_comments=self.semicolon_comments)
+            if result is not None:
+                return result
+        return self.parser.backend.parse_line(self.parser, line, action_target=self)
+
+    def check_word(self, letter: str, number: Any):
+        """Raise the errors that creating the word would raise, e.g. for letters the dialect doesn't know."""
+        assert isinstance(number, TNumber)
+        self.parser.word_info(letter, number)
+
+    def commit_line(self, items: list) -> list | None:
+        """Commit the parameter values set on a line like the parser's transform_line() does.
+
+        Returns the line's items without the block delete character, or None if the line is deleted.
+        """
+        if items and items[0] == "/":
+            if self.parser.machine_state.is_block_delete_switch_enabled:
+                # Like parsing, a deleted block only commits parameter values in dialects that say so
+                if self.parser.commits_deleted_blocks:
+                    self.parser.commit_parameter_values()
+                return None
+            items = items[1:]
+        self.parser.commit_parameter_values()
+        return items
+
+    def transform_parameter_setting(self, items: list) -> None:
+        self.parser.machine_state.set_parameter_value(items[0], items[1])
+
+    transform_named_parameter_setting = transform_parameter_setting
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if not name.startswith("transform_"):
+            raise AttributeError(name)
+
+        # Everything else is evaluated by the parser, and looked up only once
+        method = getattr(self.parser, name)
+        setattr(self, name, method)
+        return method
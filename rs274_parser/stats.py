@@ -0,0 +1,147 @@
+"""Statistics about what a parser spends its time on.
+
+Stats are collected by wrapping the parser's methods in timing wrappers, which are set as attributes of the parser
+instance (see Rs274.enable_stats()). The grammar actions, the fast path and compiled programs all look the methods up
+on the parser instance, so they all call the wrappers while stats are enabled. Once stats are disabled again, the
+wrappers are removed, so a parser without stats runs exactly the same code as before.
+
+Times are inclusive: the time of transform_line includes committing the parameter values, for example, and the time
+of a binary operation includes the operations nested in it that are evaluated as part of the same action.
+"""
+
+import heapq
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import Rs274
+
+SLOWEST_LINE_COUNT = 10
+
+# Parser methods that are timed, besides all transform_* methods
+TIMED_METHODS = ["commit_parameter_values"]
+
+
+class ParserStats:
+    """Counts and cumulative times of parser actions, plus the number of lines and bytes parsed and the slowest lines.
+
+    Example:
+        stats = parser.enable_stats()
+        parser.parse(content)
+        print(stats.report())
+    """
+
+    lines: int
+    bytes: int
+    # Total time spent parsing lines, in nanoseconds
+    line_time_ns: int
+    # Calls and cumulative time in nanoseconds per method name
+    calls: dict[str, int]
+    times_ns: dict[str, int]
+    slowest_line_count: int
+    # A heap of the slowest lines, as (time in nanoseconds, line)
+    _slowest_lines: list[tuple[int, str]]
+
+    def __init__(self, slowest_line_count: int = SLOWEST_LINE_COUNT):
+        self.slowest_line_count = slowest_line_count
+        self.calls = {}
+        self.times_ns = {}
+        self.reset()
+
+    def reset(self):
+        self.lines = 0
+        self.bytes = 0
+        self.line_time_ns = 0
+        # The timing wrappers hold on to these dicts, so they're reset in place
+        for name in self.calls:
+            self.calls[name] = self.times_ns[name] = 0
+        self._slowest_lines = []
+
+    @property
+    def slowest_lines(self) -> list[tuple[int, str]]:
+        """The slowest lines parsed so far, slowest first, as (time in nanoseconds, line)."""
+        return sorted(self._slowest_lines, reverse=True)
+
+    def record_line(self, line: str, time_ns: int):
+        self.lines += 1
+        self.bytes += len(line.encode())
+        self.line_time_ns += time_ns
+        if len(self._slowest_lines) < self.slowest_line_count:
+            heapq.heappush(self._slowest_lines, (time_ns, line))
+        elif self._slowest_lines and time_ns > self._slowest_lines[0][0]:
+            heapq.heapreplace(self._slowest_lines, (time_ns, line))
+
+    def as_dict(self) -> dict[str, Any]:
+        """The stats as plain data, e.g. to send to a monitoring system."""
+        return {
+            "lines": self.lines,
+            "bytes": self.bytes,
+            "line_time_ns": self.line_time_ns,
+            "calls": dict(self.calls),
+            "times_ns": dict(self.times_ns),
+            "slowest_lines": [{"time_ns": time_ns, "line": line} for time_ns, line in self.slowest_lines],
+        }
+
+    def report(self) -> str:
+        """A human readable summary of the stats."""
+        seconds = self.line_time_ns / 1e9
+        lines_per_second = self.lines / seconds if seconds else 0.0
+        report = [f"{self.lines} lines, {self.bytes} bytes in {seconds:.3f}s ({lines_per_second:,.0f} lines/s)", ""]
+
+        report.append(f"{'method':<40} {'calls':>10} {'total ms':>10} {'per call us':>12}")
+        for name, time_ns in sorted(self.times_ns.items(), key=lambda item: item[1], reverse=True):
+            calls = self.calls[name]
+            if not calls:
+                continue
+            report.append(f"{name:<40} {calls:>10} {time_ns / 1e6:>10.1f} {time_ns / calls / 1e3:>12.2f}")
+
+        if self._slowest_lines:
+            report.extend(["", "Slowest lines:"])
+            report.extend(f"{time_ns / 1e3:>10.1f}us  {line}" for time_ns, line in self.slowest_lines)
+
+        return "\n".join(report)
+
+
+def _timed_method(stats: ParserStats, name: str, method: Callable) -> Callable:
+    calls = stats.calls
+    times_ns = stats.times_ns
+    calls.setdefault(name, 0)
+    times_ns.setdefault(name, 0)
+
+    def timed(*args, **kwargs):
+        start_ns = perf_counter_ns()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            times_ns[name] += perf_counter_ns() - start_ns
+            calls[name] += 1
+
+    return timed
+
+
+def _timed_parse_line(stats: ParserStats, parse_line: Callable[[str], Any]) -> Callable[[str], Any]:
+    def timed(line: str):
+        start_ns = perf_counter_ns()
+        try:
+            return parse_line(line)
+        finally:
+            stats.record_line(line, perf_counter_ns() - start_ns)
+
+    return timed
+
+
+def instrumented_methods(parser: "Rs274") -> list[str]:
+    return [name for name in dir(type(parser)) if name.startswith("transform_")] + TIMED_METHODS
+
+
+def instrument(parser: "Rs274", stats: ParserStats):
+    """Wrap the parser's methods, so that calling them records stats."""
+    for name in instrumented_methods(parser):
+        setattr(parser, name, _timed_method(stats, name, getattr(type(parser), name).__get__(parser)))
+    setattr(parser, "_parse_line", _timed_parse_line(stats, type(parser)._parse_line.__get__(parser)))
+
+
+def uninstrument(parser: "Rs274"):
+    """Remove the wrappers added by instrument()."""
+    for name in instrumented_methods(parser) + ["_parse_line"]:
+        parser.__dict__.pop(name, None)
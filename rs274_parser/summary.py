@@ -0,0 +1,199 @@
+"""Summarising GCode programs in a single pass, e.g. to check programs before scheduling them on a machine.
+
+Summarising runs every line through the grammar (or the fast path) with a Summarizer in place of the parser (see
+rs274_parser.stand_in): expressions are evaluated and parameters are read and set by the parser's own
+transform_* methods, but instead of building words and lines, the summarizer adds each line's words to running
+totals. Only those totals are kept, so summarising takes the same small amount of memory for any program length, and
+source files are read line by line.
+
+Axis extents follow the absolute/incremental distance mode (G90, G91), starting at 0, and are the extents of the end
+points of moves in program coordinates: arcs can bulge beyond them, and offsets, units and coordinate systems aren't
+applied. Lines whose axis words aren't a move (G10, G28, G30, G52, G92) are not moves. Every move in the G0 motion mode
+is a rapid move, and every move in any other motion mode (G1, G2, G3, canned cycles, probing etc) is a feed move.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable
+
+from rs274_parser.files import read_lines
+from rs274_parser.stand_in import StandIn
+from rs274_parser.types import TNumber
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import Rs274
+
+AXIS_LETTERS = frozenset("XYZABCUVW")
+# G words whose axis words are not a move
+NON_MOTION_G_WORDS = frozenset({10, 28, 30, 52, 92})
+MOTION_MODAL_GROUP = 1
+# Letters whose words are counted per word in ProgramSummary.code_counts, rather than only per letter
+CODE_LETTERS = frozenset("GM")
+
+
+@dataclass(kw_only=True)
+class ProgramSummary:
+    """Statistics about a GCode program, see summarize()."""
+
+    lines: int = 0
+    # Lines skipped because of the block delete switch
+    deleted_lines: int = 0
+    comments: int = 0
+    # Number of words per letter, e.g. {"G": 120, "X": 1000}
+    letter_counts: dict[str, int] = field(default_factory=dict)
+    # Number of G and M words per word, e.g. {"G1": 80, "M3": 1}. "G1" and "G1.0" are counted separately.
+    code_counts: dict[str, int] = field(default_factory=dict)
+    # (min, max) of every axis that was moved, in program units
+    axis_ranges: dict[str, tuple[float, float]] = field(default_factory=dict)
+    # (min, max) of F and S words, or None if there aren't any
+    feed_range: tuple[TNumber, TNumber] | None = None
+    spindle_speed_range: tuple[TNumber, TNumber] | None = None
+    # Sorted numbers of all T words
+    tools: list[TNumber] = field(default_factory=list)
+    rapid_moves: int = 0
+    feed_moves: int = 0
+
+
+class Summarizer(StandIn):
+    """Stands in for a parser while the grammar runs, adding up the words of each line instead of building it."""
+
+    def __init__(self, parser: "Rs274", fast_path: bool | None = None):
+        super().__init__(parser, fast_path)
+        self.summary = ProgramSummary()
+        self.letter_counts: dict[str, int] = {}
+        self.code_counts: dict[str, int] = {}
+        # Per axis that was moved: [min, max]
+        self.axis_ranges: dict[str, list[float]] = {}
+        # [min, max], or empty if there are no values yet
+        self.feeds: list[TNumber] = []
+        self.spindle_speeds: list[TNumber] = []
+        self.tools: set[TNumber] = set()
+        self.position: dict[str, float] = {}
+        self.is_absolute = True
+        # True for G0, False for any other motion mode, None if there's no motion mode (yet, or after G80)
+        self.is_rapid: bool | None = None
+
+    def transform_word(self, items: list) -> list:
+        self.check_word(items[0], items[1])
+        # The [letter, number] list itself stands in for the word
+        return items
+
+    def transform_line(self, s: str, items: list) -> bool:
+        summary = self.summary
+        summary.lines += 1
+        committed_items = self.commit_line(items)
+        if committed_items is None:
+            summary.deleted_lines += 1
+            return True
+        items = committed_items
+
+        letter_counts = self.letter_counts
+        axis_values: dict[str, float] | None = None
+        is_motion = True
+        for item in items:
+            if type(item) is not list:
+                # Comments are strings, the line number is an int and parameter settings are None
+                if type(item) is str:
+                    summary.comments += 1
+                continue
+
+            letter: str = item[0].upper()
+            number: TNumber = item[1]
+            letter_counts[letter] = letter_counts.get(letter, 0) + 1
+            if letter in AXIS_LETTERS:
+                if axis_values is None:
+                    axis_values = {}
+                axis_values[letter] = number
+            elif letter in CODE_LETTERS:
+                code = f"{letter}{number}"
+                self.code_counts[code] = self.code_counts.get(code, 0) + 1
+                if letter == "G":
+                    is_motion = self._update_g_modes(letter, number) and is_motion
+            elif letter == "F":
+                self._update_range(self.feeds, number)
+            elif letter == "S":
+                self._update_range(self.spindle_speeds, number)
+            elif letter == "T":
+                self.tools.add(number)
+
+        if axis_values is not None and is_motion and self.is_rapid is not None:
+            self._move(axis_values)
+        return True
+
+    def _update_g_modes(self, letter: str, number: TNumber) -> bool:
+        """Update the motion and distance modes, returning False for G words whose axis words aren't a move."""
+        # Only integer numbers are the numbers of G words: G1.0 is not a G1 word, see WordTable
+        is_integer = type(number) is int
+        if is_integer and (number == 90 or number == 91):
+            self.is_absolute = number == 90
+        elif is_integer and number in NON_MOTION_G_WORDS:
+            return False
+        elif self.parser.word_info(letter, number).modal_group == MOTION_MODAL_GROUP:
+            # G80 cancels the motion mode
+            self.is_rapid = None if is_integer and number == 80 else is_integer and number == 0
+        return True
+
+    def _move(self, axis_values: dict[str, float]):
+        if self.is_rapid:
+            self.summary.rapid_moves += 1
+        else:
+            self.summary.feed_moves += 1
+
+        position = self.position
+        for axis, value in axis_values.items():
+            if not self.is_absolute:
+                value += position.get(axis, 0.0)
+            position[axis] = value
+            axis_range = self.axis_ranges.get(axis)
+            if axis_range is None:
+                axis_range = self.axis_ranges[axis] = []
+            self._update_range(axis_range, value)
+
+    @staticmethod
+    def _update_range(value_range: list, value: TNumber):
+        if not value_range:
+            value_range.extend((value, value))
+        elif value < value_range[0]:
+            value_range[0] = value
+        elif value > value_range[1]:
+            value_range[1] = value
+
+    def finish(self) -> ProgramSummary:
+        summary = self.summary
+        summary.letter_counts = dict(sorted(self.letter_counts.items()))
+        summary.code_counts = dict(sorted(self.code_counts.items()))
+        summary.axis_ranges = {
+            axis: (minimum, maximum) for axis, (minimum, maximum) in sorted(self.axis_ranges.items())
+        }
+        summary.feed_range = (self.feeds[0], self.feeds[1]) if self.feeds else None
+        summary.spindle_speed_range = (self.spindle_speeds[0], self.spindle_speeds[1]) if self.spindle_speeds else None
+        summary.tools = sorted(self.tools)
+        return summary
+
+
+def summarize(
+    parser: "Rs274",
+    source: str | os.PathLike | Iterable[str],
+    encoding: str = "utf-8",
+    fast_path: bool | None = None,
+) -> ProgramSummary:
+    """Summarise a GCode program, updating the parser's machine state like parsing it would.
+
+    source can be anything Rs274.iter_parse() accepts. Errors are raised like they are when parsing. Literal-only lines
+    are summarised with the fast path if fast_path is True, or by default if the parser has the fast path enabled.
+    """
+    if parser.start_rule != "line":
+        raise ValueError("Only parsers with the 'line' start rule can summarise GCode.")
+
+    if isinstance(source, str):
+        return _summarize_lines(parser, source.splitlines(), fast_path)
+    if isinstance(source, os.PathLike):
+        return _summarize_lines(parser, read_lines(source, encoding), fast_path)
+    return _summarize_lines(parser, source, fast_path)
+
+
+def _summarize_lines(parser: "Rs274", lines: Iterable[str], fast_path: bool | None) -> ProgramSummary:
+    summarizer = Summarizer(parser, fast_path)
+    for line in lines:
+        summarizer.parse_line(line.rstrip("\r\n"))
+    return summarizer.finish()
@@ -0,0 +1,345 @@
+"""Toolpaths of parsed GCode as NumPy arrays of line segments, e.g. for visualisation.
+
+Extracting a toolpath is done in two steps. First, a single pass over the parsed lines follows the modal state that
+affects moves - the motion mode (G0, G1, G2, G3), the plane (G17, G18, G19), the distance mode (G90, G91) and the arc
+distance mode (G90.1, G91.1) - and the current position, and records every move in flat arrays. Words are applied in
+the order of execution of their line (see Word.ordering), so e.g. "G91 G1 X1" is an incremental move. Then all moves
+are turned into segments at once with vectorised NumPy operations, tessellating arcs (in both the I/J/K and the R
+form, including helical arcs) into chords that deviate from the true arc by at most the given tolerance.
+
+Only the X, Y and Z axes are followed, in program units and coordinates (units, coordinate systems, offsets and tool
+compensation aren't applied). Lines whose axis words aren't a move (G10, G28, G30, G52, G92) don't move the
+position, and neither do motion modes other than G0 to G3 (like canned cycles or probing). Extracting toolpaths needs
+the numpy extra to be installed.
+"""
+
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+import numpy as np
+
+from rs274_parser.summary import MOTION_MODAL_GROUP, NON_MOTION_G_WORDS
+from rs274_parser.types import Line, TNumber, WordInfo
+
+# Chord tolerance for arcs, in program units
+DEFAULT_TOLERANCE = 0.001
+# The most chords an arc is split into, however small the tolerance is compared to its radius
+MAX_ARC_SEGMENTS = 100_000
+
+RAPID = 0
+LINEAR = 1
+CLOCKWISE_ARC = 2
+COUNTERCLOCKWISE_ARC = 3
+
+# G17, G18 and G19: the two axes of each plane (in the order that makes G2 clockwise), and the axis normal to it
+XY_PLANE = 0
+ZX_PLANE = 1
+YZ_PLANE = 2
+PLANE_AXES = np.array([[0, 1, 2], [2, 0, 1], [1, 2, 0]])
+
+AXES = {"X": 0, "Y": 1, "Z": 2}
+ARC_OFFSETS = {"I": 0, "J": 1, "K": 2}
+
+
+@dataclass(kw_only=True)
+class Moves:
+    """The moves of a program, before arcs are tessellated, as flat arrays with one entry per move."""
+
+    # The index of the line of each move
+    line_indices: np.ndarray
+    # RAPID, LINEAR, CLOCKWISE_ARC or COUNTERCLOCKWISE_ARC
+    motions: np.ndarray
+    # Shape (moves, 3): the X, Y and Z coordinates at the start and end of each move
+    starts: np.ndarray
+    ends: np.ndarray
+    # Arcs only: XY_PLANE, ZX_PLANE or YZ_PLANE
+    planes: np.ndarray
+    # Arcs only, shape (moves, 3): the I, J and K words (0 if not given), absolute if arc_absolute, else incremental
+    arc_offsets: np.ndarray
+    arc_absolute: np.ndarray
+    # Arcs only: the R word, or NaN for arcs with I/J/K words
+    radii: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.motions)
+
+
+@dataclass(kw_only=True)
+class Toolpath:
+    """A toolpath as line segments, with arcs tessellated into chords.
+
+    Example:
+        toolpath = extract_toolpath(parser.parse(gcode), parser.word_info)
+        feed_segments = toolpath.starts[toolpath.motions != RAPID], toolpath.ends[toolpath.motions != RAPID]
+    """
+
+    # The index of the line that each segment belongs to
+    line_indices: np.ndarray
+    # The motion mode of each segment: RAPID, LINEAR, CLOCKWISE_ARC or COUNTERCLOCKWISE_ARC
+    motions: np.ndarray
+    # Shape (segments, 3): the X, Y and Z coordinates at the start and end of each segment
+    starts: np.ndarray
+    ends: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.motions)
+
+
+def extract_moves(
+    lines: Iterable[Line],
+    word_info: Callable[[str, TNumber], WordInfo],
+    initial_position: tuple[float, float, float] = (0.0, 0.0, 0.0),
+) -> Moves:
+    """Follow the modal state and position through the lines, recording every G0, G1, G2 and G3 move.
+
+    word_info looks up the modal group of a word in the parser's dialect.
+    """
+    line_indices = array("q")
+    motions = array("B")
+    starts = array("d")
+    ends = array("d")
+    planes = array("B")
+    arc_offsets = array("d")
+    arc_absolute = array("B")
+    radii = array("d")
+
+    position = list(initial_position)
+    motion: int | None = None
+    plane = XY_PLANE
+    is_absolute = True
+    is_arc_absolute = False
+
+    for line_index, line in enumerate(lines):
+        axis_values: dict[int, float] | None = None
+        offsets = [0.0, 0.0, 0.0]
+        radius = math.nan
+        is_motion = True
+
+        for word in line.words:
+            letter = word.letter
+            number = word.number
+            if letter in AXES:
+                if axis_values is None:
+                    axis_values = {}
+                axis_values[AXES[letter]] = number
+            elif letter == "G":
+                # Only integer numbers are the numbers of G words: G1.0 is not a G1 word, see WordTable
+                is_integer = type(number) is int
+                if is_integer and 0 <= number <= 3:
+                    motion = int(number)
+                elif is_integer and 17 <= number <= 19:
+                    plane = int(number) - 17
+                elif is_integer and (number == 90 or number == 91):
+                    is_absolute = number == 90
+                elif number == 90.1 or number == 91.1:
+                    is_arc_absolute = number == 90.1
+                elif is_integer and number in NON_MOTION_G_WORDS:
+                    is_motion = False
+                elif word_info(letter, number).modal_group == MOTION_MODAL_GROUP:
+                    # Other motion modes (canned cycles, probing, splines, threading, G80) aren't followed
+                    motion = None
+            elif letter in ARC_OFFSETS:
+                offsets[ARC_OFFSETS[letter]] = number
+            elif letter == "R":
+                radius = number
+
+        if axis_values is None or motion is None or not is_motion:
+            continue
+
+        end = list(position)
+        for axis, value in axis_values.items():
+            end[axis] = value if is_absolute else position[axis] + value
+
+        line_indices.append(line_index)
+        motions.append(motion)
+        starts.extend(position)
+        ends.extend(end)
+        planes.append(plane)
+        arc_offsets.extend(offsets)
+        arc_absolute.append(is_arc_absolute)
+        radii.append(radius)
+        position = end
+
+    return Moves(
+        line_indices=np.frombuffer(line_indices, dtype=np.int64),
+        motions=np.frombuffer(motions, dtype=np.uint8),
+        starts=np.frombuffer(starts, dtype=np.float64).reshape(-1, 3),
+        ends=np.frombuffer(ends, dtype=np.float64).reshape(-1, 3),
+        planes=np.frombuffer(planes, dtype=np.uint8),
+        arc_offsets=np.frombuffer(arc_offsets, dtype=np.float64).reshape(-1, 3),
+        arc_absolute=np.frombuffer(arc_absolute, dtype=np.uint8).astype(bool),
+        radii=np.frombuffer(radii, dtype=np.float64),
+    )
+
+
+@dataclass(slots=True)
+class _ArcGeometry:
+    """The geometry of arcs, in the coordinates of each arc's plane (u, v and the normal axis, see PLANE_AXES)."""
+
+    planes: np.ndarray
+    center_u: np.ndarray
+    center_v: np.ndarray
+    start_angles: np.ndarray
+    # Positive for counterclockwise arcs, negative for clockwise arcs
+    sweeps: np.ndarray
+    # The distance to the center changes linearly over the arc if the start and end aren't exactly the same distance
+    # from the center
+    start_radii: np.ndarray
+    end_radii: np.ndarray
+    # The position along the normal axis, which changes linearly over helical arcs
+    start_normals: np.ndarray
+    end_normals: np.ndarray
+
+
+def _arc_geometry(moves: Moves, arcs: np.ndarray) -> _ArcGeometry:
+    # Everything is computed on one-dimensional columns, which is a lot faster than on (arcs, 2) arrays
+    planes = moves.planes[arcs]
+    if (planes == XY_PLANE).all():
+        # Usually all arcs are in the XY plane, whose coordinates don't need to be reordered
+        u_axes, v_axes, normal_axes = PLANE_AXES[XY_PLANE]
+    else:
+        u_axes, v_axes, normal_axes = PLANE_AXES[planes].T
+    start_u = moves.starts[arcs, u_axes]
+    start_v = moves.starts[arcs, v_axes]
+    end_u = moves.ends[arcs, u_axes]
+    end_v = moves.ends[arcs, v_axes]
+    radii = moves.radii[arcs]
+    is_clockwise = moves.motions[arcs] == CLOCKWISE_ARC
+
+    is_absolute = moves.arc_absolute[arcs]
+    center_u = moves.arc_offsets[arcs, u_axes] + np.where(is_absolute, 0.0, start_u)
+    center_v = moves.arc_offsets[arcs, v_axes] + np.where(is_absolute, 0.0, start_v)
+
+    # R form: the center is on the perpendicular bisector of the chord, on the side that gives an arc of at most 180
+    # degrees for a positive R, and of more than 180 degrees for a negative R
+    is_radius_form = ~np.isnan(radii)
+    if is_radius_form.any():
+        chord_u = end_u - start_u
+        chord_v = end_v - start_v
+        chord_lengths = np.hypot(chord_u, chord_v)
+        # The distance from the middle of the chord to the center, to the left of the chord
+        distances = np.sqrt(np.maximum(radii**2 - (chord_lengths / 2) ** 2, 0.0))
+        distances *= np.where(is_clockwise, -1.0, 1.0) * np.sign(radii)
+        scales = distances / np.where(chord_lengths > 0, chord_lengths, 1.0)
+        center_u = np.where(is_radius_form, (start_u + end_u) / 2 - chord_v * scales, center_u)
+        center_v = np.where(is_radius_form, (start_v + end_v) / 2 + chord_u * scales, center_v)
+
+    start_u -= center_u
+    start_v -= center_v
+    end_u -= center_u
+    end_v -= center_v
+    start_angles = np.arctan2(start_v, start_u)
+
+    # Both angles are in [-pi, pi], so the counterclockwise sweep in [0, 2 pi) is at most one turn away
+    sweeps = np.arctan2(end_v, end_u) - start_angles
+    sweeps[sweeps < 0] += 2 * np.pi
+    sweeps[is_clockwise & (sweeps > 0)] -= 2 * np.pi
+    # An I/J/K arc that ends where it starts is a full circle
+    is_full_circle = ~is_radius_form & (np.abs(sweeps) < 1e-12)
+    sweeps[is_full_circle] = np.where(is_clockwise[is_full_circle], -2 * np.pi, 2 * np.pi)
+
+    return _ArcGeometry(
+        planes=planes,
+        center_u=center_u,
+        center_v=center_v,
+        start_angles=start_angles,
+        sweeps=sweeps,
+        start_radii=np.hypot(start_u, start_v),
+        end_radii=np.hypot(end_u, end_v),
+        start_normals=moves.starts[arcs, normal_axes],
+        end_normals=moves.ends[arcs, normal_axes],
+    )
+
+
+def tessellate(moves: Moves, tolerance: float = DEFAULT_TOLERANCE) -> Toolpath:
+    """Turn moves into line segments, splitting arcs into chords that are at most tolerance away from the arc.
+
+    Arcs are split into at most MAX_ARC_SEGMENTS chords, which can be further than tolerance away from arcs with a
+    radius that's many orders of magnitude larger than tolerance.
+    """
+    if tolerance <= 0:
+        raise ValueError("The tolerance has to be positive.")
+
+    move_count = len(moves)
+    arcs = np.flatnonzero(moves.motions >= CLOCKWISE_ARC)
+    geometry = _arc_geometry(moves, arcs)
+
+    # The largest angle a chord can span for the distance between the chord and the arc to stay within tolerance:
+    # 2 * arccos(1 - tolerance / radius), written so that it doesn't round to 0 when tolerance is tiny compared to the
+    # radius. It's still clamped, as tolerance / radius can underflow.
+    max_radii = np.maximum(geometry.start_radii, geometry.end_radii)
+    half_depths = np.minimum(tolerance / (2 * np.where(max_radii > 0, max_radii, 1.0)), 1.0)
+    max_angles = np.maximum(4 * np.arcsin(np.sqrt(half_depths)), np.finfo(np.float64).tiny)
+    arc_segment_counts = np.clip(np.ceil(np.abs(geometry.sweeps) / max_angles), 1, MAX_ARC_SEGMENTS).astype(np.int64)
+    segment_counts = np.ones(move_count, dtype=np.int64)
+    segment_counts[arcs] = arc_segment_counts
+
+    # Every move has one vertex more than it has segments, and consecutive segments of a move share their vertices.
+    # Vertex i of a move is at first_vertices + i, so segment s (counting over all moves) of move m starts at vertex
+    # s + m.
+    vertex_counts = segment_counts + 1
+    first_vertices = np.cumsum(vertex_counts) - vertex_counts
+    vertices = np.empty((int(vertex_counts.sum()), 3))
+    # The first and last vertices of every move are exact
+    vertices[first_vertices] = moves.starts
+    vertices[first_vertices + segment_counts] = moves.ends
+    if len(arcs):
+        _arc_vertices(vertices, first_vertices[arcs], arc_segment_counts, geometry)
+
+    segment_moves = np.repeat(np.arange(move_count), segment_counts)
+    segment_starts = np.arange(len(segment_moves)) + segment_moves
+    return Toolpath(
+        line_indices=np.repeat(moves.line_indices, segment_counts),
+        motions=np.repeat(moves.motions, segment_counts),
+        starts=vertices[segment_starts],
+        ends=vertices[segment_starts + 1],
+    )
+
+
+def _arc_vertices(vertices: np.ndarray, first_vertices: np.ndarray, segment_counts: np.ndarray, geometry: _ArcGeometry):
+    """Fill in the vertices between the first and last vertex of every arc.
+
+    The radius and the position along the normal axis (for helical arcs) are interpolated linearly.
+    """
+    # Per-arc values are spread over the arc's vertices with np.repeat, which is a lot faster than indexing
+    counts = segment_counts - 1
+    if not counts.any():
+        return
+    first_interior = np.cumsum(counts) - counts
+    vertex_numbers = np.arange(int(counts.sum())) - np.repeat(first_interior - 1, counts)
+    fractions = vertex_numbers / np.repeat(segment_counts, counts)
+    rows = np.repeat(first_vertices, counts) + vertex_numbers
+
+    def interpolate(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        return np.repeat(start, counts) + np.repeat(end - start, counts) * fractions
+
+    angles = interpolate(geometry.start_angles, geometry.start_angles + geometry.sweeps)
+    radii = interpolate(geometry.start_radii, geometry.end_radii)
+    coordinates = (
+        np.repeat(geometry.center_u, counts) + radii * np.cos(angles),
+        np.repeat(geometry.center_v, counts) + radii * np.sin(angles),
+        interpolate(geometry.start_normals, geometry.end_normals),
+    )
+
+    vertex_planes = np.repeat(geometry.planes, counts)
+    for plane, axes in enumerate(PLANE_AXES):
+        selected = vertex_planes == plane
+        if selected.all():
+            # Usually all arcs are in the same plane
+            selected = slice(None)
+        elif not selected.any():
+            continue
+        for axis, values in zip(axes, coordinates):
+            vertices[rows[selected], axis] = values[selected]
+
+
+def extract_toolpath(
+    lines: Iterable[Line],
+    word_info: Callable[[str, TNumber], WordInfo],
+    tolerance: float = DEFAULT_TOLERANCE,
+    initial_position: tuple[float, float, float] = (0.0, 0.0, 0.0),
+) -> Toolpath:
+    """The toolpath of parsed lines, see extract_moves() and tessellate()."""
+    return tessellate(extract_moves(lines, word_info, initial_position), tolerance)
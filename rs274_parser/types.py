@@ -1,8 +1,8 @@
 """Types used in the GCode grammars"""
 
-from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Literal
+from types import MappingProxyType
+from typing import Literal, Mapping
 
 NamedParameter = str
 ParameterIndex = int
@@ -75,12 +75,31 @@ class Word:
 
     __repr__ = __str__
 
+    def __reduce__(self):
+        # Pickling frozen dataclasses with slots is slow by default, which matters when parsing in multiple processes
+        return (_unpickle_word, (self.letter, self.number, self.ordering))
+
     def matches(self, letter: str, numbers: set[TNumber]):
         if self.letter == letter and self.number in numbers:
             return True
         return False
 
 
+def _unpickle_word(letter: str, number: TNumber, ordering: int) -> Word:
+    return Word(letter, number, ordering=ordering)
+
+
+# Shared by all compact lines without assignments
+EMPTY_MAPPING: Mapping = MappingProxyType({})
+
+
+def _index_words(words: list[Word] | tuple[Word, ...]) -> dict[str, dict[TNumber, Word]]:
+    word_dict: dict[str, dict[TNumber, Word]] = {}
+    for word in words:
+        word_dict.setdefault(word.letter, {})[word.number] = word
+    return word_dict
+
+
 @dataclass(slots=True)
 class Line:
     words: list[Word]
@@ -88,12 +107,11 @@ class Line:
     numeric_assignments: dict[int, TNumber] = field(default_factory=dict, repr=False)
     named_assignments: dict[str, TNumber] = field(default_factory=dict, repr=False)
     line_number: int | None = None
-    _word_dict: dict[str, dict[TNumber, Word]] = field(init=False, repr=False)
+    # Index of the words by letter and number, built on the first call to first()
+    _word_dict: dict[str, dict[TNumber, Word]] | None = field(default=None, init=False, repr=False, compare=False)
 
-    def __post_init__(self):
-        self._word_dict = defaultdict(dict)
-        for word in self.words:
-            self._word_dict[word.letter][word.number] = word
+    def __reduce__(self):
+        return (Line, (self.words, self.comments, self.numeric_assignments, self.named_assignments, self.line_number))
 
     def __str__(self):
         s = ""
@@ -106,14 +124,64 @@ class Line:
         return s
 
     def first(self, letter: str, numbers: set[TNumber] | None = None) -> Word | None:
+        if self._word_dict is None:
+            self._word_dict = _index_words(self.words)
+        words_by_number = self._word_dict.get(letter)
+        if words_by_number is None:
+            return None
+
         if numbers is None:
-            try:
-                return next(iter(self._word_dict[letter].values()))
-            except StopIteration:
-                return None
+            return next(iter(words_by_number.values()))
 
         for number in numbers:
-            if number in self._word_dict[letter]:
-                return self._word_dict[letter][number]
+            if number in words_by_number:
+                return words_by_number[number]
 
         return None
+
+
+@dataclass(slots=True)
+class CompactLine:
+    """A more compact alternative to Line, with the same interface for reading a parsed line.
+
+    Words and comments are stored in tuples, and lines without parameter assignments all share the same empty,
+    read-only mapping instead of each holding two empty dicts. Create compact lines with compact_line().
+    """
+
+    words: tuple[Word, ...]
+    comments: tuple[str, ...] = ()
+    numeric_assignments: Mapping[int, TNumber] = field(default_factory=lambda: EMPTY_MAPPING, repr=False)
+    named_assignments: Mapping[str, TNumber] = field(default_factory=lambda: EMPTY_MAPPING, repr=False)
+    line_number: int | None = None
+    _word_dict: dict[str, dict[TNumber, Word]] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __reduce__(self):
+        return (
+            compact_line,
+            (
+                self.words,
+                self.comments,
+                dict(self.numeric_assignments),
+                dict(self.named_assignments),
+                self.line_number,
+            ),
+        )
+
+    __str__ = Line.__str__
+    first = Line.first
+
+
+def compact_line(
+    words: tuple[Word, ...],
+    comments: tuple[str, ...] = (),
+    numeric_assignments: Mapping[int, TNumber] | None = None,
+    named_assignments: Mapping[str, TNumber] | None = None,
+    line_number: int | None = None,
+) -> CompactLine:
+    return CompactLine(
+        words,
+        comments,
+        numeric_assignments or EMPTY_MAPPING,
+        named_assignments or EMPTY_MAPPING,
+        line_number,
+    )
@@ -0,0 +1,59 @@
+"""Checking whether GCode parses, without building the parsed lines.
+
+Validating runs every line through the grammar (or the fast path) with a Validator in place of the parser (see
+rs274_parser.stand_in). Expressions are evaluated and parameters are read and set by the parser's own transform_*
+methods, so every error that parsing would raise is raised while validating too - but words, parameter assignments and
+lines are never created.
+
+Unlike parsing, validating doesn't stop at the first error: each line that fails is recorded, any parameter values it
+set before failing are discarded, and validation carries on with the next line.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable
+
+from rs274_parser.stand_in import StandIn
+
+if TYPE_CHECKING:
+    from rs274_parser.dialects.rs274ngc import Rs274
+
+
+@dataclass(slots=True)
+class ValidationError:
+    """An error in a line of GCode, e.g. a pe.ParseError or an exceptions.UndefinedParameter."""
+
+    # The (0-based) index of the line
+    line_index: int
+    line: str
+    error: Exception
+
+    def __str__(self):
+        # pe's parse errors usually don't have a message
+        message = str(self.error).strip()
+        return f"Line {self.line_index + 1}: {type(self.error).__name__}" + (f": {message}" if message else "")
+
+
+class Validator(StandIn):
+    """Stands in for a parser while the grammar runs, skipping everything that only builds the parsed line."""
+
+    def transform_word(self, items: list) -> None:
+        self.check_word(items[0], items[1])
+
+    def transform_line(self, s: str, items: list) -> bool:
+        self.commit_line(items)
+        return True
+
+
+def validate(parser: "Rs274", lines: Iterable[str]) -> list[ValidationError]:
+    validator = Validator(parser)
+    machine_state = parser.machine_state
+
+    errors = []
+    for line_index, line in enumerate(lines):
+        line = line.rstrip("\r\n")
+        try:
+            validator.parse_line(line)
+        except Exception as e:
+            errors.append(ValidationError(line_index, line, e))
+            machine_state.rollback_parameter_values()
+    return errors
@@ -1,3 +1,5 @@
+import io
+
 import pytest
 from pe._errors import ParseError
 
@@ -102,3 +104,63 @@ def test_program():
 
     assert parser.machine_state.parameter_values == {123: 2}
     assert parser.machine_state.named_parameter_values == {"first": 1, "defined": 10}
+
+
+def test_word__linuxcnc_words():
+    # Words that only exist in LinuxCNC are looked up in the LinuxCNC word table
+    assert word("G", 5.1).ordering == 210
+    assert LinuxCNC().parse("X1 G5.1") == [Line([word("G", 5.1), word("X", 1)])]
+
+
+def test_machine_state__clone():
+    machine_state = MachineState(initial_named_parameter_values={"a": 1})
+    clone = machine_state.clone()
+
+    clone.set_parameter_value("a", 2)
+    clone.set_parameter_value(1, 2)
+    clone.commit_parameter_values()
+
+    assert clone.named_parameter_values == {"a": 2}
+    assert clone.parameter_values == {1: 2}
+    assert machine_state.named_parameter_values == {"a": 1}
+    assert machine_state.parameter_values == {}
+
+
+def test_machine_state__equality():
+    machine_state = MachineState(initial_named_parameter_values={"a": 1})
+    assert machine_state == MachineState(initial_named_parameter_values={"a": 1})
+    assert machine_state != MachineState(initial_named_parameter_values={"a": 2})
+
+    machine_state.set_parameter_value("b", 2)
+    assert machine_state != machine_state.clone()
+    assert machine_state == machine_state.clone(keep_pending=True)
+
+    machine_state.rollback_parameter_values()
+    assert machine_state == machine_state.clone()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"fast_path": True}, {"backend": "descent"}, {"line_cache_size": 16, "compact_lines": True}],
+)
+def test_block_delete__commits_parameter_values(options: dict):
+    # Unlike in RS274/NGC, parameters set on a deleted block take effect on the next line
+    program = "/ #1=5 #<a>=2\nG0 X#1 Y#<a>\n/ G0\nG0 X#1"
+    machine_state = MachineState(initial_parameter_values={1: 0}, is_block_delete_switch_enabled=True)
+
+    parser = LinuxCNC(machine_state, **options)
+    lines = parser.parse(program)
+    assert [str(line) for line in lines[1::2]] == ["G0 X5 Y2", "G0 X5"]
+    assert parser.machine_state.parameter_values == {1: 5}
+    assert parser.machine_state.named_parameter_values == {"a": 2}
+
+    # Stand-ins commit the same way
+    validating_parser = LinuxCNC(machine_state, **options)
+    assert validating_parser.validate(program) == []
+    summarizing_parser = LinuxCNC(machine_state, **options)
+    summarizing_parser.summarize(program)
+    flattening_parser = LinuxCNC(machine_state, **options)
+    flattening_parser.flatten(program, sink := io.StringIO())
+    assert sink.getvalue().splitlines()[1] == "G0 X5 Y2"
+    for other_parser in (validating_parser, summarizing_parser, flattening_parser):
+        assert other_parser.machine_state == parser.machine_state
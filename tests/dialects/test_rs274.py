@@ -5,7 +5,7 @@ from pe._errors import ParseError
 
 from rs274_parser import exceptions
 from rs274_parser.dialects.rs274ngc import MachineState, Rs274, word
-from rs274_parser.types import Line, TNumber, Word
+from rs274_parser.types import CompactLine, Line, TNumber, Word
 
 
 @pytest.mark.parametrize(
@@ -135,6 +135,16 @@ def test_word(input: str, expected_output: Word):
     )._parse_rule(input) == pytest.approx(expected_output)
 
 
+def test_word__interned():
+    assert word("G", 1) is word("g", 1)
+    assert word("G", 1).ordering == 210
+    # G1.0 isn't a G1 word, it's just a G word
+    assert word("G", 1.0) is not word("G", 1)
+    assert word("G", 1.0).ordering == 999
+    assert str(word("X", 0.0)) == "X0.0"
+    assert str(word("X", -0.0)) == "X-0.0"
+
+
 @pytest.mark.parametrize(
     "input,expected_output,expected_parameters",
     [
@@ -208,3 +218,97 @@ def test_block_delete():
     assert Rs274(MachineState(is_block_delete_switch_enabled=True), start_rule="line")._parse_rule(line) == Line(
         [], comments=["/ M2"]
     )
+
+
+def test_compact_lines():
+    gcode = "N10 X1 G1 (comment) #1 = 2\n/ G0\nG0 X#1"
+    lines = Rs274().parse(gcode)
+    compact_lines = Rs274(compact_lines=True).parse(gcode)
+
+    assert [type(line) for line in compact_lines] == [CompactLine] * 3
+    for line, compact in zip(lines, compact_lines):
+        assert compact.words == tuple(line.words)
+        assert compact.comments == tuple(line.comments)
+        assert compact.numeric_assignments == line.numeric_assignments
+        assert compact.line_number == line.line_number
+        assert str(compact) == str(line)
+    assert compact_lines[1].numeric_assignments is compact_lines[2].numeric_assignments
+
+
+def test_iter_parse(tmp_path):
+    gcode = "#1 = 1\nG0 X#1\r\nG1 X#1 (done)\n"
+    expected = Rs274(MachineState(initial_parameter_values={1: 0})).parse(gcode)
+
+    path = tmp_path / "program.ngc"
+    path.write_text(gcode)
+
+    for source in [gcode, path, gcode.splitlines(keepends=True)]:
+        parser = Rs274(MachineState(initial_parameter_values={1: 0}))
+        assert list(parser.iter_parse(source)) == expected
+        assert parser.machine_state.parameter_values == {1: 1}
+
+    with open(path) as f:
+        assert list(Rs274(MachineState(initial_parameter_values={1: 0})).iter_parse(f)) == expected
+
+
+def test_iter_parse__is_lazy():
+    parser = Rs274(MachineState(initial_parameter_values={1: 0}))
+    lines = parser.iter_parse(["#1 = 1", "#1 = 2"])
+
+    assert parser.machine_state.parameter_values == {1: 0}
+    next(lines)
+    assert parser.machine_state.parameter_values == {1: 1}
+    next(lines)
+    assert parser.machine_state.parameter_values == {1: 2}
+
+
+def test_machine_state__commit():
+    machine_state = MachineState(initial_parameter_values={1: 1})
+    parameter_values = machine_state.parameter_values
+
+    # Nothing to commit, so nothing changes
+    machine_state.commit_parameter_values()
+    assert machine_state.parameter_values is parameter_values
+
+    # Pending values only take effect when they're committed, the last value set wins
+    machine_state.set_parameter_value(2, 2)
+    machine_state.set_parameter_value(2, 3)
+    assert machine_state.get_parameter_value(1) == 1
+    with pytest.raises(exceptions.UndefinedParameter):
+        machine_state.get_parameter_value(2)
+
+    machine_state.commit_parameter_values()
+    assert machine_state.parameter_values == {1: 1, 2: 3}
+
+
+def test_machine_state__clone():
+    machine_state = MachineState(initial_parameter_values={1: 1})
+    machine_state.set_parameter_value(3, 3)
+
+    clone = machine_state.clone()
+    # Pending values aren't cloned
+    clone.commit_parameter_values()
+    assert clone.parameter_values == {1: 1}
+
+    # Changes to either side don't affect the other one
+    clone.set_parameter_value(1, 2)
+    clone.commit_parameter_values()
+    machine_state.commit_parameter_values()
+    assert clone.parameter_values == {1: 2}
+    assert machine_state.parameter_values == {1: 1, 3: 3}
+
+
+def test_machine_state__equality():
+    machine_state = MachineState(initial_parameter_values={1: 1})
+    assert machine_state == MachineState(initial_parameter_values={1: 1})
+    assert machine_state != MachineState(initial_parameter_values={1: 1}, is_block_delete_switch_enabled=True)
+
+    # Pending values count, because they take effect with the next commit
+    machine_state.set_parameter_value(2, 2)
+    assert machine_state != machine_state.clone()
+    assert machine_state == machine_state.clone(keep_pending=True)
+
+    machine_state.rollback_parameter_values()
+    assert machine_state == machine_state.clone()
+    machine_state.commit_parameter_values()
+    assert machine_state.parameter_values == {1: 1}
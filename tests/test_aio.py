@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from rs274_parser.aio import aparse, iter_lines
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.rs274ngc import Rs274
+
+PROGRAM = "#1 = 2 (café)\r\nG0 X#1\n\nG1 X1 Y2 (ünïcode) F100\nM2"
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_aparse__async_iterable(chunk_size: int):
+    parser = LinuxCNC()
+    lines = asyncio.run(collect(parser.aparse(chunked(PROGRAM.encode(), chunk_size))))
+
+    assert lines == LinuxCNC().parse(PROGRAM)
+    assert parser.machine_state.parameter_values == {1: 2}
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "",
+        "\n",
+        "\r",
+        "G0",
+        "G0\n",
+        "G0\r\nG1\r\n",
+        "G0\rG1\r",
+        "G0\r\rG1\x0cG2\x1eG3 (é)\x85G4\u2028\u2029G5",
+        "G1 X1 (é)" * 1000 + "\u2028G0\r\n",
+    ],
+)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 1000])
+def test_iter_lines(content: str, chunk_size: int):
+    lines = asyncio.run(collect(iter_lines(chunked(content.encode(), chunk_size))))
+    assert lines == content.splitlines()
+
+
+def test_aparse__stream_reader():
+    async def parse():
+        reader = asyncio.StreamReader()
+        reader.feed_data(PROGRAM.encode()[:10])
+
+        async def feed():
+            await asyncio.sleep(0.01)
+            reader.feed_data(PROGRAM.encode()[10:])
+            reader.feed_eof()
+
+        feeder = asyncio.create_task(feed())
+        lines = await collect(Rs274().aparse(reader))
+        await feeder
+        return lines
+
+    assert asyncio.run(parse()) == Rs274().parse(PROGRAM)
+
+
+def test_aparse__yields_to_event_loop():
+    async def parse():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.sleep(0)
+        ticks_before = ticks
+        # A single chunk with many lines, which would otherwise be parsed without ever yielding
+        async for _ in aparse(Rs274(), chunked(b"G0 X1\n" * 100, 1000), yield_interval=0):
+            pass
+        ticker.cancel()
+        return ticks - ticks_before
+
+    assert asyncio.run(parse()) >= 100
@@ -0,0 +1,225 @@
+import random
+
+import pytest
+
+from benchmarks.workloads import WORKLOADS
+from rs274_parser.backends import BACKENDS, Backend, get_backend
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.linuxcnc import MachineState as LinuxCNCMachineState
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+
+CORPUS = [
+    "",
+    "N10 G1 X1.5 Y-2 (comment) ; semicolon comment",
+    "/ #1 = 5 X#1",
+    "X#1",
+    "G1 X[1 + 2 * 3 ** 2] Y-[2] Z - 3",
+    "G1 X[-2 ** 2] Y[2 ** 3 ** 2] Z[8 / 2 / 2]",
+    "X[1 AND 1] Y[1 and 0] Z[0 OR 2] A[1 xor 1] B[1 - 2 - 3]",
+    "X ABS [ -1 ] Y sin[30] Z[ATAN[1]] A[round[2.5]] B[fix[-1.5]] C[fup[-1.5]]",
+    "X[exp[1]] Y[ln[2]] Z[sqrt[16]] A[cos[0]] B[tan[45]] C[acos[0.5] + asin[0.5]]",
+    "X[1/0]",
+    "X[sqrt[-1]]",
+    "X[exp[1000]]",
+    "X[1/0]+",
+    "X[1+]",
+    "X[1 ** ]",
+    "X[1]*2",
+    "X[ [ [1] ] ]",
+    "X[1",
+    "X1]",
+    "X#[1]",
+    "X#[0.5 + 0.5]",
+    "X# 1",
+    "X#-1",
+    "#1 = -5",
+    "#1=+5",
+    "# 2 = [#1 * 2] #3 = #2 X#2",
+    "#2=3 #2=4 X#2",
+    "#1 = 1 G0 X#1",
+    "X--5 Y- 5 Z-[1] A+[1] B+-1",
+    "N 1 0 G1 X 1 . 5 Y1 2.3 4",
+    "N- ",
+    "N[1]",
+    "G[1] X[#1 - [#1 * 2]]",
+    "#<a> = 2 X#<a>",
+    "#<a> = 3 #<a> = [#<a> + 1]",
+    "X#<a>",
+    "X#< a b >",
+    "#< >=1",
+    "#<a>=1 X#<b>",
+    "X1 ; [1 + ] #<a>",
+    "G1 X1 ;",
+    "\tG1\tX[ 1\t+\t2 ]\t",
+    "( comment with [1+2] and #1 )",
+    "X[1 + sin]",
+    "X[cosine[1]]",
+    "X sin 30",
+]
+
+WHITESPACE = ["", "", "", " ", "\t", "  "]
+UNARY_OPERATORS = ["abs", "ACOS", "asin", "Atan", "cos", "exp", "fix", "fup", "ln", "round", "SIN", "sqrt", "tan"]
+OPERATORS = ["+", "-", "*", "/", "and", "OR", "xor", "AND", "**"]
+NUMBERS = ["0", "1", "2", "10", "1 0", "1.5", ".5", "1.", "1. 5", "-1", "-.25", "- 2", "1 . 2", "0.001"]
+PARAMETERS = ["#1", "#2", "#3", "#4", "# 5", "#[1 + 1]", "#<a>", "#<b>", "#< a >", "#<undefined>"]
+JUNK = list("[]#<>=+-*/;()aX. 0")
+
+
+def generate_expression(rng: random.Random, depth: int) -> str:
+    choice = rng.random()
+    if depth == 0 or choice < 0.25:
+        return rng.choice(NUMBERS)
+    if choice < 0.4:
+        return rng.choice(PARAMETERS)
+    if choice < 0.55:
+        return f"{rng.choice(UNARY_OPERATORS)}{rng.choice(WHITESPACE)}[{generate_expression(rng, depth - 1)}]"
+
+    parts = ["[", generate_operand(rng, depth)]
+    for _ in range(rng.randint(0, 3)):
+        operator = rng.choice(OPERATORS)
+        parts.append(f"{rng.choice(WHITESPACE)}{operator}{rng.choice(WHITESPACE)}")
+        # Only raise to small powers, so that no number gets too large to calculate
+        parts.append(rng.choice(["2", "0.5", "-1", "3"]) if operator == "**" else generate_operand(rng, depth))
+    parts.append("]")
+    return "".join(parts)
+
+
+def generate_operand(rng: random.Random, depth: int) -> str:
+    return rng.choice(["", "", "", "-", "+"]) + rng.choice(WHITESPACE) + generate_expression(rng, depth - 1)
+
+
+def generate_line(rng: random.Random) -> str:
+    parts = []
+    if rng.random() < 0.1:
+        parts.append("/")
+    if rng.random() < 0.1:
+        parts.append(f"N{rng.randint(0, 100)}")
+
+    for _ in range(rng.randint(1, 4)):
+        parts.append(rng.choice(WHITESPACE))
+        choice = rng.random()
+        if choice < 0.6:
+            parts.append(f"{rng.choice('GXYZFxyz')}{rng.choice(['', '', '-', '+'])}{generate_expression(rng, 3)}")
+        elif choice < 0.75:
+            parts.append(f"#{rng.randint(1, 5)} = {generate_expression(rng, 2)}")
+        elif choice < 0.85:
+            parts.append(f"#<{rng.choice('ab')}> = {generate_expression(rng, 2)}")
+        else:
+            parts.append(rng.choice(["(comment)", "( spaced [1] )", "; trailing", "N10", "X1.5"]))
+    line = "".join(parts)
+
+    if rng.random() < 0.2:
+        # A few syntax errors, and lines that still parse, but differently
+        position = rng.randrange(len(line) + 1)
+        line = line[:position] + rng.choice(JUNK) + line[position + 1 :]
+    return line
+
+
+def parse_result(parser: Rs274, line: str):
+    try:
+        return parser._parse_line(line)
+    except Exception as e:
+        return (type(e), str(e))
+
+
+def make_machine_state(machine_state_class: type[MachineState], is_block_delete_switch_enabled: bool) -> MachineState:
+    if machine_state_class is LinuxCNCMachineState:
+        return LinuxCNCMachineState(
+            initial_parameter_values={1: 1, 2: 2.5},
+            initial_named_parameter_values={"a": 3},
+            is_block_delete_switch_enabled=is_block_delete_switch_enabled,
+        )
+    return machine_state_class(
+        initial_parameter_values={1: 1, 2: 2.5},
+        is_block_delete_switch_enabled=is_block_delete_switch_enabled,
+    )
+
+
+def assert_same_results(parser_class: type[Rs274], machine_state: MachineState, lines: list[str], **options):
+    """Parse the lines with both backends in lockstep, checking the results, errors and machine states line by line."""
+    pe_parser = parser_class(machine_state, backend="pe", **options)
+    descent_parser = parser_class(machine_state, backend="descent", **options)
+
+    for line in lines:
+        assert parse_result(descent_parser, line) == parse_result(pe_parser, line), line
+        assert descent_parser.machine_state == pe_parser.machine_state, line
+
+
+DIALECTS = pytest.mark.parametrize(
+    "parser_class,machine_state_class",
+    [(Rs274, MachineState), (LinuxCNC, LinuxCNCMachineState)],
+)
+
+
+@DIALECTS
+@pytest.mark.parametrize("is_block_delete_switch_enabled", [False, True])
+def test_backends_match__generated(parser_class, machine_state_class, is_block_delete_switch_enabled: bool):
+    rng = random.Random(274)
+    lines = CORPUS + [generate_line(rng) for _ in range(1500)]
+
+    assert_same_results(parser_class, make_machine_state(machine_state_class, is_block_delete_switch_enabled), lines)
+
+
+@pytest.mark.parametrize(
+    "parser_class,machine_state_class,workload",
+    [
+        (parser_class, machine_state_class, workload)
+        for parser_class, machine_state_class in [(Rs274, MachineState), (LinuxCNC, LinuxCNCMachineState)]
+        for workload in WORKLOADS.values()
+        if parser_class.__name__.lower() in workload.dialects
+    ],
+)
+def test_backends_match__workloads(parser_class, machine_state_class, workload):
+    machine_state = machine_state_class(is_block_delete_switch_enabled=workload.is_block_delete_switch_enabled)
+    assert_same_results(parser_class, machine_state, workload.lines(300))
+    assert_same_results(parser_class, machine_state, workload.lines(300), fast_path=True, compact_lines=True)
+
+
+@DIALECTS
+def test_backends_match__validate_summarize_compile(parser_class, machine_state_class):
+    rng = random.Random(274)
+    lines = CORPUS + [generate_line(rng) for _ in range(300)]
+    machine_state = make_machine_state(machine_state_class, is_block_delete_switch_enabled=False)
+
+    # The lines that parse one after the other, to summarise and compile
+    filter_parser = parser_class(machine_state)
+    valid_lines = []
+    for line in lines:
+        try:
+            filter_parser._parse_line(line)
+        except Exception:
+            filter_parser.machine_state.rollback_parameter_values()
+        else:
+            valid_lines.append(line)
+
+    def results(backend: str):
+        parser = parser_class(machine_state, backend=backend)
+        errors = [(error.line_index, type(error.error), str(error.error)) for error in parser.validate(lines)]
+        summary = parser_class(machine_state, backend=backend).summarize(valid_lines)
+        compiled_lines = parser_class(machine_state, backend=backend).compile(valid_lines).evaluate(machine_state)
+        return errors, parser.machine_state, summary, compiled_lines
+
+    assert results("descent") == results("pe")
+
+
+def test_other_grammars_use_pe():
+    # Rules other than "line", and extra rules, aren't known to the descent parser
+    assert Rs274(start_rule="l1_operation", backend="descent").parse("1 + 2 * 3") == [7]
+
+    extra_rule = 'program < "%" line'
+    lines = Rs274(start_rule="program", extra_rule=extra_rule, backend="descent").parse("%G1 X[1 + 1]")
+    assert lines == Rs274(start_rule="program", extra_rule=extra_rule).parse("%G1 X[1 + 1]")
+    assert str(lines[0]) == "G1 X2"
+
+
+def test_get_backend():
+    assert get_backend("pe") is BACKENDS["pe"]
+    assert Rs274(backend="descent").backend is BACKENDS["descent"]
+    assert LinuxCNC(backend="descent")._options()["backend"] == "descent"
+
+    with pytest.raises(ValueError):
+        Rs274(backend="lark")
+
+    # A backend has to implement parse_line()
+    with pytest.raises(TypeError):
+        Backend()  # type: ignore[abstract]
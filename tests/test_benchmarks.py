@@ -0,0 +1,32 @@
+import pytest
+
+from benchmarks.compare import compare
+from benchmarks.run import run
+from benchmarks.workloads import WORKLOADS, Workload
+
+
+@pytest.mark.parametrize("workload", WORKLOADS.values(), ids=list(WORKLOADS))
+def test_workloads(workload: Workload):
+    lines = workload.lines(200)
+
+    assert len(lines) == 200
+    assert workload.lines(200) == lines
+    assert workload.lines(200, seed=1) != lines
+
+
+def test_run_and_compare():
+    results = run(["literal_cam", "named_parameters"], ["rs274", "linuxcnc"], line_count=50, repeat=1)
+    assert list(results["results"]) == ["rs274/literal_cam", "linuxcnc/literal_cam", "linuxcnc/named_parameters"]
+
+    report, regressions = compare(results, results)
+    assert len(report) == 9
+    assert regressions == []
+
+    slower = {
+        "results": {
+            key: {**result, "lines_per_second": result["lines_per_second"] / 2}
+            for key, result in results["results"].items()
+        }
+    }
+    _, regressions = compare(results, slower, threshold=0.1)
+    assert len(regressions) == 3
@@ -0,0 +1,62 @@
+import pytest
+
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.rs274ngc import Rs274
+
+np = pytest.importorskip("numpy")
+
+from rs274_parser.columnar import NO_LINE_NUMBER  # noqa: E402
+
+PROGRAM = """\
+N10 G1 X1.5 F100 (feed move) #1 = 2
+#1 = 4 X#1 M3 G0
+/ G0 X9
+
+#<name> = 3 G2 X1 Y2 I0.5 J0.5 (first) (second) ; third
+"""
+
+
+@pytest.mark.parametrize("parser_class", [Rs274, LinuxCNC])
+def test_parse_columnar__matches_parse(parser_class: type[Rs274]):
+    program = PROGRAM if parser_class is LinuxCNC else PROGRAM.replace("#<name> = 3", "#2 = 3").replace("; third", "")
+    lines = parser_class().parse(program)
+    columnar = parser_class().parse_columnar(program)
+
+    assert len(columnar) == len(lines)
+    assert list(columnar.line_numbers) == [
+        line.line_number if line.line_number is not None else NO_LINE_NUMBER for line in lines
+    ]
+    assert list(columnar.word_offsets) == list(np.cumsum([0] + [len(line.words) for line in lines]))
+
+    words = [word for line in lines for word in line.words]
+    assert [chr(letter) for letter in columnar.letters] == [word.letter for word in words]
+    assert list(columnar.numbers) == [word.number for word in words]
+    assert list(columnar.orderings) == [word.ordering for word in words]
+    assert list(columnar.word_line_indices) == [i for i, line in enumerate(lines) for _ in line.words]
+
+    assert [columnar.line_comments(i) for i in range(len(lines))] == [line.comments for line in lines]
+    assert list(columnar.numeric_assignment_offsets) == list(
+        np.cumsum([0] + [len(line.numeric_assignments) for line in lines])
+    )
+    assert list(columnar.numeric_assignment_indices) == [i for line in lines for i in line.numeric_assignments]
+    assert columnar.named_assignment_names == [name for line in lines for name in line.named_assignments]
+
+
+def test_parse_columnar__execution_order_and_modal_groups():
+    columnar = Rs274().parse_columnar("X1 G1 F100 M3\nN5 G0")
+
+    # Same order as Line.words: F, M3, G1, X
+    assert bytes(columnar.letters) == b"FMGXG"
+    assert list(columnar.modal_groups) == [0, 7, 1, 0, 1]
+    assert list(columnar.word_line_numbers) == [NO_LINE_NUMBER] * 4 + [5]
+    assert columnar.letters.dtype == np.uint8
+    assert columnar.numbers.dtype == np.float64
+    assert columnar.orderings.dtype == np.int16
+
+
+def test_parse_columnar__empty():
+    columnar = Rs274().parse_columnar("")
+
+    assert len(columnar) == 0
+    assert list(columnar.word_offsets) == [0]
+    assert len(columnar.letters) == 0
@@ -0,0 +1,71 @@
+import pytest
+from pe._errors import ParseError
+
+from rs274_parser import exceptions
+from rs274_parser.compiled import Call
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.linuxcnc import MachineState as LinuxCNCMachineState
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+
+PROGRAM = """\
+N10 G1 X1.5 Y-[2 * 3] Z[sqrt[4] + abs[-1]] F1500 (literal)
+#1 = [#2 * 2] #2 = 3
+G0 X#1 Y-#2 Z[#1 ** 2 / 4 - #2] A[#1 and 0] B[#[#1 - 1]]
+/ #3 = 1
+G1 X#3
+#3 = [#3 + 1]
+G1 X#3 Y[1 + 2 + 3] ; comment
+"""
+
+
+@pytest.mark.parametrize(
+    "parser_class,machine_state_class",
+    [(Rs274, MachineState), (LinuxCNC, LinuxCNCMachineState)],
+)
+@pytest.mark.parametrize("is_block_delete_switch_enabled", [False, True])
+def test_compile__same_as_parse(parser_class, machine_state_class, is_block_delete_switch_enabled: bool):
+    program = PROGRAM if parser_class is LinuxCNC else PROGRAM.replace(" ; comment", "")
+    compiled = parser_class().compile(program)
+
+    for parameter_values in [{1: 1, 2: 2, 3: 0, 5: 3}, {1: 3, 2: 5, 3: -2, 9: 4}]:
+        machine_state = machine_state_class(
+            initial_parameter_values=parameter_values,
+            is_block_delete_switch_enabled=is_block_delete_switch_enabled,
+        )
+        parser = parser_class(machine_state)
+
+        assert compiled.evaluate(machine_state) == parser.parse(program)
+
+        evaluating_parser = parser_class(machine_state)
+        list(compiled.iter_evaluate(evaluating_parser))
+        assert evaluating_parser.machine_state.parameter_values == parser.machine_state.parameter_values
+
+
+def test_compile__named_parameters():
+    program = "#<a> = 2\nG0 X[#<a> * 2] Y#<b>"
+    compiled = LinuxCNC().compile(program)
+    machine_state = LinuxCNCMachineState(initial_named_parameter_values={"b": 3})
+
+    assert compiled.evaluate(machine_state) == LinuxCNC(machine_state).parse(program)
+
+
+def test_compile__constant_folding():
+    compiled = Rs274().compile("G1 X-[1 + 2] Y[sin[0]]\nG1 X#1")
+
+    # Only the line itself is left to evaluate for literal lines
+    line_call = compiled.lines[0]
+    assert not any(isinstance(item, Call) for item in line_call.args[1])
+    assert any(isinstance(item, Call) for item in compiled.lines[1].args[1])
+
+
+def test_compile__errors():
+    # Syntax errors are raised when compiling
+    with pytest.raises(ParseError):
+        Rs274().compile("G0 X[1")
+
+    # Everything else is raised when evaluating, like it is when parsing
+    compiled = Rs274().compile("G0 X#1\nG0 X[sqrt[-1]]")
+    with pytest.raises(exceptions.UndefinedParameter):
+        compiled.evaluate()
+    with pytest.raises(ValueError):
+        compiled.evaluate(MachineState(initial_parameter_values={1: 1}))
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.linuxcnc import MachineState as LinuxCNCMachineState
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+from rs274_parser.fast_path import is_literal_line
+
+CORPUS = [
+    "G0",
+    "",
+    "N10",
+    "N99 G1",
+    "g0x 0. 1234y 7",
+    "G0 (first comment) X1 (second comment)",
+    "/ M2",
+    "; L10 G0 X0",
+    "G0 (first comment) X1 (second comment) ;semicolon comment (still)",
+    "#1 = 1 G0 X#1",
+    "G[1] X1",
+    "G1 X1.234 Y-5.6 Z+0.5 F1500",
+    "X1.",
+    "X1. Y2",
+    "X1.Y2",
+    "X- 1",
+    "X--1",
+    "X-- 1",
+    "N 10 20 G1",
+    "n10 G1",
+    "G1 N10",
+    "E1",
+    "( unclosed",
+    "G1 )",
+    "G1 ;",
+    "\tG1\tX 1 2 . 3 4\t",
+]
+
+WHITESPACE = ["", "", "", " ", "\t", "  "]
+LETTERS = "GGGXXYYZZFMSTIJKABCRPQLDHNEgxyzf"
+NUMBERS = ["0", "1", "01", "10", "1 0", "1.5", ".5", "1.", "1. 5", "-1", "-.25", "- 2", "1 . 2", "", "+1"]
+OTHER = ["(comment)", "( spaced comment )", "(", ")", ";", "; trailing", "/", "N10", "N", ".", "X"]
+
+
+def generate_line(rng: random.Random) -> str:
+    parts = []
+    if rng.random() < 0.1:
+        parts.append("/")
+    if rng.random() < 0.2:
+        parts.append(f"N{rng.randint(0, 100)}")
+
+    for _ in range(rng.randint(0, 6)):
+        parts.append(rng.choice(WHITESPACE))
+        if rng.random() < 0.85:
+            parts.append(rng.choice(LETTERS) + rng.choice(WHITESPACE))
+            parts.append(rng.choice(["", "", "", "-", "+"]) + rng.choice(WHITESPACE) + rng.choice(NUMBERS))
+        else:
+            parts.append(rng.choice(OTHER))
+    parts.append(rng.choice(WHITESPACE))
+    return "".join(parts)
+
+
+def parse_result(parser: Rs274, line: str):
+    try:
+        return parser._parse_line(line)
+    except Exception as e:
+        return type(e)
+
+
+@pytest.mark.parametrize(
+    "parser_class,machine_state_class",
+    [(Rs274, MachineState), (LinuxCNC, LinuxCNCMachineState)],
+)
+@pytest.mark.parametrize("is_block_delete_switch_enabled", [False, True])
+def test_fast_path_matches_grammar(parser_class, machine_state_class, is_block_delete_switch_enabled: bool):
+    rng = random.Random(274)
+    lines = CORPUS + [generate_line(rng) for _ in range(3000)]
+
+    machine_state = machine_state_class(
+        initial_parameter_values={1: 1},
+        is_block_delete_switch_enabled=is_block_delete_switch_enabled,
+    )
+    grammar_parser = parser_class(machine_state)
+    fast_parser = parser_class(machine_state, fast_path=True)
+
+    scanned = 0
+    for line in lines:
+        assert parse_result(fast_parser, line) == parse_result(grammar_parser, line), line
+        scanned += is_literal_line(line)
+
+    assert fast_parser.machine_state.parameter_values == grammar_parser.machine_state.parameter_values
+    assert scanned > 2000
+
+
+def test_fast_path_program():
+    gcode = "#1 = 5\nG0 X#1 (uses the grammar)\nN10 G1 X1 Y2 (uses the fast path)\n/G1 X3\n"
+
+    assert Rs274(fast_path=True).parse(gcode) == Rs274().parse(gcode)
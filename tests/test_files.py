@@ -0,0 +1,128 @@
+import pytest
+
+from rs274_parser import files
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+from rs274_parser.files import GCodeFile
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "",
+        "\n",
+        "G0 X1",
+        "G0 X1\n",
+        "G0 X1\nG1 Y2",
+        "G0 X1\r\nG1 Y2\r\n",
+        "\n\nG0 (comment)\n\n",
+        "\r",
+        "G0 X1\rG1 Y2\r",
+        "G0\r\rG1\x0bG2\x0cG3\x1cG4 (é)\x85G5\u2028G6\u2029",
+    ],
+)
+def test_gcode_file__lines(tmp_path, content: str):
+    path = tmp_path / "program.ngc"
+    path.write_bytes(content.encode())
+
+    with GCodeFile(path) as gcode_file:
+        assert list(gcode_file) == content.splitlines()
+        assert len(gcode_file) == len(content.splitlines())
+        assert [gcode_file[i] for i in range(len(gcode_file))] == content.splitlines()
+
+
+def test_gcode_file__out_of_range(tmp_path):
+    path = tmp_path / "program.ngc"
+    path.write_text("G0\nG1\n")
+
+    with GCodeFile(path) as gcode_file:
+        assert gcode_file[-1] == "G1"
+        with pytest.raises(IndexError):
+            gcode_file[2]
+
+
+def test_gcode_file__saved_index(tmp_path, monkeypatch):
+    path = tmp_path / "program.ngc"
+    index_path = tmp_path / "program.ngc.idx"
+    path.write_text("G0\nG1 X1\nG2\n")
+
+    with GCodeFile(path, index_path=index_path) as gcode_file:
+        offsets = gcode_file.offsets.tolist()
+    assert index_path.exists()
+
+    with GCodeFile(path, index_path=index_path) as gcode_file:
+        assert gcode_file.offsets.tolist() == offsets
+        assert gcode_file[1] == "G1 X1"
+
+    # A saved index is ignored for another encoding, or if it was saved by a version that split lines differently
+    built = []
+    build_index = GCodeFile._build_index
+    monkeypatch.setattr(GCodeFile, "_build_index", lambda self: built.append(1) or build_index(self))
+    GCodeFile(path, encoding="latin-1", index_path=index_path).close()
+    assert built == [1]
+    monkeypatch.setattr(files, "PARSING_VERSION", files.PARSING_VERSION + 1)
+    GCodeFile(path, encoding="latin-1", index_path=index_path).close()
+    assert built == [1, 1]
+
+    # A saved index for a different version of the file is ignored
+    path.write_text("G0 X1\nG1\n")
+    with GCodeFile(path, index_path=index_path) as gcode_file:
+        assert list(gcode_file) == ["G0 X1", "G1"]
+
+
+def test_parse_file(tmp_path):
+    gcode = "#1 = 1\nG0 X#1\nG1 X#1 (done)\n"
+    path = tmp_path / "program.ngc"
+    path.write_text(gcode)
+
+    expected = Rs274(MachineState(initial_parameter_values={1: 0})).parse(gcode)
+
+    parser = Rs274(MachineState(initial_parameter_values={1: 0}))
+    assert parser.parse_file(path) == expected
+    assert parser.machine_state.parameter_values == {1: 1}
+
+    with GCodeFile(path) as gcode_file:
+        assert Rs274(MachineState(initial_parameter_values={1: 0})).parse_file(gcode_file) == expected
+        assert gcode_file[2] == "G1 X#1 (done)"
+
+
+def test_parse_file__line_boundaries(tmp_path):
+    gcode = "G1 X1\rG0 X2\x0cG1 Y3\r"
+    path = tmp_path / "program.ngc"
+    path.write_text(gcode, newline="")
+
+    assert Rs274().parse_file(path) == Rs274().parse(gcode)
+
+
+@pytest.mark.parametrize(
+    "content", ["G0 X1\x0bG1 X2\x1c\u2028G0 Y3\r\n(é)\x85\rG1 Y4\n", "G0 X1" * 1638 + "\r\nG1 X2\r"]
+)
+def test_read_lines(tmp_path, content: str):
+    path = tmp_path / "program.ngc"
+    path.write_text(content, newline="")
+
+    assert list(files.read_lines(path)) == content.splitlines()
+    assert list(Rs274().iter_parse(path)) == Rs274().parse(content)
+    assert Rs274().summarize(path) == Rs274().summarize(content)
+    assert Rs274().flatten(path, tmp_path / "from_path.ngc") == Rs274().flatten(content, tmp_path / "from_str.ngc")
+    assert (tmp_path / "from_path.ngc").read_text() == (tmp_path / "from_str.ngc").read_text()
+
+
+def test_gcode_file__closed_on_error(tmp_path, monkeypatch):
+    path = tmp_path / "program.ngc"
+    path.write_text("G0\nG1\n")
+
+    opened = []
+
+    def recording_open(*args, **kwargs):
+        opened.append(f := open(*args, **kwargs))
+        return f
+
+    def failing_build_index(self):
+        raise MemoryError
+
+    monkeypatch.setattr(files, "open", recording_open, raising=False)
+    monkeypatch.setattr(GCodeFile, "_build_index", failing_build_index)
+    with pytest.raises(MemoryError):
+        GCodeFile(path)
+    assert len(opened) == 1
+    assert opened[0].closed
@@ -0,0 +1,212 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from benchmarks.workloads import WORKLOADS
+from rs274_parser import exceptions
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.linuxcnc import MachineState as LinuxCNCMachineState
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+from rs274_parser.flatten import WRITE_CHUNK_LINES, flatten, format_number
+
+PROGRAM = """\
+N10 G21 G90 (setup)
+#1 = 2.5 #<depth> = [0 - 2 * 2.5]
+G0 X[#1 * 4] Y#1 Z5
+g1 z#<depth> F[100 * 3] ; plunge (slowly)
+/ #1 = 1
+X[#1 + 0.1] Y[1 / 3] (cut)
+N20 X[#1 ** 0.5] Y[-0.00001] S[10 ** 20]
+
+M30
+"""
+
+
+def make_parser(is_block_delete_switch_enabled: bool = False, **options) -> LinuxCNC:
+    return LinuxCNC(
+        LinuxCNCMachineState(is_block_delete_switch_enabled=is_block_delete_switch_enabled),
+        **options,
+    )
+
+
+def flatten_to_str(parser: Rs274, source, **options) -> str:
+    sink = io.StringIO()
+    parser.flatten(source, sink, **options)
+    return sink.getvalue()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"fast_path": True}, {"backend": "descent"}, {"compact_lines": True, "line_cache_size": 16}],
+)
+def test_flatten(options: dict):
+    parser = make_parser(**options)
+    assert parser.flatten(PROGRAM, sink := io.StringIO()) == 9
+
+    assert sink.getvalue() == (
+        "N10 G21 G90 (setup)\n"
+        "\n"
+        "G0 X10.0 Y2.5 Z5\n"
+        "F300 G1 Z-5.0 ; plunge (slowly)\n"
+        "\n"
+        "X1.1 Y0.3333333333333333 (cut)\n"
+        "N20 S100000000000000000000 X1.0 Y-0.00001\n"
+        "\n"
+        "M30\n"
+    )
+
+    expected_parser = make_parser()
+    expected_parser.parse(PROGRAM)
+    assert parser.machine_state == expected_parser.machine_state
+
+
+def test_flatten__block_delete():
+    flattened = flatten_to_str(make_parser(is_block_delete_switch_enabled=True), PROGRAM).splitlines()
+
+    # The deleted line is empty, but like parsing, LinuxCNC still sets #1 on it
+    assert flattened[4] == ""
+    assert flattened[5] == "X1.1 Y0.3333333333333333 (cut)"
+
+    rs274_program = PROGRAM.replace("#<depth>", "#2").replace(" ; plunge (slowly)", "")
+    flattened = flatten_to_str(Rs274(MachineState(is_block_delete_switch_enabled=True)), rs274_program).splitlines()
+    # In RS274/NGC, the value of #1 stays pending until the next line has been parsed
+    assert flattened[5] == "X2.6 Y0.3333333333333333 (cut)"
+
+
+def test_flatten__comments():
+    program = "G0 X1 (MSG, press (start) (see (note)\n(DEBUG, x=#<_x>) G1 X2 F1 ; MSG, not active\n(LOGCLOSE)\nX3 ;"
+    flattened = flatten_to_str(make_parser(), program, line_numbers=False)
+
+    # Active comments are kept as they are, and semicolon comments stay semicolon comments
+    assert flattened.splitlines() == [
+        "G0 X1 (MSG, press (start) (see [note)",
+        "F1 G1 X2 (DEBUG, x=#<_x>) ; MSG, not active",
+        "(LOGCLOSE)",
+        "X3 ;",
+    ]
+
+
+def test_flatten__options():
+    flattened = flatten_to_str(make_parser(), PROGRAM, precision=3, comments=False, line_numbers=False)
+
+    assert flattened.splitlines() == [
+        "G21 G90",
+        "",
+        "G0 X10 Y2.5 Z5",
+        "F300 G1 Z-5",
+        "",
+        "X1.1 Y0.333",
+        "S100000000000000000000 X1 Y0",
+        "",
+        "M30",
+    ]
+
+
+def test_flatten__precision_keeps_codes():
+    flattened = flatten_to_str(make_parser(), "G38.2 Z[0 - 1.5] F100.25\nG64 P0.05 M1", precision=0)
+
+    # G and M numbers are codes, so only the other words are rounded
+    assert flattened.splitlines() == ["F100 G38.2 Z-2", "G64 M1 P0"]
+
+
+@pytest.mark.parametrize(
+    "parser_class,machine_state_class,workload",
+    [
+        (parser_class, machine_state_class, workload)
+        for parser_class, machine_state_class in [(Rs274, MachineState), (LinuxCNC, LinuxCNCMachineState)]
+        for workload in WORKLOADS.values()
+        if parser_class.__name__.lower() in workload.dialects
+    ],
+)
+@pytest.mark.parametrize("backend", ["pe", "descent"])
+def test_flatten__workloads(parser_class, machine_state_class, workload, backend: str):
+    machine_state = machine_state_class(is_block_delete_switch_enabled=workload.is_block_delete_switch_enabled)
+    lines = workload.lines(300)
+    flattened = flatten_to_str(parser_class(machine_state, backend=backend, fast_path=True), lines).splitlines()
+    parsed_lines = parser_class(machine_state).parse("\n".join(lines))
+    assert len(flattened) == len(parsed_lines) == len(lines)
+
+    # Flattened lines have the words of the parsed lines, without any parameters or expressions left to evaluate
+    reparsed_lines = parser_class(machine_state_class()).parse("\n".join(flattened))
+    for line, parsed_line, reparsed_line in zip(lines, parsed_lines, reparsed_lines):
+        if workload.is_block_delete_switch_enabled and line.lstrip().startswith("/"):
+            assert reparsed_line.words == []
+            continue
+        assert reparsed_line.words == parsed_line.words
+        assert reparsed_line.line_number == parsed_line.line_number
+        assert reparsed_line.comments == parsed_line.comments
+        assert not reparsed_line.numeric_assignments
+
+
+def test_flatten__sources_and_sinks(tmp_path: Path):
+    source_path = tmp_path / "program.ngc"
+    source_path.write_text(PROGRAM)
+    expected = flatten_to_str(make_parser(), PROGRAM)
+
+    assert flatten(make_parser(), source_path, tmp_path / "flat.ngc") == 9
+    assert (tmp_path / "flat.ngc").read_text() == expected
+
+    with open(source_path) as f:
+        assert flatten(make_parser(), f, str(tmp_path / "flat2.ngc")) == 9
+    assert (tmp_path / "flat2.ngc").read_text() == expected
+
+    assert flatten_to_str(make_parser(), PROGRAM.splitlines(keepends=True)) == expected
+    assert flatten_to_str(make_parser(), "") == ""
+
+
+def test_flatten__chunked_writes():
+    writes = []
+
+    class Sink:
+        def write(self, s: str):
+            writes.append(s)
+
+    line_count = WRITE_CHUNK_LINES * 2 + 1
+    assert Rs274().flatten(["G1 X[1 + 1]"] * line_count, Sink()) == line_count
+    assert [s.count("\n") for s in writes] == [WRITE_CHUNK_LINES, WRITE_CHUNK_LINES, 1]
+    assert "".join(writes) == "G1 X2\n" * line_count
+
+
+def test_flatten__errors():
+    sink = io.StringIO()
+    with pytest.raises(exceptions.UndefinedParameter):
+        Rs274().flatten("G1 X1\nG1 X#1\nG1 X2", sink)
+    # The lines before the error are written
+    assert sink.getvalue() == "G1 X1\n"
+
+    with pytest.raises(ValueError):
+        Rs274().flatten("G1 X[10.0 ** 300 * 10.0 ** 300]", io.StringIO())
+
+    with pytest.raises(ValueError):
+        Rs274(start_rule="expression").flatten("1 + 2", io.StringIO())
+
+
+@pytest.mark.parametrize(
+    "number,precision,expected",
+    [
+        (1, None, "1"),
+        (-20, 3, "-20"),
+        (1.5, None, "1.5"),
+        (2.0, None, "2.0"),
+        (0.1 + 0.2, None, "0.30000000000000004"),
+        (1e-7, None, "0.0000001"),
+        (-1.25e-10, None, "-0.000000000125"),
+        (1e22, None, "10000000000000000000000"),
+        (-0.0, None, "-0.0"),
+        (1 / 3, 4, "0.3333"),
+        (2.0, 4, "2"),
+        (2.5, 0, "2"),
+        (1.23456, 2, "1.23"),
+        (-0.00001, 3, "0"),
+        (1e-7, 10, "0.0000001"),
+    ],
+)
+def test_format_number(number, precision, expected):
+    assert format_number(number, precision) == expected
+
+
+def test_format_number__not_finite():
+    for number in (float("inf"), float("-inf"), float("nan")):
+        with pytest.raises(ValueError):
+            format_number(number)
@@ -0,0 +1,84 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from rs274_parser import grammar_cache
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+
+
+def test_compiled_grammar_is_shared():
+    assert Rs274().parser is Rs274().parser
+    assert LinuxCNC().parser is LinuxCNC().parser
+    assert Rs274().parser is not LinuxCNC().parser
+    assert Rs274(start_rule="word").parser is not Rs274().parser
+
+
+def test_shared_grammar_uses_each_parsers_state():
+    first = Rs274(MachineState(initial_parameter_values={1: 1}))
+    second = Rs274(MachineState(initial_parameter_values={1: 2}))
+
+    assert str(first.parse("G0 X#1")[0]) == "G0 X1"
+    assert str(second.parse("G0 X#1")[0]) == "G0 X2"
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "grammars.pickle"
+    gcode = "#1 = 2 G0 X[#1 + 1] (comment)\nG1 X#1"
+    expected = Rs274(MachineState(initial_parameter_values={1: 1})).parse(gcode)
+
+    grammar_cache.save(path)
+    grammar_cache.clear()
+    try:
+        assert grammar_cache.load(path) >= 1
+
+        assert Rs274(MachineState(initial_parameter_values={1: 1})).parse(gcode) == expected
+    finally:
+        grammar_cache.clear()
+
+
+def test_load__checks_actions(tmp_path):
+    path = tmp_path / "grammars.pickle"
+    key = grammar_cache.grammar_key(Rs274, Rs274().grammar_str, "line")
+    Rs274().parser
+
+    class ChangedActions(Rs274):
+        def actions(self):
+            return {**super().actions(), "word": lambda items: None}
+
+    grammar_cache.save(path)
+    try:
+        # Saved grammars are used if their actions match
+        grammar_cache.clear()
+        grammar_cache.load(path)
+        loaded_parser = grammar_cache._loaded_grammars[key]
+        assert grammar_cache.get_compiled_grammar(key, Rs274().actions) is loaded_parser
+
+        # ...and recompiled if they don't
+        grammar_cache.clear()
+        grammar_cache.load(path)
+        loaded_parser = grammar_cache._loaded_grammars[key]
+        changed_parser = grammar_cache.get_compiled_grammar(key, ChangedActions().actions)
+        assert changed_parser is not loaded_parser
+        assert changed_parser.grammar.actions["word"] is not loaded_parser.grammar.actions["word"]
+    finally:
+        grammar_cache.clear()
+
+
+def test_load__missing_file(tmp_path):
+    assert grammar_cache.load(tmp_path / "missing.pickle") == 0
+
+
+def test_compiled_grammar_is_shared__threads():
+    # A grammar that isn't compiled yet, which threads then all need at the same time
+    extra_rule = f"program_{uuid.uuid4().hex} < line"
+    barrier = threading.Barrier(8)
+
+    def compile_grammar(_):
+        barrier.wait()
+        return Rs274(start_rule="line", extra_rule=extra_rule).parser
+
+    with ThreadPoolExecutor(8) as executor:
+        parsers = list(executor.map(compile_grammar, range(8)))
+
+    assert all(parser is parsers[0] for parser in parsers)
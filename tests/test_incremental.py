@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+from rs274_parser.incremental import IncrementalDocument
+from rs274_parser.types import Line
+
+LINES = [
+    "G0 X1",
+    "G1 X2 Y3 F100",
+    "#1 = [#1 + 1]",
+    "G1 X#1",
+    "/ #2 = 5",
+    "G0 Z#2",
+    "G0 X[1",  # Syntax error
+    "#3 = #9",  # Undefined parameter
+    "N10 M3 S1000",
+]
+
+
+def parse_document(parser: Rs274, text: list[str]) -> tuple[list[Line | None], set[int]]:
+    """Parse a document line by line, the way IncrementalDocument does."""
+    lines: list[Line | None] = []
+    errors = set()
+    for i, line in enumerate(text):
+        try:
+            lines.append(parser._parse_line(line))
+        except Exception:
+            lines.append(None)
+            errors.add(i)
+            parser.machine_state.rollback_parameter_values()
+    return lines, errors
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("is_block_delete_switch_enabled", [False, True])
+def test_incremental_document__same_as_full_parse(seed: int, is_block_delete_switch_enabled: bool):
+    rng = random.Random(seed)
+
+    def machine_state():
+        return MachineState(
+            initial_parameter_values={1: 0, 2: 0},
+            is_block_delete_switch_enabled=is_block_delete_switch_enabled,
+        )
+
+    text = [rng.choice(LINES) for _ in range(200)]
+    document = IncrementalDocument(Rs274(machine_state()), "\n".join(text), checkpoint_interval=16)
+
+    for _ in range(30):
+        start = rng.randrange(len(document) + 1)
+        end = rng.randrange(start, min(start + 5, len(document)) + 1)
+        document.edit(start, end, [rng.choice(LINES) for _ in range(rng.randrange(4))])
+
+        parser = Rs274(machine_state())
+        lines, errors = parse_document(parser, document.text)
+        assert document.lines == lines
+        assert set(document.errors) == errors
+        assert document.machine_state == parser.machine_state
+        assert document.parser.machine_state == parser.machine_state
+
+
+def test_incremental_document__stops_early():
+    content = "\n".join(["#1 = 1", "G0 X#1"] + ["G1 X1 Y2"] * 10000)
+    document = IncrementalDocument(LinuxCNC(fast_path=True), content, checkpoint_interval=100)
+
+    assert len(document.edit(9000, 9001, "G1 X5")) <= 200
+    assert document.lines[9000] == LinuxCNC().parse("G1 X5")[0]
+
+    # Changing a parameter makes every line after it depend on the edit
+    reparsed = document.edit(0, 1, "#1 = 2")
+    assert reparsed == range(0, 10002)
+    assert document.lines[1] == LinuxCNC().parse("G0 X2")[0]
+
+
+def test_incremental_document__delete_everything():
+    document = IncrementalDocument(Rs274(), "#1 = 1\nG0 X#1")
+    document.edit(0, 2, "")
+
+    assert document.lines == []
+    assert document.machine_state.parameter_values == {}
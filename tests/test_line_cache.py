@@ -0,0 +1,64 @@
+import pytest
+
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+from rs274_parser.line_cache import LineCache
+
+PROGRAM = """\
+G0 Z5
+G1 X1 Y1 F100
+G0 Z5
+#1 = 2 G0 Z5
+G1 X#1
+/ #1 = 3
+G0 Z5
+G1 X#1
+/ G0 Z5
+/ G0 Z5
+G1 X#1
+G0 Z5
+"""
+
+
+@pytest.mark.parametrize("parser_class", [Rs274, LinuxCNC])
+@pytest.mark.parametrize("is_block_delete_switch_enabled", [False, True])
+@pytest.mark.parametrize("compact_lines", [False, True])
+def test_line_cache__same_result(parser_class: type[Rs274], is_block_delete_switch_enabled: bool, compact_lines: bool):
+    def parse(line_cache_size: int):
+        machine_state = MachineState(is_block_delete_switch_enabled=is_block_delete_switch_enabled)
+        parser = parser_class(machine_state, compact_lines=compact_lines, line_cache_size=line_cache_size)
+        return parser.parse(PROGRAM), parser.machine_state.parameter_values
+
+    assert parse(line_cache_size=100) == parse(line_cache_size=0)
+
+
+def test_line_cache__hits_and_misses():
+    parser = Rs274(line_cache_size=100)
+    lines = parser.parse(PROGRAM)
+
+    assert parser.line_cache is not None
+    # Lines using parameters are neither looked up nor cached
+    assert (parser.line_cache.hits, parser.line_cache.misses) == (4, 3)
+    assert lines[0] is lines[2]
+
+
+def test_line_cache__block_delete_switch():
+    parser = Rs274(line_cache_size=100)
+    assert parser.parse("/ G0") == parser.parse("/ G0")
+
+    parser.machine_state.is_block_delete_switch_enabled = True
+    assert parser.parse("/ G0")[0].words == []
+
+
+def test_line_cache__eviction():
+    line_cache = LineCache(maxsize=2)
+    line_cache.put(("G0", False), Rs274().parse("G0")[0])
+    line_cache.put(("G1", False), Rs274().parse("G1")[0])
+    assert line_cache.get(("G0", False)) is not None
+
+    line_cache.put(("G2", False), Rs274().parse("G2")[0])
+
+    assert len(line_cache) == 2
+    assert line_cache.get(("G1", False)) is None
+    assert line_cache.get(("G0", False)) is not None
+    assert (line_cache.hits, line_cache.misses) == (2, 1)
@@ -0,0 +1,76 @@
+import pytest
+
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.rs274ngc import Rs274, word
+from rs274_parser.modal import ModalGroupConflict, ModalStateTracker
+from rs274_parser.types import EMPTY_MAPPING
+
+PROGRAM = """\
+G17 G21 G90 M3 S1000
+G0 X0 Y0
+G1 X10 F100
+X20
+G2 X30 I5 J0
+G91 G1 X1
+M5 M6 T2
+G1 X2
+G0 G1 X5
+M3 M4 M5
+"""
+
+
+def test_modal_state():
+    parser = Rs274()
+    lines = parser.parse(PROGRAM)
+    tracker = ModalStateTracker(parser.word_info, snapshot_interval=4)
+    tracker.extend(lines)
+
+    assert len(tracker) == len(lines)
+    assert tracker.changes_at(0) == {
+        ("G", 2): word("G", 17),
+        ("G", 6): word("G", 21),
+        ("G", 3): word("G", 90),
+        ("M", 7): word("M", 3),
+    }
+    assert tracker.changes_at(3) is EMPTY_MAPPING
+    assert tracker.changes_at(5) == {("G", 3): word("G", 91), ("G", 1): word("G", 1)}
+    # M6 and M5 are in different groups than G6 and G5
+    assert tracker.changes_at(6) == {("M", 7): word("M", 5), ("M", 6): word("M", 6)}
+    # G1 is already in effect
+    assert tracker.changes_at(7) is EMPTY_MAPPING
+
+    state = tracker.state_at(5)
+    assert state[("G", 1)] == word("G", 1)
+    assert state[("G", 2)] == word("G", 17)
+    assert state[("G", 3)] == word("G", 91)
+    assert state[("M", 7)] == word("M", 3)
+    assert tracker.state_at(-1) == tracker.state
+
+    # Every state is the same as applying all changes up to that line
+    expected_state: dict = {}
+    for line_index in range(len(lines)):
+        expected_state.update(tracker.changes_at(line_index))
+        assert tracker.state_at(line_index) == expected_state
+
+    with pytest.raises(IndexError):
+        tracker.state_at(len(lines))
+
+
+def test_modal_state__conflicts():
+    parser = LinuxCNC()
+    tracker = ModalStateTracker(parser.word_info)
+    tracker.extend(parser.parse(PROGRAM))
+
+    assert tracker.conflicts == [
+        ModalGroupConflict(8, ("G", 1), (word("G", 0), word("G", 1))),
+        ModalGroupConflict(9, ("M", 7), (word("M", 3), word("M", 4), word("M", 5))),
+    ]
+
+
+def test_modal_state__initial_words():
+    parser = Rs274()
+    tracker = ModalStateTracker(parser.word_info, initial_words=[word("G", 17), word("G", 90), word("X", 1)])
+    tracker.extend(parser.parse("G1 X1\nG18"))
+
+    assert tracker.state_at(0) == {("G", 2): word("G", 17), ("G", 3): word("G", 90), ("G", 1): word("G", 1)}
+    assert tracker.changes_at(1) == {("G", 2): word("G", 18)}
@@ -0,0 +1,171 @@
+from pathlib import Path
+
+import pe
+import pytest
+
+from rs274_parser import exceptions
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.linuxcnc import MachineState as LinuxCNCMachineState
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+from rs274_parser.parallel import ParserPool, parse_parallel, split_chunks
+
+
+def program(line_count: int) -> str:
+    lines = []
+    for i in range(line_count):
+        if i % 97 == 0:
+            lines.append("#1 = [#1 + 1] #<count> = #1 G1 X#1")
+        elif i % 301 == 0:
+            # A block-deleted assignment is committed by the next line
+            lines.append("/ #2 = #1")
+        else:
+            lines.append(f"G1 X{i % 50} Y#2 (line {i})" if i % 13 == 0 else f"N{i} G1 X{i % 50}.5 Y-1")
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("fast_path", [False, True])
+def test_parse_parallel(fast_path: bool):
+    content = program(2000)
+    initial_machine_state = LinuxCNCMachineState(
+        initial_parameter_values={1: 0, 2: 0},
+        is_block_delete_switch_enabled=True,
+    )
+
+    serial_parser = LinuxCNC(initial_machine_state, fast_path=fast_path)
+    parallel_parser = LinuxCNC(initial_machine_state, fast_path=fast_path)
+
+    expected = serial_parser.parse(content)
+    assert parse_parallel(parallel_parser, content, workers=2, min_chunk_lines=100) == expected
+    assert parallel_parser.machine_state.parameter_values == serial_parser.machine_state.parameter_values
+    assert parallel_parser.machine_state.named_parameter_values == serial_parser.machine_state.named_parameter_values
+
+
+def test_split_chunks():
+    lines = program(1000).splitlines()
+    parser = LinuxCNC(LinuxCNCMachineState(initial_parameter_values={1: 0, 2: 0}, is_block_delete_switch_enabled=True))
+    chunks = split_chunks(parser, lines, 8)
+
+    assert chunks[0][0] == 0
+    assert chunks[-1][1] == len(lines)
+    for (_, end, _), (start, _, _) in zip(chunks, chunks[1:]):
+        assert end == start
+
+    # The machine state at the start of each chunk is the same as after parsing everything before it, including any
+    # pending parameter values
+    for start, _, machine_state in chunks:
+        serial_parser = LinuxCNC(parser.machine_state)
+        serial_parser.parse("\n".join(lines[:start]))
+        assert isinstance(machine_state, LinuxCNCMachineState)
+        assert machine_state == serial_parser.machine_state
+        assert machine_state.named_parameter_values == serial_parser.machine_state.named_parameter_values
+
+
+@pytest.mark.parametrize(
+    "parser_class,machine_state_class",
+    [(Rs274, MachineState), (LinuxCNC, LinuxCNCMachineState)],
+)
+@pytest.mark.parametrize("is_block_delete_switch_enabled", [False, True])
+def test_parse_parallel__block_delete_before_chunk(
+    parser_class,
+    machine_state_class,
+    is_block_delete_switch_enabled: bool,
+):
+    # Chunks start right after block-deleted lines, whose assignment only the first line that isn't deleted commits
+    # in RS274/NGC, and the deleted line itself in LinuxCNC
+    lines = [f"G1 X{i % 50}" for i in range(8000)]
+    for start in range(1000, 8000, 1000):
+        lines[start - 2 : start + 1] = ["/ #2 = [#2 + 1]", "/ G0 X0", "G1 Y#2"]
+    content = "\n".join(lines)
+    initial_machine_state = machine_state_class(
+        initial_parameter_values={2: 0},
+        is_block_delete_switch_enabled=is_block_delete_switch_enabled,
+    )
+
+    serial_parser = parser_class(initial_machine_state)
+    parallel_parser = parser_class(initial_machine_state)
+    expected = serial_parser.parse(content)
+    assert parse_parallel(parallel_parser, content, workers=2, min_chunk_lines=100) == expected
+    assert parallel_parser.machine_state == serial_parser.machine_state
+
+
+def test_parse_parallel__error():
+    content = program(1000) + "\nG1 X#3\n" + program(1000)
+    initial_machine_state = LinuxCNCMachineState(initial_parameter_values={1: 0, 2: 0})
+
+    with pytest.raises(exceptions.UndefinedParameter):
+        parse_parallel(LinuxCNC(initial_machine_state), content, workers=2, min_chunk_lines=100)
+
+
+def test_parse_parallel__error_in_chunk():
+    # A syntax error in a line without parameters is only found while parsing the chunks
+    content = program(1000) + "\nG1 X[1\n" + program(1000)
+    initial_machine_state = LinuxCNCMachineState(initial_parameter_values={1: 0, 2: 0})
+
+    parser = LinuxCNC(initial_machine_state)
+    with pytest.raises(pe.ParseError):
+        parse_parallel(parser, content, workers=2, min_chunk_lines=100)
+
+    # The machine state is left the way a serial parse leaves it
+    serial_parser = LinuxCNC(initial_machine_state)
+    with pytest.raises(pe.ParseError):
+        serial_parser.parse(content)
+    assert parser.machine_state == serial_parser.machine_state
+    assert parser.machine_state.parameter_values[1] > 0
+
+
+def test_parse_parallel__small_program():
+    parser = Rs274(MachineState(initial_parameter_values={1: 0}))
+
+    assert parser.parse_parallel("#1 = 1\nG0 X#1", workers=4) == Rs274(
+        MachineState(initial_parameter_values={1: 0})
+    ).parse("#1 = 1\nG0 X#1")
+    assert parser.machine_state.parameter_values == {1: 1}
+
+
+@pytest.fixture
+def gcode_paths(tmp_path: Path) -> list[Path]:
+    paths = []
+    for index, line_count in enumerate([50, 400, 10, 200]):
+        path = tmp_path / f"program{index}.ngc"
+        path.write_text(program(line_count))
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize("compact_lines", [False, True])
+def test_parse_many(gcode_paths: list[Path], compact_lines: bool):
+    initial_machine_state = LinuxCNCMachineState(initial_parameter_values={1: 0, 2: 0})
+    parser = LinuxCNC(initial_machine_state, compact_lines=compact_lines)
+
+    results = {result.path: result for result in parser.parse_many(gcode_paths, workers=2)}
+
+    assert set(results) == set(gcode_paths)
+    for path in gcode_paths:
+        expected_parser = LinuxCNC(initial_machine_state, compact_lines=compact_lines)
+        expected_lines = expected_parser.parse_file(path)
+        lines = results[path].lines
+        assert results[path].error is None
+        assert lines is not None and lines == expected_lines
+        assert type(lines[0]) is type(expected_lines[0])
+        assert results[path].machine_state == expected_parser.machine_state
+    # Every file starts from the same machine state, and the parser's own machine state is left alone
+    assert parser.machine_state == initial_machine_state
+
+
+def test_parser_pool(gcode_paths: list[Path], tmp_path: Path):
+    broken_path = tmp_path / "broken.ngc"
+    broken_path.write_text("G1 X1\nG1 X#3\n")
+    missing_path = tmp_path / "missing.ngc"
+    initial_machine_state = LinuxCNCMachineState(initial_parameter_values={1: 0, 2: 0})
+
+    with ParserPool(LinuxCNC(initial_machine_state), workers=2) as pool:
+        results = {result.path: result for result in pool.parse_many([broken_path, *gcode_paths, missing_path])}
+        assert isinstance(results[broken_path].error, exceptions.UndefinedParameter)
+        assert isinstance(results[missing_path].error, FileNotFoundError)
+        assert results[broken_path].lines is None and results[broken_path].machine_state is None
+        assert all(results[path].error is None for path in gcode_paths)
+
+        # The same workers are reused
+        summaries = {result.path: result.summary for result in pool.parse_many(gcode_paths, summarize=True)}
+        for path in gcode_paths:
+            assert summaries[path] == LinuxCNC(initial_machine_state).summarize(path)
@@ -0,0 +1,141 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from rs274_parser import fingerprints
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.linuxcnc import MachineState as LinuxCNCMachineState
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+from rs274_parser.program_cache import CACHE_FILE_SUFFIX, ProgramCache
+from rs274_parser.types import CompactLine
+
+PROGRAM = """\
+N10 G1 X1.5 Y-2 Z-0.0 F1500 (literal) (two comments)
+#1 = [#2 * 2] #2 = 3.5
+G0 X#1 Y-#2 G1.0
+/ #3 = 1 (comment ü)
+G1 X#3
+#<name> = 2 ; named
+G1 X#<name>
+"""
+
+
+@pytest.mark.parametrize(
+    "parser_class,machine_state_class",
+    [(Rs274, MachineState), (LinuxCNC, LinuxCNCMachineState)],
+)
+@pytest.mark.parametrize("is_block_delete_switch_enabled", [False, True])
+@pytest.mark.parametrize("compact_lines", [False, True])
+def test_program_cache__same_as_parse(
+    tmp_path: Path,
+    parser_class,
+    machine_state_class,
+    is_block_delete_switch_enabled: bool,
+    compact_lines: bool,
+):
+    program = PROGRAM if parser_class is LinuxCNC else PROGRAM.split("#<name>")[0]
+    machine_state = machine_state_class(
+        initial_parameter_values={2: 1, 3: 0},
+        is_block_delete_switch_enabled=is_block_delete_switch_enabled,
+    )
+    cache = ProgramCache(tmp_path)
+
+    def parse():
+        parser = parser_class(machine_state, compact_lines=compact_lines)
+        return cache.parse(parser, program), parser.machine_state
+
+    expected_lines = parser_class(machine_state, compact_lines=compact_lines).parse(program)
+
+    parsed_lines, parsed_state = parse()
+    loaded_lines, loaded_state = parse()
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert loaded_lines == parsed_lines == expected_lines
+    assert [str(line) for line in loaded_lines] == [str(line) for line in expected_lines]
+    assert [type(word.number) for line in loaded_lines for word in line.words] == [
+        type(word.number) for line in expected_lines for word in line.words
+    ]
+    assert all(isinstance(line, CompactLine) == compact_lines for line in loaded_lines)
+    assert loaded_state == parsed_state
+
+
+def test_program_cache__key(tmp_path: Path):
+    cache = ProgramCache(tmp_path)
+
+    key = cache.key(Rs274(), PROGRAM)
+    assert cache.key(Rs274(fast_path=True, compact_lines=True), PROGRAM) == key
+    assert cache.key(Rs274(), PROGRAM + "G0") != key
+    assert cache.key(LinuxCNC(), PROGRAM) != key
+    assert cache.key(Rs274(MachineState(initial_parameter_values={1: 1})), PROGRAM) != key
+    assert cache.key(Rs274(MachineState(is_block_delete_switch_enabled=True)), PROGRAM) != key
+    assert cache.key(Rs274(extra_rule="extra <- 'x'"), PROGRAM) != key
+
+
+def test_program_cache__key_parsing_version(tmp_path: Path, monkeypatch):
+    # Programs cached by a version of the package that parsed them differently aren't reused
+    cache = ProgramCache(tmp_path)
+    key = cache.key(Rs274(), PROGRAM)
+    monkeypatch.setattr(fingerprints, "PARSING_VERSION", fingerprints.PARSING_VERSION + 1)
+    assert cache.key(Rs274(), PROGRAM) != key
+
+
+def test_program_cache__files(tmp_path: Path):
+    path = tmp_path / "program.ngc"
+    path.write_text("G1 X1\n#1 = 2\nG1 X#1\n")
+    cache = ProgramCache(tmp_path / "cache")
+
+    expected_lines = LinuxCNC().parse_file(path)
+    assert cache.parse(LinuxCNC(), path) == expected_lines
+    assert cache.parse(LinuxCNC(), path) == expected_lines
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    path.write_text("G1 X1\n#1 = 3\nG1 X#1\n")
+    assert cache.parse(LinuxCNC(), path) == LinuxCNC().parse_file(path)
+    assert cache.misses == 2
+
+
+def test_program_cache__sections(tmp_path: Path):
+    cache = ProgramCache(tmp_path)
+    parser = Rs274()
+    cache.parse(parser, "G1 X1 Y2\nN5 G0 Z3.5")
+
+    program = cache.get(cache.key(Rs274(), "G1 X1 Y2\nN5 G0 Z3.5"))
+    assert program is not None
+    with program:
+        assert program.line_count == 2
+        assert program.sections["word_offsets"].tolist() == [0, 3, 5]
+        assert bytes(program.sections["letters"]) == b"GXYGZ"
+        assert program.sections["numbers"].tolist() == [1.0, 1.0, 2.0, 0.0, 3.5]
+
+
+def test_program_cache__corrupt_files(tmp_path: Path):
+    cache = ProgramCache(tmp_path)
+    key = cache.key(Rs274(), "G0 X1")
+    cache.path(key).write_bytes(b"RS274PRG garbage")
+
+    assert cache.parse(Rs274(), "G0 X1") == Rs274().parse("G0 X1")
+    assert cache.misses == 1
+    assert cache.parse(Rs274(), "G0 X1") == Rs274().parse("G0 X1")
+    assert cache.hits == 1
+
+
+def test_program_cache__eviction(tmp_path: Path):
+    cache = ProgramCache(tmp_path)
+    for index in range(5):
+        cache.parse(Rs274(), f"G0 X{index}")
+        # Make sure every file has a distinct last use time
+        path = cache.path(cache.key(Rs274(), f"G0 X{index}"))
+        os.utime(path, ns=(index * 10**9, index * 10**9))
+
+    file_size = cache.size() // 5
+    cache.max_size = 3 * file_size
+    cache.evict()
+
+    remaining = sorted(path.name for path in tmp_path.glob(f"*{CACHE_FILE_SUFFIX}"))
+    assert remaining == sorted(cache.path(cache.key(Rs274(), f"G0 X{index}")).name for index in [2, 3, 4])
+
+    cache.clear()
+    assert cache.size() == 0
+    # No temporary files are left behind
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,130 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from rs274_parser import exceptions, fingerprints
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.linuxcnc import MachineState as LinuxCNCMachineState
+from rs274_parser.dialects.rs274ngc import Rs274
+from rs274_parser.program_index import CHECKPOINTS_SUFFIX, LINE_INDEX_SUFFIX, ProgramIndex
+
+
+def program(line_count: int) -> str:
+    lines = []
+    for index in range(line_count):
+        if index % 7 == 0:
+            lines.append(f"#1 = [#1 + 1] #<count> = {index}")
+        elif index % 11 == 0:
+            lines.append(f"/ #2 = {index}.5")
+        else:
+            lines.append(f"G1 X[#1 * 2] Y#2 Z#<count> (line {index})")
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def gcode_path(tmp_path: Path) -> Path:
+    path = tmp_path / "program.ngc"
+    path.write_text(program(100))
+    return path
+
+
+def make_parser(is_block_delete_switch_enabled: bool = False) -> LinuxCNC:
+    return LinuxCNC(
+        LinuxCNCMachineState(
+            initial_parameter_values={1: 0, 2: 0},
+            initial_named_parameter_values={"count": 0},
+            is_block_delete_switch_enabled=is_block_delete_switch_enabled,
+        )
+    )
+
+
+@pytest.mark.parametrize("is_block_delete_switch_enabled", [False, True])
+def test_program_index__same_as_parse(gcode_path: Path, is_block_delete_switch_enabled: bool):
+    expected_lines = make_parser(is_block_delete_switch_enabled).parse_file(gcode_path)
+
+    with ProgramIndex(make_parser(is_block_delete_switch_enabled), gcode_path, checkpoint_interval=8) as index:
+        assert len(index) == 100
+        assert index.parse_range(0, 100) == expected_lines
+        assert index.parse_range(37, 61) == expected_lines[37:61]
+        assert index[50] == expected_lines[50]
+        assert index[-1] == expected_lines[-1]
+        assert index[10:30:3] == expected_lines[10:30:3]
+        assert index[60:40:-2] == expected_lines[60:40:-2]
+        assert index[95:200] == expected_lines[95:]
+
+        parser = index.seek(45)
+        assert [parser._parse_line(line) for line in list(index.file)[45:]] == expected_lines[45:]
+
+        with pytest.raises(IndexError):
+            index[100]
+
+
+def test_program_index__machine_state_at(gcode_path: Path):
+    parser = make_parser()
+    parser.parse_file(gcode_path)
+
+    with ProgramIndex(make_parser(), gcode_path, checkpoint_interval=16) as index:
+        assert index.machine_state_at(100) == parser.machine_state
+        assert index.machine_state_at(0) == make_parser().machine_state
+
+
+def test_program_index__saved(gcode_path: Path):
+    with ProgramIndex(make_parser(), gcode_path, checkpoint_interval=8) as index:
+        expected_lines = index[:]
+
+    checkpoints_path = gcode_path.with_name(gcode_path.name + CHECKPOINTS_SUFFIX)
+    assert checkpoints_path.exists()
+    assert gcode_path.with_name(gcode_path.name + LINE_INDEX_SUFFIX).exists()
+    # Checkpoints are stored as changes to the previous checkpoint
+    deltas = json.loads(checkpoints_path.read_text())["deltas"]
+    assert len(deltas) == 13
+    assert set(deltas[1]) == {"parameter_values", "named_parameter_values"}
+
+    # A matching saved index is loaded rather than built
+    with ProgramIndex(make_parser(), gcode_path, checkpoint_interval=8) as index:
+        assert index._deltas == deltas
+        assert index[:] == expected_lines
+
+    # The saved index isn't used with a different initial machine state
+    with ProgramIndex(make_parser(is_block_delete_switch_enabled=True), gcode_path, checkpoint_interval=8) as index:
+        assert index[:] == make_parser(is_block_delete_switch_enabled=True).parse_file(gcode_path)
+
+
+def test_program_index__saved_for_other_parsers(gcode_path: Path, monkeypatch):
+    ProgramIndex(make_parser(), gcode_path, checkpoint_interval=8).close()
+    built = []
+    build_checkpoints = ProgramIndex._build_checkpoints
+    monkeypatch.setattr(ProgramIndex, "_build_checkpoints", lambda self: built.append(1) or build_checkpoints(self))
+
+    with ProgramIndex(make_parser(), gcode_path, checkpoint_interval=8):
+        assert built == []
+
+    # Saved indexes aren't used by parsers with a different grammar, or by a version that parses differently
+    other_grammar_parser = LinuxCNC(make_parser().machine_state, extra_rule="extra <- 'x'")
+    with ProgramIndex(other_grammar_parser, gcode_path, checkpoint_interval=8, save=False):
+        assert built == [1]
+    monkeypatch.setattr(fingerprints, "PARSING_VERSION", fingerprints.PARSING_VERSION + 1)
+    with ProgramIndex(make_parser(), gcode_path, checkpoint_interval=8):
+        assert built == [1, 1]
+
+
+def test_program_index__errors(tmp_path: Path):
+    path = tmp_path / "program.ngc"
+    path.write_text("G1 X1\nG1 X#1\n")
+
+    with pytest.raises(exceptions.UndefinedParameter):
+        ProgramIndex(Rs274(), path, save=False)
+    assert not path.with_name(path.name + CHECKPOINTS_SUFFIX).exists()
+
+
+def test_program_index__unknown_letters(tmp_path: Path):
+    # Lines that parse() rejects, but that don't affect the machine state
+    path = tmp_path / "program.ngc"
+    path.write_text("G1 X1\nG1 U1\n")
+
+    with pytest.raises(RuntimeError):
+        Rs274().parse_file(path)
+    with pytest.raises(RuntimeError):
+        ProgramIndex(Rs274(), path, save=False)
+    assert not path.with_name(path.name + CHECKPOINTS_SUFFIX).exists()
@@ -0,0 +1,65 @@
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+from rs274_parser.stats import ParserStats
+
+PROGRAM = """\
+#1 = [1 + 2 * 3]
+G1 X#1 Y[sin[30]] F1.5
+G0 X1
+"""
+
+
+def test_stats():
+    parser = Rs274()
+    stats = parser.enable_stats(slowest_line_count=2)
+    assert parser.stats is stats
+
+    lines = parser.parse(PROGRAM)
+
+    assert lines == Rs274().parse(PROGRAM)
+    assert stats.lines == 3
+    assert stats.bytes == len(PROGRAM) - 3
+    assert stats.calls["transform_line"] == 3
+    assert stats.calls["commit_parameter_values"] == 3
+    assert stats.calls["transform_numeric_parameter"] == 1
+    assert stats.calls["transform_unary_operation"] == 1
+    assert stats.calls["transform_float"] == 1
+    assert all(stats.times_ns[name] > 0 for name, calls in stats.calls.items() if calls)
+    assert len(stats.slowest_lines) == 2
+    assert stats.slowest_lines[0][0] >= stats.slowest_lines[1][0]
+    assert "transform_line" in stats.report()
+    assert stats.as_dict()["lines"] == 3
+
+
+def test_stats__fast_path_and_compiled_programs():
+    parser = LinuxCNC(fast_path=True)
+    stats = parser.enable_stats()
+    parser.parse("G0 X1\nG1 X2")
+    assert stats.calls["transform_word"] == 4
+
+    stats.reset()
+    compiled = Rs274().compile(PROGRAM)
+    list(compiled.iter_evaluate(parser))
+    assert stats.calls["transform_line"] == 3
+
+
+def test_disable_stats():
+    parser = Rs274(MachineState(initial_parameter_values={1: 1}))
+    stats = parser.enable_stats()
+    parser.parse("G0 X#1")
+    parser.disable_stats()
+    parser.parse("G0 X#1")
+
+    assert parser.stats is None
+    assert stats.lines == 1
+    # All wrappers are gone
+    assert not any(name.startswith("transform_") or name == "_parse_line" for name in vars(parser))
+
+
+def test_slowest_lines():
+    stats = ParserStats(slowest_line_count=2)
+    for time_ns, line in [(3, "a"), (1, "b"), (5, "c"), (2, "d")]:
+        stats.record_line(line, time_ns)
+
+    assert stats.slowest_lines == [(5, "c"), (3, "a")]
+    assert stats.line_time_ns == 11
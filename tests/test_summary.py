@@ -0,0 +1,134 @@
+from pathlib import Path
+
+import pytest
+
+from rs274_parser import exceptions
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.linuxcnc import MachineState as LinuxCNCMachineState
+from rs274_parser.dialects.rs274ngc import Rs274
+from rs274_parser.summary import ProgramSummary, summarize
+
+PROGRAM = """\
+N10 G21 G90 (setup)
+T1 M6
+S12000 M3
+G0 X10 Y5 Z5
+G1 Z-1 F300
+g2 x20 y5 i5 j0 f600
+G91 G1 X-30
+G90 G0 Z[#1 * 5]
+#1 = 3
+/ T#1 M6 S#1
+G92 X0
+G10 L2 P1 X50
+G81 X1 Y1 Z-2 R1
+X2
+G80
+X3
+M30
+"""
+
+
+def make_parser(is_block_delete_switch_enabled: bool = False, fast_path: bool = False) -> LinuxCNC:
+    return LinuxCNC(
+        LinuxCNCMachineState(
+            initial_parameter_values={1: 2},
+            is_block_delete_switch_enabled=is_block_delete_switch_enabled,
+        ),
+        fast_path=fast_path,
+    )
+
+
+@pytest.mark.parametrize("fast_path", [False, True])
+def test_summarize(fast_path: bool):
+    parser = make_parser(fast_path=fast_path)
+    summary = parser.summarize(PROGRAM)
+
+    assert summary == ProgramSummary(
+        lines=17,
+        deleted_lines=0,
+        comments=1,
+        letter_counts={
+            "F": 2,
+            "G": 13,
+            "I": 1,
+            "J": 1,
+            "L": 1,
+            "M": 4,
+            "P": 1,
+            "R": 1,
+            "S": 2,
+            "T": 2,
+            "X": 8,
+            "Y": 3,
+            "Z": 4,
+        },
+        code_counts={
+            "G0": 2,
+            "G1": 2,
+            "G2": 1,
+            "G10": 1,
+            "G21": 1,
+            "G80": 1,
+            "G81": 1,
+            "G90": 2,
+            "G91": 1,
+            "G92": 1,
+            "M3": 1,
+            "M30": 1,
+            "M6": 2,
+        },
+        # G91 X-30 from X20 is X-10, G92 and G10 aren't moves, and X3 is after G80 cancelled the motion mode
+        axis_ranges={"X": (-10, 20), "Y": (1, 5), "Z": (-2, 10)},
+        feed_range=(300, 600),
+        spindle_speed_range=(3, 12000),
+        tools=[1, 3],
+        rapid_moves=2,
+        # G1, G2, G91 G1 and two drilling cycle moves
+        feed_moves=5,
+    )
+
+    expected_parser = make_parser()
+    expected_parser.parse(PROGRAM)
+    assert parser.machine_state == expected_parser.machine_state
+
+
+def test_summarize__block_delete():
+    summary = make_parser(is_block_delete_switch_enabled=True).summarize(PROGRAM)
+
+    assert summary.lines == 17
+    assert summary.deleted_lines == 1
+    assert summary.tools == [1]
+    assert summary.spindle_speed_range == (12000, 12000)
+    assert summary.code_counts["M6"] == 1
+
+
+def test_summarize__sources(tmp_path: Path):
+    path = tmp_path / "program.ngc"
+    path.write_text(PROGRAM)
+    expected = make_parser().summarize(PROGRAM)
+
+    assert summarize(make_parser(), path) == expected
+    assert summarize(make_parser(), PROGRAM.splitlines(keepends=True)) == expected
+    with open(path) as f:
+        assert summarize(make_parser(), f, fast_path=True) == expected
+
+
+def test_summarize__empty():
+    assert Rs274().summarize("") == ProgramSummary()
+    assert Rs274().summarize("(only a comment)\n\nM2") == ProgramSummary(
+        lines=3, comments=1, letter_counts={"M": 1}, code_counts={"M2": 1}
+    )
+
+
+def test_summarize__errors():
+    with pytest.raises(exceptions.UndefinedParameter):
+        Rs274().summarize("G1 X1\nG1 X#1")
+
+    with pytest.raises(ValueError):
+        Rs274(start_rule="expression").summarize("1 + 2")
+
+    # Like parsing, words with letters the dialect doesn't know are errors
+    for fast_path in (False, True):
+        with pytest.raises(RuntimeError):
+            Rs274(fast_path=fast_path).summarize("G1 X1\nG1 U1")
@@ -0,0 +1,91 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.workloads import WORKLOADS
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.linuxcnc import MachineState as LinuxCNCMachineState
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+
+THREADS = 8
+OPTIONS = [
+    {},
+    {"backend": "descent"},
+    {"fast_path": True, "line_cache_size": 64},
+    {"compact_lines": True, "backend": "descent", "fast_path": True},
+]
+
+
+@pytest.mark.parametrize(
+    "parser_class,machine_state_class",
+    [(Rs274, MachineState), (LinuxCNC, LinuxCNCMachineState)],
+)
+def test_concurrent_parsing_matches_serial(parser_class: type[Rs274], machine_state_class: type[MachineState]):
+    dialect = parser_class.__name__.lower()
+    workloads = [workload for workload in WORKLOADS.values() if dialect in workload.dialects]
+    # Threads share the initial machine states, which parsers only read
+    machine_states = {
+        workload.name: machine_state_class(
+            initial_parameter_values={1: 1},
+            is_block_delete_switch_enabled=workload.is_block_delete_switch_enabled,
+        )
+        for workload in workloads
+    }
+    jobs = [
+        (workload, seed, options_index)
+        for workload in workloads
+        for seed in range(2)
+        for options_index in range(len(OPTIONS))
+    ]
+
+    def parse(job):
+        workload, seed, options_index = job
+        parser = parser_class(machine_states[workload.name], **OPTIONS[options_index])
+        lines = list(parser.iter_parse(workload.lines(150, seed=seed)))
+        return lines, parser.machine_state, parser.summarize(workload.lines(50, seed=seed + 10))
+
+    expected = [parse(job) for job in jobs]
+
+    barrier = threading.Barrier(THREADS)
+
+    def parse_concurrently(job_and_wait):
+        job, wait = job_and_wait
+        if wait:
+            # Make sure all threads have started before the first parse
+            barrier.wait()
+        return parse(job)
+
+    # Switch between the threads as often as possible
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        with ThreadPoolExecutor(THREADS) as executor:
+            concurrent_jobs = [(job, False) for job in jobs + list(reversed(jobs))]
+            results = list(executor.map(parse_concurrently, [(jobs[0], True)] * THREADS + concurrent_jobs))
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert results[:THREADS] == [expected[0]] * THREADS
+    assert results[THREADS:] == expected + list(reversed(expected))
+
+
+def test_clone():
+    parser = LinuxCNC(
+        LinuxCNCMachineState(initial_parameter_values={1: 1}),
+        fast_path=True,
+        backend="descent",
+        line_cache_size=16,
+    )
+    parser.parse("#1 = 2 #<a> = 3")
+
+    clone = parser.clone()
+    assert type(clone) is LinuxCNC
+    assert clone._options() == parser._options()
+    assert clone.machine_state == parser.machine_state
+    assert clone.parser is parser.parser
+
+    # The clone's machine state is its own
+    assert str(clone.parse("#1 = 4 G0 X#1 Y#<a>")[0]) == "G0 X2 Y3"
+    assert str(parser.parse("G0 X#1")[0]) == "G0 X2"
@@ -0,0 +1,162 @@
+import math
+
+import pytest
+
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+
+np = pytest.importorskip("numpy")
+
+from rs274_parser.toolpath import (  # noqa: E402
+    CLOCKWISE_ARC,
+    COUNTERCLOCKWISE_ARC,
+    LINEAR,
+    MAX_ARC_SEGMENTS,
+    RAPID,
+    XY_PLANE,
+    ZX_PLANE,
+    extract_moves,
+    extract_toolpath,
+    tessellate,
+)
+
+
+def toolpath(gcode: str, tolerance: float = 0.001):
+    parser = LinuxCNC()
+    return extract_toolpath(parser.parse(gcode), parser.word_info, tolerance=tolerance)
+
+
+def assert_connected(path):
+    assert np.allclose(path.starts[1:], path.ends[:-1])
+
+
+def test_extract_moves__linear():
+    parser = LinuxCNC()
+    moves = extract_moves(
+        parser.parse("G0 X1 Y2\nG1 Z-1 F100\nG91 X1\nX1 Y1\nG90 G1 X0 Y0\nM3 S1000\nF200"), parser.word_info
+    )
+
+    assert moves.line_indices.tolist() == [0, 1, 2, 3, 4]
+    assert moves.motions.tolist() == [RAPID, LINEAR, LINEAR, LINEAR, LINEAR]
+    assert moves.starts.tolist() == [[0, 0, 0], [1, 2, 0], [1, 2, -1], [2, 2, -1], [3, 3, -1]]
+    assert moves.ends.tolist() == [[1, 2, 0], [1, 2, -1], [2, 2, -1], [3, 3, -1], [0, 0, -1]]
+
+
+def test_extract_moves__initial_position_and_non_motion_lines():
+    parser = LinuxCNC()
+    moves = extract_moves(
+        parser.parse("G1 X1\nG92 X0\nG10 L2 P1 X5\nG81 X3 R1 Z-1\nG80\nX4\nG1 X2"),
+        parser.word_info,
+        initial_position=(0, 0, 5),
+    )
+
+    # G92 and G10 aren't moves, and the canned cycle and G80 stop G1 from being the motion mode
+    assert moves.line_indices.tolist() == [0, 6]
+    assert moves.ends.tolist() == [[1, 0, 5], [2, 0, 5]]
+
+
+def test_tessellate__linear_moves_are_not_split():
+    path = toolpath("G0 X1 Y1 Z1\nG1 X2 Y3\nG1 Z0")
+
+    assert path.line_indices.tolist() == [0, 1, 2]
+    assert path.motions.tolist() == [RAPID, LINEAR, LINEAR]
+    assert path.ends.tolist() == [[1, 1, 1], [2, 3, 1], [2, 3, 0]]
+    assert_connected(path)
+
+
+@pytest.mark.parametrize(
+    "gcode",
+    [
+        # Half circles around (0, 0) through (0, 1) and (0, -1)
+        "G0 X1\nG3 X-1 I-1 J0",
+        "G0 X1\nG3 X-1 R1",
+        "G0 X1\nG90.1 G3 X-1 I0 J0",
+        "G0 X1\nG91 G3 X-2 I-1 J0",
+    ],
+)
+def test_tessellate__arc_forms(gcode: str):
+    path = toolpath(gcode, tolerance=0.01)
+
+    arc = path.motions == COUNTERCLOCKWISE_ARC
+    assert arc.sum() > 2
+    assert np.allclose(np.hypot(path.ends[arc, 0], path.ends[arc, 1]), 1)
+    # Counterclockwise from (1, 0) to (-1, 0) passes through positive Y
+    assert (path.ends[arc, 1] >= -1e-12).all()
+    assert path.ends[-1].tolist() == [-1, 0, 0]
+    assert_connected(path)
+
+
+def test_tessellate__clockwise_and_negative_radius():
+    # A positive R is the short arc, a negative R the long arc
+    short_arc = toolpath("G0 X1\nG2 X0 Y1 R1")
+    long_arc = toolpath("G0 X1\nG2 X0 Y1 R-1")
+
+    assert (short_arc.motions[1:] == CLOCKWISE_ARC).all()
+    short_length = np.linalg.norm(short_arc.ends - short_arc.starts, axis=1)[1:].sum()
+    long_length = np.linalg.norm(long_arc.ends - long_arc.starts, axis=1)[1:].sum()
+    assert short_length == pytest.approx(math.pi / 2, rel=1e-3)
+    assert long_length == pytest.approx(3 * math.pi / 2, rel=1e-3)
+
+
+def test_tessellate__full_circle_and_helix():
+    path = toolpath("G0 X1\nG2 X1 Y0 Z-2 I-1 J0", tolerance=0.01)
+
+    arc = path.motions == CLOCKWISE_ARC
+    # The full circle is tessellated, and Z descends linearly along it
+    assert np.allclose(np.hypot(path.ends[arc, 0], path.ends[arc, 1]), 1)
+    assert (np.diff(path.ends[arc, 2]) < 0).all()
+    assert path.ends[-1].tolist() == [1, 0, -2]
+    assert path.ends[arc, 1].min() == pytest.approx(-1, abs=0.01)
+    assert path.ends[arc, 1].max() == pytest.approx(1, abs=0.01)
+
+
+def test_tessellate__planes():
+    # G18 (ZX plane, with Z as the first axis): G3 from X1 to X-1 around the origin goes through negative Z
+    path = toolpath("G0 X1\nG18 G3 X-1 I-1 K0")
+
+    moves = extract_moves(LinuxCNC().parse("G0 X1\nG18 G3 X-1 I-1 K0"), LinuxCNC().word_info)
+    assert moves.planes.tolist() == [XY_PLANE, ZX_PLANE]
+    assert (path.ends[:, 1] == 0).all()
+    assert path.ends[:, 2].min() == pytest.approx(-1, abs=0.001)
+
+    # G19 (YZ plane): G2 from Y1 to Y-1 around the origin goes through negative Z
+    path = toolpath("G0 Y1\nG19 G2 Y-1 J-1 K0")
+    assert (path.ends[:, 0] == 0).all()
+    assert path.ends[:, 2].min() == pytest.approx(-1, abs=0.001)
+
+
+@pytest.mark.parametrize("tolerance", [0.1, 0.01, 0.001])
+def test_tessellate__tolerance(tolerance: float):
+    path = toolpath("G0 X10\nG3 X-10 I-10 J0", tolerance=tolerance)
+
+    arc = path.motions == COUNTERCLOCKWISE_ARC
+    midpoints = (path.starts[arc] + path.ends[arc]) / 2
+    deviations = 10 - np.hypot(midpoints[:, 0], midpoints[:, 1])
+    assert deviations.max() <= tolerance
+    # Chords are not much shorter than they need to be
+    assert deviations.max() > tolerance / 2
+
+
+def test_tessellate__tiny_tolerance():
+    # 1 - tolerance / radius rounds to 1
+    path = toolpath("G0 X1000\nG3 X-1000 I-1000 J0", tolerance=1e-14)
+
+    arc = path.motions == COUNTERCLOCKWISE_ARC
+    assert arc.sum() == MAX_ARC_SEGMENTS
+    assert np.allclose(np.hypot(path.ends[arc, 0], path.ends[arc, 1]), 1000)
+    assert path.ends[-1].tolist() == [-1000, 0, 0]
+
+    path = toolpath("G0 X1000\nG3 X-1000 I-1000 J0", tolerance=1e-6)
+    arc = path.motions == COUNTERCLOCKWISE_ARC
+    midpoints = (path.starts[arc] + path.ends[arc]) / 2
+    deviations = 1000 - np.hypot(midpoints[:, 0], midpoints[:, 1])
+    assert 0.5e-6 < deviations.max() <= 1e-6
+
+
+def test_tessellate__empty_and_invalid_tolerance():
+    parser = LinuxCNC()
+    moves = extract_moves(parser.parse("M3\n(no moves)"), parser.word_info)
+
+    assert len(moves) == 0
+    assert len(tessellate(moves)) == 0
+    with pytest.raises(ValueError):
+        tessellate(moves, tolerance=0)
@@ -1,6 +1,44 @@
-from rs274_parser.dialects.rs274ngc import word
-from rs274_parser.types import Word
+import pickle
 
+from rs274_parser.dialects.rs274ngc import word
+from rs274_parser.types import EMPTY_MAPPING, Line, Word, compact_line
 
 # def test_word_ordering():
 #     words = [word("")]
+
+
+def test_pickle():
+    line = Line(
+        words=[word("G", 1), word("X", 1.5)],
+        comments=["comment"],
+        numeric_assignments={1: 2},
+        named_assignments={"a": 1},
+        line_number=10,
+    )
+
+    unpickled_line = pickle.loads(pickle.dumps(line))
+    assert unpickled_line == line
+    assert unpickled_line.first("X") == word("X", 1.5)
+    assert unpickled_line.words[0].ordering == line.words[0].ordering
+
+
+def test_pickle__compact_line():
+    line = compact_line((word("G", 1), word("X", 1.5)), ("comment",), {1: 2}, None, 10)
+
+    unpickled_line = pickle.loads(pickle.dumps(line))
+    assert unpickled_line == line
+    assert unpickled_line.named_assignments is EMPTY_MAPPING
+
+
+def test_first():
+    line = Line(words=[word("G", 0), word("G", 1), word("X", 1.5)])
+    compact = compact_line(tuple(line.words))
+
+    for parsed_line in [line, compact]:
+        assert parsed_line.first("G") == word("G", 0)
+        assert parsed_line.first("G", {1}) == word("G", 1)
+        assert parsed_line.first("G", {2}) is None
+        assert parsed_line.first("Y") is None
+
+    # The word index doesn't affect equality
+    assert line == Line(words=[word("G", 0), word("G", 1), word("X", 1.5)])
@@ -0,0 +1,74 @@
+import pytest
+from pe._errors import ParseError
+
+from rs274_parser import exceptions
+from rs274_parser.dialects.linuxcnc import LinuxCNC
+from rs274_parser.dialects.rs274ngc import MachineState, Rs274
+from rs274_parser.validation import ValidationError
+
+PROGRAM = """\
+N10 G1 X1.5 Y-[2 * 3] F1500 (literal)
+G1 X#1
+#1 = 2 #2 = [1 + 2]
+G1 X[#1
+/ #3 = 1
+G1 X#3
+G1 X[sqrt[-1]] Y#2
+#4 = [#5 + 1]
+G1 X#4
+"""
+
+
+@pytest.mark.parametrize("parser_class", [Rs274, LinuxCNC])
+@pytest.mark.parametrize("fast_path", [False, True])
+def test_validate(parser_class: type[Rs274], fast_path: bool):
+    parser = parser_class(fast_path=fast_path)
+    errors = parser.validate(PROGRAM)
+
+    assert [(error.line_index, type(error.error)) for error in errors] == [
+        (1, exceptions.UndefinedParameter),
+        (3, ParseError),
+        (6, ValueError),
+        (7, exceptions.UndefinedParameter),
+        # The line that failed to set #4 didn't set it
+        (8, exceptions.UndefinedParameter),
+    ]
+    assert errors[0].line == "G1 X#1"
+    assert str(errors[0]) == "Line 2: UndefinedParameter: Parameter #1 is undefined."
+    assert parser.machine_state.parameter_values == {1: 2, 2: 3, 3: 1}
+
+
+def test_validate__block_delete():
+    parser = Rs274(MachineState(is_block_delete_switch_enabled=True))
+
+    assert parser.validate("/ #1 = 1\nG1 X1\nG1 X#1") == []
+    # Like when parsing, the block-deleted line's assignment was committed by the next line
+    assert parser.machine_state.parameter_values == {1: 1}
+
+
+@pytest.mark.parametrize("parser_class", [Rs274, LinuxCNC])
+@pytest.mark.parametrize("fast_path", [False, True])
+def test_validate__unknown_letters(parser_class: type[Rs274], fast_path: bool):
+    program = "G1 X1\nE1\nO1\nG1 U[1 + 1]\nV1\nw1\nG0 Y2"
+    errors = parser_class(fast_path=fast_path).validate(program)
+
+    assert [(error.line_index, type(error.error)) for error in errors] == [
+        (index, RuntimeError) for index in range(1, 6)
+    ]
+    for error in errors:
+        with pytest.raises(RuntimeError):
+            parser_class().parse(error.line)
+
+
+def test_validate__same_state_as_parse():
+    program = "#<a> = 1 #1 = 2\nG1 X#<a> Y#1 (comment) ; more\n#<a> = [#<a> + #1]"
+    parser = LinuxCNC()
+    validating_parser = LinuxCNC()
+
+    parser.parse(program)
+    assert validating_parser.validate(program) == []
+    assert validating_parser.machine_state == parser.machine_state
+
+
+def test_validation_error__without_message():
+    assert str(ValidationError(0, "G1 X[", ParseError())) == "Line 1: ParseError"